@@ -1,17 +1,69 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import os
+import time
+
+from app.utils.metrics import Counter, Gauge, Histogram
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Railway requires SSL; set DATABASE_SSLMODE=disable for a local Postgres
+DATABASE_SSLMODE = os.getenv("DATABASE_SSLMODE", "require")
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"sslmode": "require"}   # Railway requires SSL
+    connect_args={"sslmode": DATABASE_SSLMODE}
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+# -------------------------------------------------------
+# METRICS
+# -------------------------------------------------------
+# A session holds a pooled connection from its first query until it
+# commits/closes, so checkout → checkin time is the session's DB time.
+
+db_query_duration = Histogram("db_query_duration_seconds", "SQL statement latency", ["operation"])
+db_errors = Counter("db_errors_total", "SQL statements that raised", ["error"])
+db_connections_in_use = Gauge("db_connections_in_use", "Pooled connections checked out by sessions")
+db_session_duration = Histogram("db_session_duration_seconds", "Time a session held its pooled connection")
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    operation = statement.lstrip().split(" ", 1)[0].upper()
+    db_query_duration.observe(time.perf_counter() - started, operation=operation)
+
+
+@event.listens_for(engine, "handle_error")
+def _on_error(context):
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+    db_errors.inc(error=type(context.original_exception).__name__)
+
+
+@event.listens_for(engine, "checkout")
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checked_out_at"] = time.perf_counter()
+    db_connections_in_use.inc()
+
+
+@event.listens_for(engine, "checkin")
+def _on_checkin(dbapi_connection, connection_record):
+    started = connection_record.info.pop("checked_out_at", None)
+    if started is not None:
+        db_connections_in_use.dec()
+        db_session_duration.observe(time.perf_counter() - started)
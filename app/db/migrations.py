@@ -0,0 +1,39 @@
+import logging
+
+from sqlalchemy import text
+
+from app.db.database import engine
+
+log = logging.getLogger("migrations")
+
+# -------------------------------------------------------
+# LIGHTWEIGHT SCHEMA MIGRATIONS
+# -------------------------------------------------------
+# Base.metadata.create_all() creates missing tables but never alters
+# existing ones. Columns added to models after a table went live are
+# listed here and added at startup; every statement is idempotent.
+
+ADDED_COLUMNS = [
+    # table, column, DDL type
+    ("jobs", "content_hash", "VARCHAR(64)"),
+    ("jobs", "normalized", "JSONB"),
+    ("resumes", "content_hash", "VARCHAR(64)"),
+    ("resumes", "parse_status", "VARCHAR"),
+    ("resumes", "parse_error", "TEXT"),
+    ("resumes", "parse_heartbeat_at", "TIMESTAMP"),
+    ("llm_usage", "optimization_job_id", "VARCHAR"),
+]
+
+ADDED_INDEXES = [
+    ("ix_jobs_content_hash", "jobs", "content_hash"),
+    ("ix_resumes_content_hash", "resumes", "content_hash"),
+]
+
+
+def run_migrations():
+    with engine.begin() as conn:
+        for table, column, ddl_type in ADDED_COLUMNS:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {ddl_type}"))
+        for name, table, column in ADDED_INDEXES:
+            conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"))
+    log.info("Schema migrations applied (%d columns)", len(ADDED_COLUMNS))
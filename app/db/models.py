@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, String, Text, Integer, ForeignKey, DateTime, LargeBinary
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -34,6 +34,13 @@ class Resume(Base):
     user_id = Column(String, index=True)
     filename = Column(String)
     raw_text = Column(Text)
+    content_hash = Column(String(64), index=True, nullable=True)  # sha256 of the uploaded bytes
+    # Section parsing runs after the upload returns: pending | parsed | failed
+    # (NULL on rows from before two-phase uploads means parsed)
+    parse_status = Column(String, nullable=True)
+    parse_error = Column(Text, nullable=True)
+    # Bumped while a process is parsing; a stale one lets another take over
+    parse_heartbeat_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
     # New user contact info fields
@@ -74,6 +81,8 @@ class Job(Base):
     id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
     user_id = Column(String, index=True)
     jd_text = Column(Text)
+    content_hash = Column(String(64), index=True, nullable=True)  # app.services.jd_normalizer.content_hash
+    normalized = Column(JSONB, nullable=True)                     # cleaned text, requirements, keywords
     created_at = Column(DateTime, default=datetime.utcnow)
 
     generated_resumes = relationship("GeneratedResume", backref="job", cascade="all, delete-orphan")
@@ -95,4 +104,131 @@ class GeneratedResume(Base):
     iteration_count = Column(Integer)
     file_url = Column(String)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+# -------------------------------------------------------
+# GENERATED DOCX FILES (shared by the API and the worker tier)
+# -------------------------------------------------------
+
+class GeneratedDocument(Base):
+    __tablename__ = "generated_documents"
+
+    filename = Column(String, primary_key=True)  # final_resume_<uuid>.docx
+    content = Column(LargeBinary)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# -------------------------------------------------------
+# LLM RESPONSE CACHE (persistent tier of app/llm/cache.py)
+# -------------------------------------------------------
+
+class LLMCacheEntry(Base):
+    __tablename__ = "llm_cache"
+
+    key = Column(String(64), primary_key=True)  # sha256 of model + prompt + inputs
+    namespace = Column(String, index=True)
+    model = Column(String)
+    value = Column(JSONB)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+# -------------------------------------------------------
+# IN-FLIGHT OPTIMIZATIONS (cross-worker single-flight claims)
+# -------------------------------------------------------
+
+class InflightOptimization(Base):
+    __tablename__ = "inflight_optimizations"
+
+    key = Column(String(64), primary_key=True)  # sha256 of user + resume + JD
+    owner = Column(String)                      # worker that is running it
+    status = Column(String, default="running")  # running | done | failed
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+
+    started_at = Column(DateTime, default=datetime.utcnow)
+    heartbeat_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+# -------------------------------------------------------
+# OPTIMIZER GRAPH CHECKPOINTS (one thread per optimization run)
+# -------------------------------------------------------
+
+class GraphCheckpoint(Base):
+    __tablename__ = "graph_checkpoints"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    parent_checkpoint_id = Column(String, nullable=True)
+
+    # Serializer type tag + payload, as produced by the graph's serde
+    type = Column(String)
+    checkpoint = Column(LargeBinary)
+    metadata_type = Column(String)
+    metadata_blob = Column(LargeBinary)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+
+class GraphCheckpointWrite(Base):
+    __tablename__ = "graph_checkpoint_writes"
+
+    thread_id = Column(String, primary_key=True)
+    checkpoint_ns = Column(String, primary_key=True, default="")
+    checkpoint_id = Column(String, primary_key=True)
+    task_id = Column(String, primary_key=True)
+    idx = Column(Integer, primary_key=True)
+
+    channel = Column(String)
+    task_path = Column(String, default="")
+    type = Column(String)
+    value = Column(LargeBinary)
+
+
+# -------------------------------------------------------
+# OPTIMIZATION JOB QUEUE (claimed by app.worker with SKIP LOCKED)
+# -------------------------------------------------------
+
+class OptimizationJob(Base):
+    __tablename__ = "optimization_jobs"
+
+    id = Column(UUID(as_uuid=False), primary_key=True, default=generate_uuid)
+    user_id = Column(String, index=True)
+    status = Column(String, default="queued", index=True)  # queued | running | done | failed
+    state = Column(JSONB)                 # ResumeOptimizerState to run
+    result = Column(JSONB, nullable=True)  # final graph state
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, default=0)
+    worker = Column(String, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+
+
+# -------------------------------------------------------
+# LLM TOKEN USAGE LEDGER (one row per OpenAI call)
+# -------------------------------------------------------
+
+class LLMUsage(Base):
+    __tablename__ = "llm_usage"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(String, index=True, nullable=True)
+    run_id = Column(String(64), index=True, nullable=True)   # one run_optimizer() attempt
+    job_id = Column(String, nullable=True)                   # jobs.id of the posting
+    optimization_job_id = Column(String, nullable=True)      # optimization_jobs.id, for queued runs
+    generated_resume_id = Column(UUID(as_uuid=False), ForeignKey("generated_resumes.id", ondelete="SET NULL"), nullable=True)
+
+    prompt = Column(String)   # TAILOR | IMPROVE | ATS | EXTRACT
+    model = Column(String)
+    prompt_tokens = Column(Integer, default=0)
+    completion_tokens = Column(Integer, default=0)
+    cached_tokens = Column(Integer, default=0)
+    total_tokens = Column(Integer, default=0)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
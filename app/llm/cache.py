@@ -0,0 +1,280 @@
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+
+from app.db.database import SessionLocal
+from app.db import models
+
+log = logging.getLogger("llm_cache")
+
+# -------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------
+
+CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") == "1"
+CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "1") == "1"
+CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "20000"))
+CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+
+# Bump to invalidate every cached response at once (e.g. after changing
+# post-processing that runs before a value is stored).
+CACHE_VERSION = 1
+
+PRUNE_EVERY = 200
+
+stats = Counter()
+
+
+# -------------------------------------------------------
+# KEYS
+# -------------------------------------------------------
+
+def canonicalize(value):
+    """
+    Normalise inputs so cosmetic differences (whitespace, dict order)
+    map to the same cache key.
+    """
+    if isinstance(value, str):
+        return re.sub(r"\s+", " ", value).strip()
+    if isinstance(value, dict):
+        return {str(k): canonicalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonicalize(v) for v in value]
+    return value
+
+
+def make_key(namespace: str, model: str, prompt: str, inputs) -> str:
+    payload = {
+        "v": CACHE_VERSION,
+        "ns": namespace,
+        "model": model,
+        # The prompt text itself is the prompt version: edits invalidate.
+        "prompt": hashlib.sha256(prompt.encode("utf-8")).hexdigest(),
+        "inputs": canonicalize(inputs),
+    }
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------------
+# IN-PROCESS LRU TIER
+# -------------------------------------------------------
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_seconds: int):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, blob = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                stats["expired"] += 1
+                return None
+            self._data.move_to_end(key)
+            return blob
+
+    def put(self, key, blob):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, blob)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+memory_cache = LRUCache(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+# -------------------------------------------------------
+# PERSISTENT (POSTGRES) TIER
+# -------------------------------------------------------
+
+def persistent_get(key: str):
+    db = SessionLocal()
+    try:
+        entry = db.get(models.LLMCacheEntry, key)
+        if entry is None:
+            return None
+        if entry.created_at < datetime.utcnow() - timedelta(seconds=CACHE_TTL_SECONDS):
+            db.delete(entry)
+            db.commit()
+            stats["expired"] += 1
+            return None
+        return json.dumps(entry.value)
+    except Exception as e:  # best-effort tier, never fail the LLM call
+        stats["errors"] += 1
+        log.warning("LLM cache read failed: %s", e)
+        return None
+    finally:
+        db.close()
+
+
+def persistent_put(key: str, namespace: str, model: str, blob: str):
+    db = SessionLocal()
+    try:
+        db.merge(models.LLMCacheEntry(
+            key=key,
+            namespace=namespace,
+            model=model,
+            value=json.loads(blob),
+            created_at=datetime.utcnow(),
+        ))
+        db.commit()
+
+        stats["persist_writes"] += 1
+        if stats["persist_writes"] % PRUNE_EVERY == 0:
+            prune(db)
+    except Exception as e:  # best-effort tier, never fail the LLM call
+        db.rollback()
+        stats["errors"] += 1
+        log.warning("LLM cache write failed: %s", e)
+    finally:
+        db.close()
+
+
+def prune(db):
+    """
+    Drop expired rows, then the oldest rows beyond CACHE_MAX_ROWS.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=CACHE_TTL_SECONDS)
+    db.query(models.LLMCacheEntry).filter(models.LLMCacheEntry.created_at < cutoff).delete()
+
+    overflow = db.query(models.LLMCacheEntry).count() - CACHE_MAX_ROWS
+    if overflow > 0:
+        oldest = (
+            db.query(models.LLMCacheEntry.key)
+            .order_by(models.LLMCacheEntry.created_at.asc())
+            .limit(overflow)
+        )
+        db.query(models.LLMCacheEntry).filter(
+            models.LLMCacheEntry.key.in_(oldest.scalar_subquery())
+        ).delete(synchronize_session=False)
+        stats["evictions"] += overflow
+
+    db.commit()
+
+
+# -------------------------------------------------------
+# LOOKUP / STORE
+# -------------------------------------------------------
+
+def lookup_memory(key: str, namespace: str):
+    blob = memory_cache.get(key)
+    if blob is None:
+        return None
+    stats["memory_hits"] += 1
+    stats[f"{namespace}.hits"] += 1
+    return json.loads(blob)
+
+
+def lookup_persistent(key: str, namespace: str):
+    blob = persistent_get(key) if CACHE_PERSIST else None
+    if blob is None:
+        stats["misses"] += 1
+        stats[f"{namespace}.misses"] += 1
+        return None
+    memory_cache.put(key, blob)
+    stats["persistent_hits"] += 1
+    stats[f"{namespace}.hits"] += 1
+    return json.loads(blob)
+
+
+def lookup(key: str, namespace: str):
+    hit = lookup_memory(key, namespace)
+    if hit is None:
+        hit = lookup_persistent(key, namespace)
+    return hit
+
+
+def store(key: str, namespace: str, model: str, value):
+    blob = json.dumps(value)
+    memory_cache.put(key, blob)
+    if CACHE_PERSIST:
+        persistent_put(key, namespace, model, blob)
+    # Return a fresh copy so callers never share objects with the cache
+    return json.loads(blob)
+
+
+def cache_stats() -> dict:
+    return {"memory_entries": len(memory_cache), **stats}
+
+
+# -------------------------------------------------------
+# DECORATOR
+# -------------------------------------------------------
+
+def llm_cached(namespace: str, model: str, prompt: str, ignore=()):
+    """
+    Cache the JSON-serialisable return value of an LLM entry point.
+
+    The key covers the model, the prompt text and every bound argument
+    except those named in `ignore` (callbacks and the like). Works for
+    both plain and async functions.
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        def key_for(args, kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            inputs = {k: v for k, v in bound.arguments.items() if k not in ignore}
+            return make_key(namespace, model, prompt, inputs)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                if not CACHE_ENABLED:
+                    return await fn(*args, **kwargs)
+
+                key = key_for(args, kwargs)
+                hit = lookup_memory(key, namespace)
+                if hit is None:
+                    # Postgres round trip, keep it off the event loop
+                    hit = await asyncio.to_thread(lookup_persistent, key, namespace)
+                if hit is not None:
+                    return hit
+
+                value = await fn(*args, **kwargs)
+                return await asyncio.to_thread(store, key, namespace, model, value)
+
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not CACHE_ENABLED:
+                return fn(*args, **kwargs)
+
+            key = key_for(args, kwargs)
+            hit = lookup(key, namespace)
+            if hit is not None:
+                return hit
+
+            return store(key, namespace, model, fn(*args, **kwargs))
+
+        return wrapper
+
+    return decorator
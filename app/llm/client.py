@@ -0,0 +1,115 @@
+from openai import OpenAI, AsyncOpenAI
+import asyncio
+import os
+
+from app.llm.limiter import limiter_for, estimate_tokens
+from app.llm.usage import USAGE_LEDGER_ENABLED, usage_row, write_usage
+from app.utils.metrics import llm_duration, llm_errors, llm_in_flight, llm_tokens, track
+
+# -------------------------------------------------------
+# SHARED OPENAI CLIENTS
+# -------------------------------------------------------
+# One sync and one async client per process so every LLM module shares
+# the same HTTP connection pool. OPENAI_BASE_URL points them at any
+# OpenAI-compatible server (e.g. loadtest/fake_openai.py for offline runs).
+# Retries are owned by app/llm/limiter.py, so the SDK's own are disabled.
+
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "120"))
+
+# Assumed completion size when a call does not set max_tokens
+DEFAULT_OUTPUT_TOKENS = 2000
+
+client = OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, timeout=OPENAI_TIMEOUT, max_retries=0)
+async_client = AsyncOpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL, timeout=OPENAI_TIMEOUT, max_retries=0)
+
+
+# -------------------------------------------------------
+# CHAT COMPLETIONS (rate limited + retried)
+# -------------------------------------------------------
+# `label` names the prompt (TAILOR, IMPROVE, ATS, EXTRACT, ...). It is the
+# `prompt` label of the llm_* metrics and of the usage ledger rows.
+
+def record_usage(label: str, model: str, usage):
+    """
+    Update token metrics; returns the ledger row to write, if any.
+    """
+    if usage is None:
+        return None
+    llm_tokens.inc(usage.prompt_tokens or 0, model=model, prompt=label, kind="prompt")
+    llm_tokens.inc(usage.completion_tokens or 0, model=model, prompt=label, kind="completion")
+    return usage_row(label, model, usage) if USAGE_LEDGER_ENABLED else None
+
+
+def output_budget(kwargs: dict) -> int:
+    # n > 1 returns n completions for one prompt
+    return (kwargs.get("max_tokens") or DEFAULT_OUTPUT_TOKENS) * (kwargs.get("n") or 1)
+
+
+def chat(label: str, model: str, messages: list, **kwargs):
+    limiter = limiter_for(model)
+    estimate = estimate_tokens(messages, output_budget(kwargs))
+    with track(llm_duration, llm_in_flight, llm_errors, model=model, prompt=label):
+        response = limiter.run(
+            label,
+            estimate,
+            lambda: client.chat.completions.create(model=model, messages=messages, **kwargs),
+        )
+    row = record_usage(label, model, getattr(response, "usage", None))
+    if row:
+        write_usage(row)
+    return response
+
+
+async def achat(label: str, model: str, messages: list, **kwargs):
+    limiter = limiter_for(model)
+    estimate = estimate_tokens(messages, output_budget(kwargs))
+    with track(llm_duration, llm_in_flight, llm_errors, model=model, prompt=label):
+        response = await limiter.arun(
+            label,
+            estimate,
+            lambda: async_client.chat.completions.create(model=model, messages=messages, **kwargs),
+        )
+    row = record_usage(label, model, getattr(response, "usage", None))
+    if row:
+        await asyncio.to_thread(write_usage, row)
+    return response
+
+
+async def achat_stream(label: str, model: str, messages: list, **kwargs):
+    """
+    Yields completion chunks. The limiter slot is held until the stream
+    is exhausted or closed.
+    """
+    limiter = limiter_for(model)
+    estimate = estimate_tokens(messages, output_budget(kwargs))
+
+    # Timed until the stream is drained, like the non-streaming calls
+    with track(llm_duration, llm_in_flight, llm_errors, model=model, prompt=label):
+        stream = await limiter.arun(
+            label,
+            estimate,
+            lambda: async_client.chat.completions.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                stream_options={"include_usage": True},
+                **kwargs
+            ),
+            hold=True,
+        )
+
+        usage = None
+        try:
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                yield chunk
+        finally:
+            limiter.release(estimate, usage.total_tokens if usage else None)
+            row = record_usage(label, model, usage)
+            if row:
+                # Awaited so a budget check right after sees this call; the
+                # executor job is already submitted if we get cancelled here
+                await asyncio.to_thread(write_usage, row)
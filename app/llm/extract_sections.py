@@ -1,13 +1,31 @@
-from openai import OpenAI
+import asyncio
+import logging
 import os
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app.llm.client import chat, achat
+from app.llm.cache import llm_cached
+from app.llm.repair import avalidate, validate
+from app.llm.schemas import ExtractedResume, partial_extract
+from app.services.local_extract import local_extract_sections
+from app.utils.metrics import Counter
+
+log = logging.getLogger("extract_sections")
+
+EXTRACT_MODEL = "gpt-4.1-mini"
+
+# Parse locally first; the LLM only sees sections parsed below the bar
+EXTRACT_HEURISTIC = os.getenv("EXTRACT_HEURISTIC", "1") == "1"
+EXTRACT_MIN_CONFIDENCE = float(os.getenv("EXTRACT_MIN_CONFIDENCE", "0.8"))
+
+extract_sections_total = Counter(
+    "resume_extract_sections_total", "Resume sections by parser that produced them", ["parser"]
+)
 
 # -------------------------------------------------------
 # IMPROVED EXTRACTION PROMPT — STRICT, STRUCTURED, STABLE
 # -------------------------------------------------------
 
-EXTRACT_PROMPT = """
+EXTRACT_RULES = """
 You are a world-class resume parser. Extract structured resume sections from raw text.
 
 You MUST output JSON in EXACTLY the schema below.
@@ -18,37 +36,7 @@ NEVER merge multiple fields into one string.
 STRICT SCHEMA (MANDATORY — DO NOT ALTER FORMAT)
 ---------------------------------------------------------
 
-{
-  "summary": "string",
-
-  "experience": [
-    {
-      "title": "string",
-      "company": "string",
-      "location": "string",
-      "dates": "string",
-      "responsibilities": ["bullet 1", "bullet 2"]
-    }
-  ],
-
-  "education": [
-    {
-      "degree": "string",
-      "institution": "string",
-      "location": "string",
-      "dates": "string"
-    }
-  ],
-
-  "skills": {
-    "certifications": ["Azure AI Fundamentals"],
-    "programming": ["Python"],
-    "ml_ai": ["Machine Learning"],
-    "libraries_frameworks": ["TensorFlow"],
-    "devops": ["Docker"],
-    "other": []
-  }
-}
+{schema}
 
 ---------------------------------------------------------
 RULES
@@ -93,24 +81,141 @@ Return ONLY valid JSON. No commentary.
 ---------------------------------------------------------
 """
 
+# One entry of the STRICT SCHEMA per section, so a partial extraction
+# asks for exactly the keys it will be validated against
+SCHEMA_FIELDS = {
+    "summary": '  "summary": "string"',
+    "experience": """  "experience": [
+    {
+      "title": "string",
+      "company": "string",
+      "location": "string",
+      "dates": "string",
+      "responsibilities": ["bullet 1", "bullet 2"]
+    }
+  ]""",
+    "education": """  "education": [
+    {
+      "degree": "string",
+      "institution": "string",
+      "location": "string",
+      "dates": "string"
+    }
+  ]""",
+    "skills": """  "skills": {
+    "certifications": ["Azure AI Fundamentals"],
+    "programming": ["Python"],
+    "ml_ai": ["Machine Learning"],
+    "libraries_frameworks": ["TensorFlow"],
+    "devops": ["Docker"],
+    "other": []
+  }""",
+}
+EXTRACT_FIELDS = tuple(SCHEMA_FIELDS)
+
+
+def extract_prompt(fields: tuple = EXTRACT_FIELDS) -> str:
+    schema = "{\n" + ",\n\n".join(SCHEMA_FIELDS[name] for name in fields) + "\n}"
+    return EXTRACT_RULES.replace("{schema}", schema)
+
+
+EXTRACT_PROMPT = extract_prompt()
+
 # -------------------------------------------------------
 # MAIN FUNCTION
 # -------------------------------------------------------
 
-def extract_resume_sections(raw_text: str) -> dict:
+def build_extract_messages(raw_text: str, fields: tuple = EXTRACT_FIELDS) -> list:
+    return [
+        {"role": "system", "content": extract_prompt(fields)},
+        {"role": "user", "content": raw_text}
+    ]
+
+
+def extract_context(raw_text: str) -> dict:
+    # A repaired section is re-read from the resume itself
+    return {"shared": f"Follow the EXTRACT schema rules. Resume text:\n{raw_text}"}
+
+
+def extract_schema(fields: tuple):
+    return ExtractedResume if fields == EXTRACT_FIELDS else partial_extract(fields)
+
+
+@llm_cached("extract", EXTRACT_MODEL, EXTRACT_PROMPT)
+def llm_extract_sections(raw_text: str, fields: tuple = EXTRACT_FIELDS) -> dict:
     """
-    Calls GPT and returns guaranteed structured JSON.
+    Calls GPT and returns guaranteed structured JSON with the sections in
+    `fields` (all of them by default).
     """
-    response = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": EXTRACT_PROMPT},
-            {"role": "user", "content": raw_text}
-        ]
+    response = chat(
+        "EXTRACT",
+        EXTRACT_MODEL,
+        messages=build_extract_messages(raw_text, fields)
     )
 
-    json_output = response.choices[0].message.content.strip()
+    return validate("EXTRACT", extract_schema(fields), response.choices[0].message.content, extract_context(raw_text))
 
-    # Convert JSON string → dict
-    # Using eval() only because output is strictly controlled as JSON
-    return eval(json_output)
\ No newline at end of file
+
+@llm_cached("extract", EXTRACT_MODEL, EXTRACT_PROMPT)
+async def allm_extract_sections(raw_text: str, fields: tuple = EXTRACT_FIELDS) -> dict:
+    """
+    Async variant of llm_extract_sections for use inside the event loop.
+    """
+    response = await achat(
+        "EXTRACT",
+        EXTRACT_MODEL,
+        messages=build_extract_messages(raw_text, fields)
+    )
+
+    return await avalidate("EXTRACT", extract_schema(fields), response.choices[0].message.content, extract_context(raw_text))
+
+
+# -------------------------------------------------------
+# LOCAL PARSE WITH LLM FALLBACK
+# -------------------------------------------------------
+
+def plan_extract(raw_text: str):
+    """
+    Returns (local parse, sections to take from the LLM in schema order,
+    text to send it).
+    Low-confidence sections the parser located go alone; if one was not
+    located at all, the LLM reads the whole resume.
+    """
+    parsed = local_extract_sections(raw_text)
+    confidence = parsed["confidence"]
+    fallback = tuple(name for name in EXTRACT_FIELDS if confidence.get(name, 1.0) < EXTRACT_MIN_CONFIDENCE)
+
+    if fallback and all(name in parsed["lines"] for name in fallback):
+        text = "\n\n".join(f"{name.upper()}\n" + "\n".join(parsed["lines"][name]) for name in fallback)
+    else:
+        text = raw_text
+
+    log.info("Local extract confidence %s; LLM for: %s", confidence, ", ".join(fallback) or "nothing")
+    return parsed, fallback, text
+
+
+def merge_extract(parsed: dict, fallback: list, llm_sections: dict) -> dict:
+    sections = dict(parsed["sections"])
+    for name in fallback:
+        sections[name] = llm_sections[name]
+    for name in sections:
+        extract_sections_total.inc(parser="llm" if name in fallback else "local")
+    return sections
+
+
+def extract_resume_sections(raw_text: str) -> dict:
+    if not EXTRACT_HEURISTIC:
+        return llm_extract_sections(raw_text)
+    parsed, fallback, text = plan_extract(raw_text)
+    if not fallback:
+        return merge_extract(parsed, fallback, {})
+    return merge_extract(parsed, fallback, llm_extract_sections(text, fallback))
+
+
+async def aextract_resume_sections(raw_text: str) -> dict:
+    if not EXTRACT_HEURISTIC:
+        return await allm_extract_sections(raw_text)
+    parsed, fallback, text = await asyncio.to_thread(plan_extract, raw_text)
+    if not fallback:
+        return merge_extract(parsed, fallback, {})
+    return merge_extract(parsed, fallback, await allm_extract_sections(text, fallback))
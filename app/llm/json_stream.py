@@ -0,0 +1,319 @@
+import json
+import re
+
+# -------------------------------------------------------
+# INCREMENTAL JSON PARSER FOR LLM OUTPUT
+# -------------------------------------------------------
+# One pass over the completion, fed chunk by chunk as it streams in.
+# Completed values near the top of the document (the summary, each
+# experience entry, each skills category) are reported as soon as their
+# closing quote / bracket arrives, and the text of watched strings is
+# available while it is still being generated.
+#
+# Tolerates the usual LLM noise without extra passes over the text:
+# preamble before the first "{" (```json fences, prose), // comments,
+# trailing commas, unescaped quotes inside strings, raw newlines in
+# strings, Python-style True/False/None, and anything after the document.
+
+WHITESPACE = " \t\r\n"
+JSON_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f", '"': '"', "\\": "\\", "/": "/"}
+LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+
+STRING_SPECIAL = re.compile(r'["\\]')
+TOKEN_END = re.compile(r'[\s,}\]/]')
+
+# What may follow the closing quote of a key / a value
+KEY_FOLLOW = ":"
+VALUE_FOLLOW = ",}]"
+
+
+class JSONStreamParser:
+    """
+    feed(chunk) returns [(path, value), ...] for values completed by that
+    chunk whose path is at most `emit_depth` long, e.g. ("summary",),
+    ("experience", 0) or ("skills", "Tools"). close() returns the whole
+    document. Decoded text of strings at the paths in `watch` accumulates
+    as it arrives; take_text(path) returns what is new since the last call.
+    """
+
+    def __init__(self, emit_depth: int = 2, watch=()):
+        self.emit_depth = emit_depth
+        self.watch = set(watch)
+        self.buf = ""
+        self.pos = 0
+        self.state = "start"
+        self.stack = []          # [container, path, pending key]
+        self.root = None
+        self.done = False
+        self.string_parts = []
+        self.string_is_key = False
+        self.string_path = None
+        self.text = {}
+        self.events = []
+
+    # ---------------- public ----------------
+
+    def feed(self, chunk: str) -> list:
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self._run(final=False)
+        events, self.events = self.events, []
+        return events
+
+    def close(self):
+        """
+        Mark the end of the stream and return the parsed document.
+        """
+        self._run(final=True)
+        if not self.done:
+            raise ValueError(f"Incomplete JSON in LLM output (state {self.state}, depth {len(self.stack)})")
+        return self.root
+
+    def take_text(self, path: tuple) -> str:
+        return self.text.pop(path, "")
+
+    # ---------------- driver ----------------
+
+    def _run(self, final: bool):
+        buf = self.buf
+        end = len(buf)
+        while self.pos < end and not self.done:
+            if self.state == "string":
+                if not self._string(final):
+                    return
+                continue
+
+            c = buf[self.pos]
+            if c in WHITESPACE:
+                self.pos += 1
+                continue
+
+            if c == "/" and self.state != "start":
+                if not self._comment(final):
+                    return
+                continue
+
+            if self.state == "start":
+                # Skip anything before the document itself
+                if c in "{[":
+                    self._open(c)
+                else:
+                    self.pos += 1
+            elif self.state == "key":
+                if c == '"':
+                    self._begin_string(key=True)
+                elif c == "}":
+                    self._close()
+                else:
+                    self._fail(f"expected a key, got {c!r}")
+            elif self.state == "colon":
+                if c != ":":
+                    self._fail(f"expected ':', got {c!r}")
+                self.pos += 1
+                self.state = "value"
+            elif self.state == "value":
+                if c in "{[":
+                    self._open(c)
+                elif c == '"':
+                    self._begin_string(key=False)
+                elif c == "]" and isinstance(self.stack[-1][0], list):
+                    # Empty list or trailing comma
+                    self._close()
+                elif not self._scalar(final):
+                    return
+            elif self.state == "after":
+                if c == ",":
+                    self.pos += 1
+                    self.state = "key" if isinstance(self.stack[-1][0], dict) else "value"
+                elif c in "}]":
+                    self._close()
+                else:
+                    self._fail(f"expected ',' or a closing bracket, got {c!r}")
+
+    def _fail(self, message: str):
+        snippet = self.buf[max(0, self.pos - 40):self.pos + 40]
+        raise ValueError(f"Invalid JSON in LLM output: {message} near {snippet!r}")
+
+    def _comment(self, final: bool) -> bool:
+        buf = self.buf
+        if self.pos + 1 >= len(buf):
+            if final:
+                self._fail("unexpected '/'")
+            return False
+        if buf[self.pos + 1] != "/":
+            self._fail("unexpected '/'")
+        newline = buf.find("\n", self.pos)
+        if newline == -1:
+            if final:
+                self.pos = len(buf)
+            return False
+        self.pos = newline + 1
+        return True
+
+    # ---------------- containers ----------------
+
+    def _child_path(self) -> tuple:
+        container, path, key = self.stack[-1]
+        return path + ((key,) if isinstance(container, dict) else (len(container),))
+
+    def _attach(self, value):
+        if not self.stack:
+            self.root = value
+            return
+        container, _, key = self.stack[-1]
+        if isinstance(container, dict):
+            container[key] = value
+        else:
+            container.append(value)
+
+    def _open(self, c: str):
+        container = {} if c == "{" else []
+        path = self._child_path() if self.stack else ()
+        self._attach(container)
+        self.stack.append([container, path, None])
+        self.state = "key" if c == "{" else "value"
+        self.pos += 1
+
+    def _close(self):
+        container, path, _ = self.stack.pop()
+        self.pos += 1
+        self._finish(container, path)
+
+    def _finish(self, value, path: tuple):
+        if not self.stack:
+            self.done = True
+            return
+        if len(path) <= self.emit_depth:
+            self.events.append((path, value))
+        self.state = "after"
+
+    # ---------------- scalars ----------------
+
+    def _scalar(self, final: bool) -> bool:
+        match = TOKEN_END.search(self.buf, self.pos)
+        if match is None and not final:
+            # The token may continue in the next chunk
+            return False
+        end = match.start() if match else len(self.buf)
+        token = self.buf[self.pos:end]
+
+        if token in LITERALS:
+            value = LITERALS[token]
+        else:
+            try:
+                value = json.loads(token)
+            except ValueError:
+                self._fail(f"unexpected token {token!r}")
+
+        path = self._child_path()
+        self.pos = end
+        self._attach(value)
+        self._finish(value, path)
+        return True
+
+    # ---------------- strings ----------------
+
+    def _begin_string(self, key: bool):
+        self.pos += 1
+        self.string_parts = []
+        self.string_is_key = key
+        self.string_path = None if key else self._child_path()
+        self.state = "string"
+
+    def _string_text(self, text: str):
+        self.string_parts.append(text)
+        if self.string_path in self.watch:
+            self.text[self.string_path] = self.text.get(self.string_path, "") + text
+
+    def _string(self, final: bool) -> bool:
+        """
+        Decode as much of the open string as the buffer allows. Returns
+        True once the string is closed, False when more input is needed.
+        """
+        buf = self.buf
+        end = len(buf)
+        while True:
+            match = STRING_SPECIAL.search(buf, self.pos)
+            if match is None:
+                if self.pos < end:
+                    self._string_text(buf[self.pos:])
+                    self.pos = end
+                return False
+
+            i = match.start()
+            if i > self.pos:
+                self._string_text(buf[self.pos:i])
+                self.pos = i
+
+            if buf[i] == "\\":
+                # Escapes may be split across chunks; wait for the rest
+                if i + 1 >= end:
+                    return False
+                if buf[i + 1] == "u":
+                    decoded = self._unicode_escape(i)
+                    if decoded is None:
+                        return False
+                    text, self.pos = decoded
+                    self._string_text(text)
+                else:
+                    self._string_text(JSON_ESCAPES.get(buf[i + 1], buf[i + 1]))
+                    self.pos = i + 2
+                continue
+
+            # A quote closes the string only if what follows fits;
+            # otherwise it is an unescaped quote inside the text.
+            j = i + 1
+            while j < end and buf[j] in WHITESPACE:
+                j += 1
+            if j >= end and not final:
+                return False
+            follow = KEY_FOLLOW if self.string_is_key else VALUE_FOLLOW
+            if j < end and buf[j] not in follow:
+                self._string_text('"')
+                self.pos = i + 1
+                continue
+
+            self.pos = i + 1
+            self._end_string()
+            return True
+
+    def _unicode_escape(self, i: int):
+        buf = self.buf
+        if i + 6 > len(buf):
+            return None
+        try:
+            code = int(buf[i + 2:i + 6], 16)
+        except ValueError:
+            return buf[i + 1:i + 6], i + 6
+        if 0xD800 <= code < 0xDC00:
+            # Surrogate pair, e.g. an emoji
+            if i + 12 > len(buf):
+                return None
+            if buf[i + 6:i + 8] == "\\u":
+                try:
+                    low = int(buf[i + 8:i + 12], 16)
+                except ValueError:
+                    low = 0
+                if 0xDC00 <= low < 0xE000:
+                    return chr(0x10000 + ((code - 0xD800) << 10) + (low - 0xDC00)), i + 12
+        return chr(code), i + 6
+
+    def _end_string(self):
+        value = "".join(self.string_parts)
+        self.string_parts = []
+        if self.string_is_key:
+            self.stack[-1][2] = value
+            self.state = "colon"
+            return
+        path = self.string_path
+        self._attach(value)
+        self._finish(value, path)
+
+
+def parse_json(text: str):
+    """
+    Parse a complete LLM response with the same tolerance as streaming.
+    """
+    parser = JSONStreamParser(emit_depth=0)
+    parser.feed(text)
+    return parser.close()
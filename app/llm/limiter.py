@@ -0,0 +1,352 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+
+import openai
+
+log = logging.getLogger("llm_limiter")
+
+# -------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------
+# Budgets are per process. With several uvicorn workers, divide the
+# account quota between them via OPENAI_LIMITS.
+#   OPENAI_LIMITS="gpt-4.1=5000:800000,gpt-4.1-mini=5000:4000000"   (rpm:tpm)
+
+DEFAULT_LIMITS = {
+    "gpt-4.1": (5000, 800_000),
+    "gpt-4.1-mini": (5000, 4_000_000),
+}
+FALLBACK_LIMITS = (500, 200_000)
+
+INITIAL_CONCURRENCY = float(os.getenv("LLM_INITIAL_CONCURRENCY", "8"))
+MIN_CONCURRENCY = float(os.getenv("LLM_MIN_CONCURRENCY", "1"))
+MAX_CONCURRENCY = float(os.getenv("LLM_MAX_CONCURRENCY", "128"))
+
+MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+BACKOFF_BASE = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+BACKOFF_CAP = float(os.getenv("LLM_BACKOFF_CAP", "20"))
+
+# AIMD tuning
+DECREASE_FACTOR = 0.5       # on 429
+LATENCY_DECREASE = 0.9      # on a latency spike
+LATENCY_SPIKE_RATIO = 2.0   # latency vs. the moving average of the same prompt label
+EWMA_ALPHA = 0.2
+
+RETRYABLE = (
+    openai.RateLimitError,
+    openai.APIConnectionError,   # includes APITimeoutError
+    openai.InternalServerError,
+)
+
+
+def parse_limits(spec: str) -> dict:
+    limits = dict(DEFAULT_LIMITS)
+    for part in filter(None, (p.strip() for p in (spec or "").split(","))):
+        model, _, budget = part.partition("=")
+        rpm, _, tpm = budget.partition(":")
+        limits[model.strip()] = (int(rpm), int(tpm))
+    return limits
+
+
+LIMITS = parse_limits(os.getenv("OPENAI_LIMITS", ""))
+
+
+def estimate_tokens(messages: list, max_output: int) -> int:
+    chars = sum(len(m.get("content") or "") for m in messages)
+    return chars // 4 + max_output
+
+
+def retry_after(error) -> float:
+    response = getattr(error, "response", None)
+    if response is None:
+        return 0.0
+    try:
+        return float(response.headers.get("retry-after", 0))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def backoff(attempt: int, floor: float = 0.0) -> float:
+    # Full jitter, never shorter than what the server asked for
+    return max(floor, random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt)))
+
+
+# -------------------------------------------------------
+# PER-MODEL LIMITER
+# -------------------------------------------------------
+
+class Waiter:
+    """
+    A queued caller. Only the head of the queue can take a slot, so only
+    it is woken when a slot or tokens free up; threads wait on a
+    Condition sharing the limiter lock, coroutines on an Event of their
+    own loop (the limiter is released from both).
+    """
+
+    def __init__(self, lock, loop=None):
+        self.loop = loop
+        if loop is None:
+            self.condition = threading.Condition(lock)
+        else:
+            self.event = asyncio.Event()
+
+    def wake(self):
+        if self.loop is None:
+            self.condition.notify()
+        else:
+            try:
+                self.loop.call_soon_threadsafe(self.event.set)
+            except RuntimeError:
+                pass    # its loop is gone; the waiter went with it
+
+
+class ModelLimiter:
+    """
+    Token buckets for requests/min and tokens/min, an AIMD concurrency
+    limit driven by latency and 429s, and a FIFO queue so callers are
+    served in arrival order. Usable from both threads and coroutines.
+    """
+
+    def __init__(self, model: str, rpm: int, tpm: int):
+        self.model = model
+        self.rpm = rpm
+        self.tpm = tpm
+        self.request_tokens = float(rpm)
+        self.token_tokens = float(tpm)
+        self.refilled_at = time.monotonic()
+
+        self.limit = INITIAL_CONCURRENCY
+        self.in_flight = 0
+        self.paused_until = 0.0
+        # Per prompt label: an EXTRACT call is not slow next to a TAILOR one
+        self.latency_ewma = {}
+
+        self.queue = deque()
+        self.lock = threading.Lock()
+
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "errors": 0}
+
+    # ---------------- buckets ----------------
+
+    def _refill(self, now: float):
+        elapsed = now - self.refilled_at
+        self.refilled_at = now
+        self.request_tokens = min(self.rpm, self.request_tokens + elapsed * self.rpm / 60)
+        self.token_tokens = min(self.tpm, self.token_tokens + elapsed * self.tpm / 60)
+
+    def _try_acquire(self, waiter, estimate: int):
+        """
+        Called with the lock held. 0 when the slot was taken, a number of
+        seconds when only time (bucket refill, a 429 pause) can free it,
+        None when the waiter must wait to be woken.
+        """
+        now = time.monotonic()
+        self._refill(now)
+
+        if self.queue[0] is not waiter:
+            return None
+        if now < self.paused_until:
+            return self.paused_until - now
+        if self.in_flight >= max(1, int(self.limit)):
+            return None
+        if self.request_tokens < 1:
+            return (1 - self.request_tokens) * 60 / self.rpm
+
+        # Oversized requests only need a full bucket, not more
+        need = min(estimate, self.tpm)
+        if self.token_tokens < need:
+            return (need - self.token_tokens) * 60 / self.tpm
+
+        self.request_tokens -= 1
+        self.token_tokens -= need
+        self.in_flight += 1
+        self.queue.popleft()
+        # The next caller may fit too (the limit can allow several)
+        self._wake_head()
+        return 0.0
+
+    def _wake_head(self):
+        if self.queue:
+            self.queue[0].wake()
+
+    def _enqueue(self, waiter, priority: bool):
+        if priority:
+            self.queue.appendleft(waiter)
+        else:
+            self.queue.append(waiter)
+
+    def _abandon(self, waiter):
+        try:
+            was_head = self.queue[0] is waiter
+            self.queue.remove(waiter)
+        except (IndexError, ValueError):
+            return
+        if was_head:
+            self._wake_head()
+
+    async def acquire(self, estimate: int, priority: bool = False):
+        waiter = Waiter(self.lock, asyncio.get_running_loop())
+        with self.lock:
+            self._enqueue(waiter, priority)
+        try:
+            while True:
+                with self.lock:
+                    wait = self._try_acquire(waiter, estimate)
+                    if wait == 0:
+                        return
+                    # Cleared under the lock, so a wake after this is not lost
+                    waiter.event.clear()
+                try:
+                    await asyncio.wait_for(waiter.event.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        except BaseException:
+            with self.lock:
+                self._abandon(waiter)
+            raise
+
+    def acquire_sync(self, estimate: int, priority: bool = False):
+        with self.lock:
+            waiter = Waiter(self.lock)
+            self._enqueue(waiter, priority)
+            try:
+                while (wait := self._try_acquire(waiter, estimate)) != 0:
+                    waiter.condition.wait(wait)
+            except BaseException:
+                self._abandon(waiter)
+                raise
+
+    def release(self, estimate: int, actual_tokens: int = None):
+        with self.lock:
+            self.in_flight -= 1
+            if actual_tokens is not None:
+                # Refund (or charge) the difference from the estimate
+                refund = min(estimate, self.tpm) - actual_tokens
+                self.token_tokens = min(self.tpm, self.token_tokens + refund)
+            self._wake_head()
+
+    # ---------------- AIMD ----------------
+
+    def on_success(self, label: str, latency: float):
+        with self.lock:
+            average = self.latency_ewma.get(label, latency)
+            spike = latency > LATENCY_SPIKE_RATIO * average
+            self.latency_ewma[label] = average + EWMA_ALPHA * (latency - average)
+
+            if spike:
+                self.limit = max(MIN_CONCURRENCY, self.limit * LATENCY_DECREASE)
+            else:
+                self.limit = min(MAX_CONCURRENCY, self.limit + 1 / max(self.limit, 1))
+                self._wake_head()
+
+    def on_rate_limited(self, wait: float):
+        with self.lock:
+            self.stats["rate_limited"] += 1
+            self.limit = max(MIN_CONCURRENCY, self.limit * DECREASE_FACTOR)
+            if wait:
+                self.paused_until = max(self.paused_until, time.monotonic() + wait)
+        log.warning("%s rate limited; concurrency limit now %.1f", self.model, self.limit)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "queued": len(self.queue),
+                "latency_ewma": dict(self.latency_ewma),
+                **self.stats,
+            }
+
+    # ---------------- call wrappers ----------------
+
+    async def arun(self, label: str, estimate: int, call, hold: bool = False):
+        """
+        Await `call()` under the limiter, retrying transient failures with
+        jittered backoff. With hold=True the slot stays taken on success
+        and the caller must `release()` it (used for streams).
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            await self.acquire(estimate, priority=attempt > 0)
+            started = time.monotonic()
+            try:
+                response = await call()
+            except RETRYABLE as e:
+                self.release(estimate, 0)
+                if not self._should_retry(e, attempt):
+                    raise
+                await asyncio.sleep(backoff(attempt, retry_after(e)))
+                continue
+            except BaseException:
+                self.release(estimate)
+                self.stats["errors"] += 1
+                raise
+
+            self.stats["calls"] += 1
+            self.on_success(label, time.monotonic() - started)
+            if not hold:
+                self.release(estimate, usage_tokens(response))
+            return response
+
+    def run(self, label: str, estimate: int, call):
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire_sync(estimate, priority=attempt > 0)
+            started = time.monotonic()
+            try:
+                response = call()
+            except RETRYABLE as e:
+                self.release(estimate, 0)
+                if not self._should_retry(e, attempt):
+                    raise
+                time.sleep(backoff(attempt, retry_after(e)))
+                continue
+            except BaseException:
+                self.release(estimate)
+                self.stats["errors"] += 1
+                raise
+
+            self.stats["calls"] += 1
+            self.on_success(label, time.monotonic() - started)
+            self.release(estimate, usage_tokens(response))
+            return response
+
+    def _should_retry(self, error, attempt: int) -> bool:
+        if isinstance(error, openai.RateLimitError):
+            self.on_rate_limited(retry_after(error))
+        if attempt >= MAX_RETRIES:
+            self.stats["errors"] += 1
+            return False
+        self.stats["retries"] += 1
+        return True
+
+
+def usage_tokens(response):
+    usage = getattr(response, "usage", None)
+    return getattr(usage, "total_tokens", None)
+
+
+# -------------------------------------------------------
+# REGISTRY
+# -------------------------------------------------------
+
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def limiter_for(model: str) -> ModelLimiter:
+    with _registry_lock:
+        limiter = _limiters.get(model)
+        if limiter is None:
+            rpm, tpm = LIMITS.get(model, FALLBACK_LIMITS)
+            limiter = _limiters[model] = ModelLimiter(model, rpm, tpm)
+        return limiter
+
+
+def limiter_stats() -> dict:
+    with _registry_lock:
+        limiters = dict(_limiters)
+    return {model: limiter.snapshot() for model, limiter in limiters.items()}
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import logging
+import os
+import typing
+
+from pydantic import TypeAdapter, ValidationError
+
+from app.llm.client import chat, achat
+from app.llm.json_stream import JSONStreamParser, parse_json
+
+log = logging.getLogger("llm_repair")
+
+# -------------------------------------------------------
+# SECTION-SCOPED REPAIR
+# -------------------------------------------------------
+# A response that does not parse or does not match its schema used to fail
+# the whole request. Instead, keep every section that is fine and re-ask a
+# small model for just the broken fragments (a top-level section, or one
+# entry of a list section), so a retry costs about as much as the damage.
+
+REPAIR_ENABLED = os.getenv("LLM_REPAIR_ENABLED", "1") == "1"
+REPAIR_MODEL = os.getenv("LLM_REPAIR_MODEL", "gpt-4.1-mini")
+REPAIR_ROUNDS = int(os.getenv("LLM_REPAIR_ROUNDS", "2"))
+# More broken fragments than this and a repair is no cheaper than a redo
+REPAIR_MAX_FRAGMENTS = int(os.getenv("LLM_REPAIR_MAX_FRAGMENTS", "4"))
+REPAIR_MAX_FRAGMENT_CHARS = 6000
+
+REPAIR_PROMPT = """
+You repair ONE fragment of a JSON document that another model produced.
+
+You receive:
+- the fragment's path in the document
+- the JSON schema the fragment must satisfy
+- the broken fragment (may be malformed, truncated or missing)
+- the validation problem
+- context the original model was given for this fragment
+
+Keep the original wording wherever it is usable; only fix what the schema
+requires. If the fragment is missing or cut off, complete it from the
+context, following the same rules as the rest of the document.
+
+Return ONLY valid JSON: {"value": <the repaired fragment>}
+"""
+
+
+# ---------------- locating damage ----------------
+
+def salvage(text: str):
+    """
+    Parse as much of `text` as possible. Returns (dict of complete
+    top-level fields, parse error or None).
+    """
+    parser = JSONStreamParser(emit_depth=1)
+    events = []
+    try:
+        events = parser.feed(text)
+        root = parser.close()
+        return (root if isinstance(root, dict) else {}), None
+    except ValueError as e:
+        # Fields that closed before the damage are still good
+        events += parser.events
+        return {path[0]: value for path, value in events}, e
+
+
+def broken_fragments(error: ValidationError) -> list:
+    """
+    Paths to repair: ("skills",) or ("experience", 2) for one list entry.
+    """
+    paths = []
+    for err in error.errors():
+        loc = err["loc"]
+        path = loc[:2] if len(loc) > 1 and isinstance(loc[1], int) else loc[:1]
+        if path and path not in paths:
+            paths.append(path)
+    return paths
+
+
+def fragment_type(schema, path: tuple):
+    annotation = schema.model_fields[path[0]].annotation
+    if len(path) > 1:
+        annotation = typing.get_args(annotation)[0]
+    return annotation
+
+
+def lookup(data: dict, path: tuple):
+    value = data
+    for part in path:
+        try:
+            value = value[part]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return value
+
+
+def place(data: dict, path: tuple, value):
+    if len(path) == 1:
+        data[path[0]] = value
+    else:
+        data[path[0]][path[1]] = value
+
+
+def fragment_problem(error: ValidationError, path: tuple, parse_error, missing: bool) -> str:
+    problems = [
+        f"{'.'.join(map(str, e['loc']))}: {e['msg']}"
+        for e in error.errors()
+        if tuple(e["loc"][:len(path)]) == path
+    ]
+    if missing and parse_error is not None:
+        problems.append(f"the response could not be parsed past this point ({parse_error})")
+    return "; ".join(problems)
+
+
+def raw_fragment(text: str, key: str) -> str:
+    """
+    The stretch of the raw response starting at `"key"`, for fragments
+    that did not survive parsing.
+    """
+    start = text.find(f'"{key}"')
+    if start == -1:
+        return "(missing)"
+    return text[start:start + REPAIR_MAX_FRAGMENT_CHARS]
+
+
+def fragment_context(context: dict, path: tuple) -> str:
+    parts = []
+    if context.get("shared"):
+        parts.append(str(context["shared"]))
+    original = context.get(path[0])
+    if isinstance(original, list) and len(path) > 1 and path[1] < len(original):
+        original = original[path[1]]
+    if original is not None:
+        parts.append(f"Original {path[0]}: {json.dumps(original, ensure_ascii=False)}")
+    return "\n".join(parts) or "(none)"
+
+
+def build_repair_messages(schema, path, data, text, error, parse_error, context) -> list:
+    current = lookup(data, path)
+    broken = json.dumps(current, ensure_ascii=False) if current is not None else raw_fragment(text, path[0])
+    fragment_schema = TypeAdapter(fragment_type(schema, path)).json_schema()
+    return [
+        {"role": "system", "content": REPAIR_PROMPT},
+        {
+            "role": "user",
+            "content": f"""
+Fragment Path: {".".join(map(str, path))}
+Schema: {json.dumps(fragment_schema)}
+Broken Fragment: {broken}
+Problem: {fragment_problem(error, path, parse_error, current is None)}
+Context: {fragment_context(context, path)}
+"""
+        }
+    ]
+
+
+def plan(label: str, schema, data: dict, error: ValidationError) -> list:
+    paths = broken_fragments(error)
+    if not REPAIR_ENABLED or len(paths) > REPAIR_MAX_FRAGMENTS:
+        raise ValueError(f"{label} output failed validation: {error}")
+    # Entries of a list that is itself missing cannot be patched one by one
+    for path in paths:
+        if len(path) > 1 and not isinstance(data.get(path[0]), list):
+            raise ValueError(f"{label} output failed validation: {error}")
+    log.warning("%s output invalid; repairing %s", label, ", ".join(".".join(map(str, p)) for p in paths))
+    return paths
+
+
+def unwrap(schema, path: tuple, content: str):
+    parsed = parse_json(content)
+    value = parsed.get("value") if isinstance(parsed, dict) else parsed
+    adapter = TypeAdapter(fragment_type(schema, path))
+    return adapter.dump_python(adapter.validate_python(value))
+
+
+# ---------------- entry points ----------------
+
+def validate(label: str, schema, text: str, context: dict = None, prepare=None) -> dict:
+    """
+    Parse `text` and validate it against `schema` (a pydantic model),
+    repairing broken fragments with small LLM calls. Returns a plain dict.
+    `context` maps section names to the original input for that section;
+    its "shared" entry (e.g. the job description) goes with every repair.
+    `prepare`, if given, reshapes the salvaged dict before validation
+    (e.g. puts list entries where the request expects them).
+    """
+    context = context or {}
+    data, parse_error = salvage(text)
+    if prepare is not None:
+        data = prepare(data)
+    for attempt in range(REPAIR_ROUNDS + 1):
+        try:
+            return schema.model_validate(data).model_dump()
+        except ValidationError as e:
+            if attempt == REPAIR_ROUNDS:
+                raise ValueError(f"{label} output still invalid after repair: {e}")
+            for path in plan(label, schema, data, e):
+                messages = build_repair_messages(schema, path, data, text, e, parse_error, context)
+                response = chat("REPAIR", REPAIR_MODEL, messages=messages, response_format={"type": "json_object"})
+                try:
+                    place(data, path, unwrap(schema, path, response.choices[0].message.content))
+                except (ValueError, ValidationError) as fragment_error:
+                    log.warning("Repair of %s failed: %s", ".".join(map(str, path)), fragment_error)
+
+
+async def avalidate(label: str, schema, text: str, context: dict = None, prepare=None) -> dict:
+    """
+    Async validate(); broken fragments are repaired concurrently.
+    """
+    context = context or {}
+    data, parse_error = salvage(text)
+    if prepare is not None:
+        data = prepare(data)
+    for attempt in range(REPAIR_ROUNDS + 1):
+        try:
+            return schema.model_validate(data).model_dump()
+        except ValidationError as e:
+            if attempt == REPAIR_ROUNDS:
+                raise ValueError(f"{label} output still invalid after repair: {e}")
+            paths = plan(label, schema, data, e)
+            responses = await asyncio.gather(*(
+                achat(
+                    "REPAIR",
+                    REPAIR_MODEL,
+                    messages=build_repair_messages(schema, path, data, text, e, parse_error, context),
+                    response_format={"type": "json_object"},
+                )
+                for path in paths
+            ))
+            for path, response in zip(paths, responses):
+                try:
+                    place(data, path, unwrap(schema, path, response.choices[0].message.content))
+                except (ValueError, ValidationError) as fragment_error:
+                    log.warning("Repair of %s failed: %s", ".".join(map(str, path)), fragment_error)
@@ -0,0 +1,143 @@
+import functools
+from typing import Dict, List
+
+from pydantic import BaseModel, ConfigDict, Field, create_model, field_validator
+
+# -------------------------------------------------------
+# LLM OUTPUT SCHEMAS
+# -------------------------------------------------------
+# One model per response shape. app/llm/repair.py validates parsed output
+# against these and re-asks only for the fragments that fail. Extra keys
+# are kept; cheap, unambiguous fixes happen in "before" validators so they
+# never cost a repair call.
+
+
+class LLMOutput(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+
+def coerce_skills(value):
+    # A flat list is a common slip; it is still the right content
+    if isinstance(value, list):
+        return {"General Skills": value}
+    return value
+
+
+# ---------------- TAILOR / IMPROVE ----------------
+
+class RewrittenExperience(LLMOutput):
+    company: str = ""
+    title: str = ""
+    location: str = ""
+    dates: str = ""
+    bullets: List[str]
+
+
+class RewrittenResume(LLMOutput):
+    summary: str
+    experience: List[RewrittenExperience]
+    skills: Dict[str, List[str]]
+
+    @field_validator("skills", mode="before")
+    @classmethod
+    def skills_as_dict(cls, value):
+        return coerce_skills(value)
+
+
+class RewriteFields(LLMOutput):
+    @field_validator("skills", mode="before", check_fields=False)
+    @classmethod
+    def skills_as_dict(cls, value):
+        return coerce_skills(value)
+
+
+@functools.lru_cache(maxsize=None)
+def partial_rewrite(fields: tuple):
+    """
+    RewrittenResume restricted to `fields`, e.g. ("experience", "skills"),
+    for an IMPROVE call that only regenerates some sections.
+    """
+    return create_model(
+        "PartialRewrite",
+        __base__=RewriteFields,
+        **{name: (RewrittenResume.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+class SummaryOutput(LLMOutput):
+    summary: str
+
+
+class BulletsOutput(LLMOutput):
+    bullets: List[str]
+
+
+class SkillsOutput(LLMOutput):
+    skills: Dict[str, List[str]]
+
+    @field_validator("skills", mode="before")
+    @classmethod
+    def skills_as_dict(cls, value):
+        return coerce_skills(value)
+
+
+# ---------------- ATS ----------------
+
+class ATSAnalysis(LLMOutput):
+    missing_keywords: List[str] = []
+    weak_areas: str = ""
+    recommendations: str = ""
+
+    @field_validator("weak_areas", "recommendations", mode="before")
+    @classmethod
+    def join_lists(cls, value):
+        if isinstance(value, list):
+            return " ".join(str(v) for v in value)
+        return value
+
+
+class ATSResult(LLMOutput):
+    score: int = Field(ge=0, le=100)
+    analysis: ATSAnalysis
+
+
+# ---------------- EXTRACT ----------------
+
+class ExtractedExperience(LLMOutput):
+    title: str = ""
+    company: str = ""
+    location: str = ""
+    dates: str = ""
+    responsibilities: List[str] = []
+
+
+class ExtractedEducation(LLMOutput):
+    degree: str = ""
+    institution: str = ""
+    location: str = ""
+    dates: str = ""
+
+
+class ExtractedResume(LLMOutput):
+    summary: str
+    experience: List[ExtractedExperience]
+    education: List[ExtractedEducation]
+    skills: Dict[str, List[str]]
+
+    @field_validator("skills", mode="before")
+    @classmethod
+    def skills_as_dict(cls, value):
+        return coerce_skills(value)
+
+
+@functools.lru_cache(maxsize=None)
+def partial_extract(fields: tuple):
+    """
+    ExtractedResume restricted to `fields`, for an EXTRACT call that only
+    reads the sections the local parser was unsure of.
+    """
+    return create_model(
+        "PartialExtract",
+        __base__=RewriteFields,
+        **{name: (ExtractedResume.model_fields[name].annotation, ...) for name in fields},
+    )
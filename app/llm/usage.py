@@ -0,0 +1,185 @@
+import contextlib
+import contextvars
+import logging
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+
+from app.db.database import SessionLocal
+from app.db import models
+
+log = logging.getLogger("llm_usage")
+
+# -------------------------------------------------------
+# TOKEN USAGE LEDGER
+# -------------------------------------------------------
+# Every OpenAI call made through app/llm/client.py writes one `llm_usage`
+# row. Who the call is for comes from `usage_scope()`: the routers and the
+# graph runner open a scope with user/run/job ids, and contextvars carry it
+# into the graph's tasks and threads.
+
+USAGE_LEDGER_ENABLED = os.getenv("USAGE_LEDGER_ENABLED", "1") == "1"
+
+# 0 = unlimited
+TOKEN_BUDGET_PER_REQUEST = int(os.getenv("TOKEN_BUDGET_PER_REQUEST", "0"))
+TOKEN_BUDGET_PER_USER_DAY = int(os.getenv("TOKEN_BUDGET_PER_USER_DAY", "0"))
+
+# IMPROVE cost guess when this run has no TAILOR usage to compare with
+DEFAULT_IMPROVE_TOKENS = int(os.getenv("DEFAULT_IMPROVE_TOKENS", "6000"))
+
+_scope = contextvars.ContextVar("llm_usage_scope", default={})
+
+
+@contextlib.contextmanager
+def usage_scope(**attrs):
+    """
+    Attribute LLM calls made inside the block (and in tasks started from
+    it) to user_id / run_id / job_id (the posting) / optimization_job_id
+    (the queue row). Nested scopes add to the outer one.
+    """
+    token = _scope.set({**_scope.get(), **{k: v for k, v in attrs.items() if v is not None}})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def current_scope() -> dict:
+    return _scope.get()
+
+
+# -------------------------------------------------------
+# RECORDING
+# -------------------------------------------------------
+
+def usage_row(label: str, model: str, usage) -> dict:
+    details = getattr(usage, "prompt_tokens_details", None)
+    scope = current_scope()
+    return {
+        "user_id": scope.get("user_id"),
+        "run_id": scope.get("run_id"),
+        "job_id": scope.get("job_id"),
+        "optimization_job_id": scope.get("optimization_job_id"),
+        "prompt": label,
+        "model": model,
+        "prompt_tokens": usage.prompt_tokens or 0,
+        "completion_tokens": usage.completion_tokens or 0,
+        "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+        "total_tokens": usage.total_tokens or 0,
+    }
+
+
+def write_usage(row: dict):
+    """
+    Best-effort: a ledger outage must not fail the LLM call it describes.
+    """
+    db = SessionLocal()
+    try:
+        db.add(models.LLMUsage(**row))
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        log.warning("Usage ledger write failed: %s", e)
+    finally:
+        db.close()
+
+
+def link_generated_resume(db, run_id: str, generated_resume_id: str):
+    db.query(models.LLMUsage).filter_by(run_id=run_id, generated_resume_id=None).update(
+        {"generated_resume_id": generated_resume_id}
+    )
+    db.commit()
+
+
+# -------------------------------------------------------
+# AGGREGATES
+# -------------------------------------------------------
+
+def run_tokens(db, run_id: str) -> dict:
+    rows = (
+        db.query(models.LLMUsage.prompt, func.sum(models.LLMUsage.total_tokens))
+        .filter(models.LLMUsage.run_id == run_id)
+        .group_by(models.LLMUsage.prompt)
+        .all()
+    )
+    return {prompt: int(total or 0) for prompt, total in rows}
+
+
+def user_tokens_today(db, user_id: str) -> int:
+    start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+    total = (
+        db.query(func.sum(models.LLMUsage.total_tokens))
+        .filter(models.LLMUsage.user_id == user_id)
+        .filter(models.LLMUsage.created_at >= start)
+        .scalar()
+    )
+    return int(total or 0)
+
+
+def usage_by_day(db, user_id: str, days: int = 30) -> list:
+    since = datetime.utcnow() - timedelta(days=days)
+    day = func.date(models.LLMUsage.created_at)
+    rows = (
+        db.query(
+            day.label("day"),
+            models.LLMUsage.prompt,
+            models.LLMUsage.model,
+            func.count(models.LLMUsage.id),
+            func.sum(models.LLMUsage.prompt_tokens),
+            func.sum(models.LLMUsage.completion_tokens),
+            func.sum(models.LLMUsage.cached_tokens),
+            func.sum(models.LLMUsage.total_tokens),
+        )
+        .filter(models.LLMUsage.user_id == user_id)
+        .filter(models.LLMUsage.created_at >= since)
+        .group_by(day, models.LLMUsage.prompt, models.LLMUsage.model)
+        .order_by(day.desc(), models.LLMUsage.prompt)
+        .all()
+    )
+    return [
+        {
+            "day": str(d),
+            "prompt": prompt,
+            "model": model,
+            "calls": calls,
+            "prompt_tokens": int(p or 0),
+            "completion_tokens": int(c or 0),
+            "cached_tokens": int(cached or 0),
+            "total_tokens": int(total or 0),
+        }
+        for d, prompt, model, calls, p, c, cached, total in rows
+    ]
+
+
+# -------------------------------------------------------
+# BUDGETS
+# -------------------------------------------------------
+
+def improve_budget_check(user_id: str, run_id: str):
+    """
+    Returns None if another IMPROVE loop fits the configured budgets,
+    otherwise the reason it does not. `run_id` is the ledger id of the
+    current attempt, not the coalescing key shared by repeat requests.
+    """
+    if not (TOKEN_BUDGET_PER_REQUEST or TOKEN_BUDGET_PER_USER_DAY):
+        return None
+
+    db = SessionLocal()
+    try:
+        by_prompt = run_tokens(db, run_id) if run_id else {}
+        # IMPROVE rewrites the same resume TAILOR did, so cost is similar
+        projected = by_prompt.get("TAILOR") or DEFAULT_IMPROVE_TOKENS
+
+        if TOKEN_BUDGET_PER_REQUEST:
+            used = sum(by_prompt.values())
+            if used + projected > TOKEN_BUDGET_PER_REQUEST:
+                return f"request budget: {used} used + ~{projected} > {TOKEN_BUDGET_PER_REQUEST}"
+
+        if TOKEN_BUDGET_PER_USER_DAY and user_id:
+            used = user_tokens_today(db, user_id)
+            if used + projected > TOKEN_BUDGET_PER_USER_DAY:
+                return f"daily user budget: {used} used + ~{projected} > {TOKEN_BUDGET_PER_USER_DAY}"
+    finally:
+        db.close()
+    return None
@@ -1,19 +1,33 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 
 from app.db.database import Base, engine
+from app.db.migrations import run_migrations
+from app.workflows.checkpointer import checkpointer, prune_checkpoints
+from app.services.inflight import prune_inflight
 from app.routers.resume_router import router as resume_router
 from app.routers.optimize_router import router as optimize_router
+from app.routers.metrics_router import router as metrics_router
+from app.routers.usage_router import router as usage_router
+from app.routers.files_router import router as files_router
+from app.utils.upload import RequestTooLarge, UploadSizeLimit, too_large_handler
 import os
 
 app = FastAPI(title="Resume AI Backend")
 
 # -----------------------------------
-# 🚀 CREATE FOLDER BEFORE MOUNTING
+# 🚀 CREATE OUTPUT FOLDER (GENERATE writes here)
 # -----------------------------------
 os.makedirs("generated", exist_ok=True)
 
+# -----------------------------------
+# UPLOAD SIZE CAP
+# -----------------------------------
+# Oversized uploads are refused before the body is read. Added before
+# CORS so CORS wraps it and the 413 reaches the extension readable.
+app.add_middleware(UploadSizeLimit)
+app.add_exception_handler(RequestTooLarge, too_large_handler)
+
 # -----------------------------------
 # 🚀 CORS for Chrome Extension & Railway
 # -----------------------------------
@@ -35,17 +49,21 @@ app.add_middleware(
 @app.on_event("startup")
 def startup():
     Base.metadata.create_all(bind=engine)
+    run_migrations()
+    # Unfinished runs past their TTL will never be resumed
+    if checkpointer:
+        prune_checkpoints()
+    # Single-flight rows past their TTL, results included
+    prune_inflight()
 
 # -----------------------------------
 # ROUTERS
 # -----------------------------------
 app.include_router(resume_router)
 app.include_router(optimize_router)
-
-# -----------------------------------
-# STATIC FILES
-# -----------------------------------
-app.mount("/generated", StaticFiles(directory="generated"), name="generated")
+app.include_router(metrics_router)
+app.include_router(usage_router)
+app.include_router(files_router)
 
 # -----------------------------------
 # ROOT
@@ -0,0 +1,34 @@
+import os
+
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse, JSONResponse, Response
+
+from app.services.document_store import DOCX_MEDIA_TYPE, load_document, local_path, valid_filename
+
+router = APIRouter(tags=["Files"])
+
+
+# -------------------------------------------------------
+# GENERATED RESUMES
+# -------------------------------------------------------
+# Files rendered by this process are on its disk; files rendered on the
+# worker tier only reach the API through the DB (app/services/document_store.py).
+
+@router.get("/generated/{filename}")
+async def generated_file(filename: str):
+    if not valid_filename(filename):
+        return JSONResponse({"error": "File not found"}, status_code=404)
+
+    path = local_path(filename)
+    if os.path.isfile(path):
+        return FileResponse(path, media_type=DOCX_MEDIA_TYPE, filename=filename)
+
+    content = await run_in_threadpool(load_document, filename)
+    if content is None:
+        return JSONResponse({"error": "File not found"}, status_code=404)
+    return Response(
+        content,
+        media_type=DOCX_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,85 @@
+from fastapi import APIRouter
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import PlainTextResponse
+
+from app.db.database import SessionLocal
+from app.llm.cache import cache_stats
+from app.llm.limiter import limiter_stats
+from app.services.job_queue import queue_stats
+from app.utils.metrics import collector, render_metrics
+from app.workflows.loop_policy import model_snapshot
+
+router = APIRouter(tags=["Metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# -------------------------------------------------------
+# SCRAPE-TIME COLLECTORS
+# -------------------------------------------------------
+
+@collector
+def collect_cache():
+    stats = cache_stats()
+    rows = [("llm_cache_memory_entries", "gauge", "Entries in the in-process LLM cache", {}, stats.pop("memory_entries"))]
+    for event, count in stats.items():
+        rows.append(("llm_cache_events_total", "counter", "LLM cache hits, misses, writes and errors", {"event": event}, count))
+    return rows
+
+
+LIMITER_GAUGES = {
+    "limit": "llm_limiter_concurrency_limit",
+    "in_flight": "llm_limiter_in_flight",
+    "queued": "llm_limiter_queued",
+}
+LIMITER_COUNTERS = ("calls", "retries", "rate_limited", "errors")
+
+
+@collector
+def collect_limiters():
+    rows = []
+    for model, snap in limiter_stats().items():
+        for key, name in LIMITER_GAUGES.items():
+            if snap.get(key) is not None:
+                rows.append((name, "gauge", f"Adaptive limiter {key.replace('_', ' ')}", {"model": model}, snap[key]))
+        for key in LIMITER_COUNTERS:
+            rows.append((f"llm_limiter_{key}_total", "counter", f"Adaptive limiter {key.replace('_', ' ')}", {"model": model}, snap[key]))
+        for label, latency in snap["latency_ewma"].items():
+            rows.append(("llm_limiter_latency_ewma_seconds", "gauge", "Adaptive limiter latency moving average", {"model": model, "prompt": label}, latency))
+    return rows
+
+
+@collector
+def collect_queue():
+    db = SessionLocal()
+    try:
+        stats = queue_stats(db)
+    finally:
+        db.close()
+    return [
+        ("optimization_queue_jobs", "gauge", "Background optimization jobs by status", {"status": "queued"}, stats["queued"]),
+        ("optimization_queue_jobs", "gauge", "Background optimization jobs by status", {"status": "running"}, stats["running"]),
+        ("optimization_queue_oldest_seconds", "gauge", "Age of the oldest queued job", {}, stats["oldest_queued_seconds"]),
+    ]
+
+
+@collector
+def collect_loop_policy():
+    model = model_snapshot()
+    return [
+        ("optimizer_loop_gain_fraction", "gauge", "Share of the ATS gap one IMPROVE round is expected to close", {}, model["gain_fraction"]),
+        ("optimizer_loop_expected_seconds", "gauge", "Expected node latency used by the loop policy", {"node": "IMPROVE"}, model["improve_seconds"]),
+        ("optimizer_loop_expected_seconds", "gauge", "Expected node latency used by the loop policy", {"node": "ATS"}, model["ats_seconds"]),
+        ("optimizer_loop_rounds_observed", "counter", "IMPROVE rounds fed into the score-delta model", {}, model["rounds_observed"]),
+    ]
+
+
+# -------------------------------------------------------
+# ENDPOINT
+# -------------------------------------------------------
+
+@router.get("/metrics")
+async def metrics():
+    # Collectors may hit the DB (queue depth), so render off the event loop
+    body = await run_in_threadpool(render_metrics)
+    return PlainTextResponse(body, media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,13 +1,37 @@
 from fastapi import APIRouter, Depends, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
 from app.db.database import SessionLocal
-from app.services.job_service import get_user_resume_sections
-from app.workflows.resume_optimizer_graph import resume_optimizer_graph, ResumeOptimizerState
+from app.services.job_service import get_user_resume_sections, save_job, save_jobs
+from app.workflows.resume_optimizer_graph import get_run, run_optimizer, ResumeOptimizerState
+from app.services.inflight import coalesce_key, join_or_start
+from app.services.resume_parsing import wait_parsed
+from app.services.job_queue import enqueue_optimization, get_optimization_job, queue_position, queue_stats
 from app.db.models import Resume
+from app.utils.sse import format_sse, with_heartbeat, SSE_HEADERS
+import asyncio
+import copy
+import logging
+import os
+import uuid
 
 router = APIRouter(prefix="/optimize", tags=["Optimize"])
 
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+
+BATCH_MAX_JOBS = int(os.getenv("BATCH_MAX_JOBS", "50"))
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "10"))
+
+OPTIMIZE_BACKGROUND = os.getenv("OPTIMIZE_BACKGROUND", "0") == "1"
+
+# How long an optimize request waits for a just-uploaded resume to be parsed
+OPTIMIZE_PARSE_WAIT_SECONDS = float(os.getenv("OPTIMIZE_PARSE_WAIT_SECONDS", "30"))
+
+log = logging.getLogger("optimizer")
+
 
 def get_db():
     db = SessionLocal()
@@ -20,40 +44,101 @@ def get_db():
 class OptimizeRequest(BaseModel):
     user_id: str
     job_description: str
+    ats_mode: Optional[Literal["llm", "local", "prescreen"]] = None
+    tailor_mode: Optional[Literal["single", "parallel", "candidates"]] = None
+    # "fast": predictable latency, "best": extra IMPROVE rounds while they pay off
+    loop_mode: Optional[Literal["fast", "balanced", "best"]] = None
+    deadline_seconds: Optional[float] = Field(None, gt=0, le=600)
+    # Queue for app.worker and return a job id (None → OPTIMIZE_BACKGROUND env)
+    background: Optional[bool] = None
 
 
-@router.post("/")
-def optimize_resume(
-    payload: OptimizeRequest,
-    request: Request,
-    db: Session = Depends(get_db),
-):
+class OptimizeBatchRequest(BaseModel):
+    user_id: str
+    job_descriptions: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_JOBS)
+    concurrency: Optional[int] = Field(None, ge=1)
+    ats_mode: Optional[Literal["llm", "local", "prescreen"]] = None
+    tailor_mode: Optional[Literal["single", "parallel", "candidates"]] = None
+    loop_mode: Optional[Literal["fast", "balanced", "best"]] = None
+    deadline_seconds: Optional[float] = Field(None, gt=0, le=600)
 
-    user_id = payload.user_id
-    job_description = payload.job_description
 
-    # Fetch parsed resume sections from DB
+def load_user_resume(db: Session, user_id: str):
+    """
+    Blocking DB reads for the optimize endpoints; called via run_in_threadpool.
+    """
     sections = get_user_resume_sections(db, user_id)
+    # Same (latest) resume the sections were taken from
+    resume_record = (
+        db.query(Resume)
+        .filter_by(user_id=user_id)
+        .order_by(Resume.created_at.desc())
+        .first()
+    )
+    if resume_record is not None:
+        # Detach it: save_job() commits on this session, and an expired
+        # record would reload its fields with sync I/O on the event loop
+        db.expunge(resume_record)
+    return sections, resume_record
+
+
+async def load_parsed_resume(db: Session, user_id: str):
+    """
+    Returns (sections, resume_record, error). A latest resume still being
+    parsed is waited on for up to OPTIMIZE_PARSE_WAIT_SECONDS.
+    """
+    sections, resume_record = await run_in_threadpool(load_user_resume, db, user_id)
+
+    if resume_record is not None and resume_record.parse_status == "pending":
+        state = await wait_parsed(resume_record.id, OPTIMIZE_PARSE_WAIT_SECONDS)
+        if state is not None and state["status"] == "pending":
+            return None, None, "Resume is still being parsed; try again shortly."
+        # Parsed (or failed) in another session: read it again
+        await run_in_threadpool(db.expire_all)
+        sections, resume_record = await run_in_threadpool(load_user_resume, db, user_id)
+
+    if resume_record is not None and resume_record.parse_status == "failed":
+        return None, None, f"Resume parsing failed: {resume_record.parse_error}. Please upload it again."
+
+    # Fetch parsed resume sections from DB
     if not sections:
-        return {"error": "User has no saved resume."}
+        return None, None, "User has no saved resume."
 
     # Fetch user personal info from Resume table
-    resume_record = db.query(Resume).filter_by(user_id=user_id).first()
     if not resume_record:
-        return {"error": "User resume record missing."}
+        return None, None, "User resume record missing."
+
+    return sections, resume_record, None
+
 
+def build_state(
+    sections: dict,
+    resume_record: Resume,
+    job_id: str,
+    job_description: str,
+    ats_mode: Optional[str] = None,
+    tailor_mode: Optional[str] = None,
+    loop_mode: Optional[str] = None,
+    deadline_seconds: Optional[float] = None,
+) -> ResumeOptimizerState:
     # Experience locks
     experience_locks = {}
 
     # Structured education stays AS-IS
     original_education_list = sections["education"]
 
-    # Build workflow state
-    state = ResumeOptimizerState(
+    return ResumeOptimizerState(
         resume_sections=sections,
+        user_id=resume_record.user_id,
+        resume_id=resume_record.id,
+        job_id=job_id,
         original_education=original_education_list,
         original_experience_positions=experience_locks,
         job_description=job_description,
+        ats_mode=ats_mode,
+        tailor_mode=tailor_mode,
+        loop_mode=loop_mode,
+        deadline_seconds=deadline_seconds,
 
         phone=resume_record.phone,
         full_name=resume_record.full_name,
@@ -62,16 +147,302 @@ def optimize_resume(
         github=resume_record.github,
     )
 
-    final_state = resume_optimizer_graph.invoke(state)
 
-    base_url = str(request.base_url)
+async def prepare_state(db: Session, payload: OptimizeRequest):
+    """
+    Returns (state, None) or (None, error_message).
+    """
+    sections, resume_record, error = await load_parsed_resume(db, payload.user_id)
+    if error:
+        return None, error
+
+    # Prompts get the posting without its boilerplate; repeats reuse it
+    job_id, normalized = await run_in_threadpool(save_job, db, payload.user_id, payload.job_description)
+
+    return build_state(
+        sections,
+        resume_record,
+        job_id,
+        normalized["text"],
+        payload.ats_mode,
+        payload.tailor_mode,
+        payload.loop_mode,
+        payload.deadline_seconds,
+    ), None
+
+
+def assign_run_id(state: ResumeOptimizerState) -> str:
+    key = coalesce_key(
+        state.user_id,
+        state.resume_id,
+        state.job_description,
+        ats_mode=state.ats_mode,
+        tailor_mode=state.tailor_mode,
+        loop_mode=state.loop_mode,
+        deadline_seconds=state.deadline_seconds,
+    )
+    # The key doubles as the checkpoint thread, so a retried request resumes
+    state.run_id = key
+    return key
+
+
+def start_run(state: ResumeOptimizerState):
+    """
+    Start the graph for `state`, or attach to an identical run already in
+    flight. Returns (run, joined).
+    """
+    return join_or_start(assign_run_id(state), state, run_optimizer)
+
+
+def format_result(final_state: dict, base_url: str) -> dict:
     full_url = f"{base_url}generated/{final_state['final_docx_path']}"
 
     return {
+        "run_id": final_state.get("run_id"),
+        # Key for GET /usage/runs/{id}
+        "usage_run_id": final_state.get("usage_run_id"),
+        "generated_resume_id": final_state.get("generated_resume_id"),
         "ats_score": final_state["ats_score"],
         "resume": final_state["resume_sections"],
         "analysis": final_state["analysis"],
         "iterations": final_state["iteration_count"],
+        "stop_reason": final_state.get("loop_reason"),
         "file_url": full_url,
         "file_url_relative": f"/generated/{final_state['final_docx_path']}"
-    }
\ No newline at end of file
+    }
+
+
+@router.post("/")
+async def optimize_resume(
+    payload: OptimizeRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    state, error = await prepare_state(db, payload)
+    if error:
+        return {"error": error}
+
+    background = OPTIMIZE_BACKGROUND if payload.background is None else payload.background
+    if background:
+        assign_run_id(state)
+        job_id = await run_in_threadpool(enqueue_optimization, db, state)
+        stats = await run_in_threadpool(queue_stats, db)
+        return {"job_id": job_id, "status": "queued", "queue_depth": stats["queued"]}
+
+    run, _ = start_run(state)
+    try:
+        async with run.attached():
+            final_state = await run.wait()
+    except Exception as e:
+        log.exception("Optimization %s failed", run.key[:12])
+        return {"error": str(e) or type(e).__name__, "run_id": run.key}
+
+    return format_result(final_state, str(request.base_url))
+
+
+@router.post("/stream")
+async def optimize_resume_stream(
+    payload: OptimizeRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Same as POST /optimize/ but answers with a Server-Sent Events stream:
+    node_start / node_end per graph node, summary_token while TAILOR is
+    generating, section_ready for each tailored section as it completes,
+    then a final `result` event with the usual response body.
+    """
+    state, error = await prepare_state(db, payload)
+    base_url = str(request.base_url)
+
+    async def events():
+        if error:
+            yield format_sse("error", {"message": error})
+            return
+
+        # Started only once the stream is consumed, and attached right
+        # away: a client gone before the first event cancels the run
+        run, joined = start_run(state)
+        async with run.attached():
+            yield format_sse("accepted", {"user_id": payload.user_id, "run_id": run.key})
+            if joined:
+                yield format_sse("coalesced", {"mode": "local"})
+
+            async for chunk in run.events():
+                data = dict(chunk)
+                event = data.pop("event")
+                if event == "node_end" and data.get("file_url_relative"):
+                    data["file_url"] = base_url + data["file_url_relative"].lstrip("/")
+                yield format_sse(event, data)
+
+            try:
+                final_state = await run.wait()
+            except Exception as e:
+                log.exception("Optimization %s failed", run.key[:12])
+                yield format_sse("error", {"message": str(e) or type(e).__name__, "run_id": run.key})
+                return
+
+        yield format_sse("result", format_result(final_state, base_url))
+
+    return StreamingResponse(
+        with_heartbeat(events(), SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+@router.post("/batch")
+async def optimize_resume_batch(
+    payload: OptimizeBatchRequest,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """
+    Optimize one resume against many job descriptions. The resume is loaded
+    once, graph runs fan out with bounded concurrency, and each result is
+    streamed back as a `job_result` SSE event as soon as it finishes.
+    """
+    sections, resume_record, error = await load_parsed_resume(db, payload.user_id)
+    base_url = str(request.base_url)
+
+    jobs = []
+    if not error:
+        jobs = await run_in_threadpool(save_jobs, db, payload.user_id, payload.job_descriptions)
+    job_ids = [job_id for job_id, _ in jobs]
+
+    limit = min(payload.concurrency or BATCH_MAX_CONCURRENCY, BATCH_MAX_CONCURRENCY)
+    gate = asyncio.Semaphore(limit)
+
+    async def run_one(index: int, job_id: str, job_description: str):
+        async with gate:
+            state = build_state(
+                copy.deepcopy(sections),
+                resume_record,
+                job_id,
+                job_description,
+                payload.ats_mode,
+                payload.tailor_mode,
+                payload.loop_mode,
+                payload.deadline_seconds,
+            )
+            try:
+                run, _ = start_run(state)
+                async with run.attached():
+                    final_state = await run.wait()
+            except Exception as e:
+                log.exception("Batch optimization %s failed", job_id)
+                return {"index": index, "job_id": job_id, "error": str(e)}
+
+            return {"index": index, "job_id": job_id, **format_result(final_state, base_url)}
+
+    async def events():
+        if error:
+            yield format_sse("error", {"message": error})
+            return
+
+        yield format_sse("accepted", {"job_ids": job_ids, "concurrency": limit})
+
+        tasks = [
+            asyncio.create_task(run_one(i, job_id, normalized["text"]))
+            for i, (job_id, normalized) in enumerate(jobs)
+        ]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                outcome = await next_done
+                failed += "error" in outcome
+                yield format_sse("job_result", outcome)
+        finally:
+            # Client went away: stop spending tokens on the rest
+            for task in tasks:
+                task.cancel()
+
+        yield format_sse("done", {"total": len(tasks), "failed": failed})
+
+    return StreamingResponse(
+        with_heartbeat(events(), SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
+# -------------------------------------------------------
+# CHECKPOINTED RUNS
+# -------------------------------------------------------
+# A failed or interrupted optimization keeps its graph state; these resume
+# it from the last completed node instead of redoing TAILOR and ATS.
+
+@router.get("/runs/{run_id}")
+async def get_optimize_run(run_id: str):
+    snapshot = await get_run(run_id)
+    if snapshot is None:
+        return {"error": "No resumable run with that id."}
+
+    values = snapshot.values
+    return {
+        "run_id": run_id,
+        "next": list(snapshot.next),
+        "ats_score": values.get("ats_score"),
+        "iterations": values.get("iteration_count", 0),
+        "updated_at": snapshot.created_at,
+    }
+
+
+@router.post("/runs/{run_id}/resume")
+async def resume_optimize_run(run_id: str, request: Request):
+    snapshot = await get_run(run_id)
+    if snapshot is None or not snapshot.next:
+        return {"error": "No resumable run with that id."}
+
+    state = ResumeOptimizerState(**snapshot.values)
+    run, _ = join_or_start(run_id, state, run_optimizer)
+    try:
+        async with run.attached():
+            final_state = await run.wait()
+    except Exception as e:
+        log.exception("Resumed optimization %s failed", run_id[:12])
+        return {"error": str(e) or type(e).__name__, "run_id": run_id}
+
+    return format_result(final_state, str(request.base_url))
+
+
+# -------------------------------------------------------
+# BACKGROUND JOBS
+# -------------------------------------------------------
+# Declared last so /stream, /batch and /runs/... are matched first.
+
+@router.get("/queue")
+async def get_queue_stats(db: Session = Depends(get_db)):
+    return await run_in_threadpool(queue_stats, db)
+
+
+def describe_job(db: Session, job_id: str, base_url: str):
+    job = get_optimization_job(db, job_id)
+    if job is None:
+        return {"error": "Job not found."}
+
+    body = {
+        "job_id": job.id,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
+    if job.status == "queued":
+        body["queue_position"] = queue_position(db, job)
+    elif job.status == "done":
+        body["result"] = format_result(job.result, base_url)
+    elif job.status == "failed":
+        body["error"] = job.error
+        body["run_id"] = (job.state or {}).get("run_id")
+    return body
+
+
+@router.get("/{job_id}")
+async def get_optimize_job(job_id: str, request: Request, db: Session = Depends(get_db)):
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        return {"error": "Job not found."}
+    return await run_in_threadpool(describe_job, db, job_id, str(request.base_url))
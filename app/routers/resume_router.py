@@ -1,16 +1,25 @@
 from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-import tempfile, shutil
+import os
+import uuid
 
 from app.db.database import SessionLocal
 from app.utils.file_utils import extract_text
-from app.llm.extract_sections import extract_resume_sections
-from app.services.resume_service import save_resume
+from app.utils.upload import UploadTooLarge, extraction_source, inspect_upload, too_large_response
+from app.utils.sse import format_sse, with_heartbeat, SSE_HEADERS
+from app.services.resume_parsing import parse_state, start_parse, wait_parsed
+from app.services.resume_service import find_parsed_upload, get_resume_sections, save_resume
 from app.db import models
 from fastapi import APIRouter, UploadFile, File, Depends, Form
 
 router = APIRouter(prefix="/resume", tags=["Resume"])
 
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+# Longest a `wait=true` upload or an events stream waits for parsing
+UPLOAD_PARSE_WAIT_SECONDS = float(os.getenv("UPLOAD_PARSE_WAIT_SECONDS", "120"))
+
 
 def get_db():
     db = SessionLocal()
@@ -20,6 +29,23 @@ def get_db():
         db.close()
 
 
+def valid_id(resume_id: str) -> bool:
+    try:
+        uuid.UUID(resume_id)
+        return True
+    except ValueError:
+        return False
+
+
+def describe_parse(db: Session, resume_id: str, state: dict) -> dict:
+    body = {"resume_id": resume_id, "status": state["status"]}
+    if state["status"] == "parsed":
+        body["sections"] = get_resume_sections(db, resume_id)
+    elif state["status"] == "failed":
+        body["error"] = state["error"]
+    return body
+
+
 @router.post("/upload")
 async def upload_resume(user_id: str = Form(...),
     phone: str = Form(...),
@@ -28,20 +54,36 @@ async def upload_resume(user_id: str = Form(...),
     linkedin: str = Form(""),
     github: str = Form(""),
     file: UploadFile = File(...),
+    # Old behaviour: answer only once the sections are parsed
+    wait: bool = Form(False),
     db: Session = Depends(get_db)):
-    # Save file temporarily
-    with tempfile.NamedTemporaryFile(delete=False) as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
-
-    # Extract text from file
-    raw_text = extract_text(tmp_path, file.filename)
-
-    # Extract sections with LLM
-    sections = extract_resume_sections(raw_text)
-
-    # Save to DB
-    resume_id = save_resume(
+    """
+    Phase 1 of an upload: store the text and return. Sections are parsed in
+    the background; follow them at `status_url` or `events_url`.
+    """
+    # Hash in chunks with a size cap; the type comes from the magic bytes
+    try:
+        upload = await run_in_threadpool(inspect_upload, file.file)
+        content_hash = upload["sha256"]
+
+        # Same bytes uploaded before (new device, retry): reuse that parse
+        cached = await run_in_threadpool(find_parsed_upload, db, content_hash)
+        if cached is not None:
+            raw_text, sections = cached
+        else:
+            # Extract text (CPU-bound, keep it off the event loop)
+            source = await run_in_threadpool(extraction_source, file.file, upload["kind"])
+            raw_text = await run_in_threadpool(extract_text, source, upload["kind"])
+            sections = None
+    except UploadTooLarge:
+        return too_large_response()
+    except ValueError as e:
+        # Unsupported format, unreadable PDF, page or time limit
+        return {"error": str(e)}
+
+    # Save to DB (pending until the sections are parsed)
+    resume_id = await run_in_threadpool(
+    save_resume,
     db=db,
     user_id=user_id,
     filename=file.filename,
@@ -52,25 +94,94 @@ async def upload_resume(user_id: str = Form(...),
     email=email,
     linkedin=linkedin,
     github=github,
+    content_hash=content_hash,
 )
 
+    if sections is None:
+        # Phase 2: extract sections with the LLM after responding
+        start_parse(resume_id, user_id, raw_text)
+        if wait:
+            state = await wait_parsed(resume_id, UPLOAD_PARSE_WAIT_SECONDS)
+            if state is not None and state["status"] == "failed":
+                return {"error": f"Resume parsing failed: {state['error']}", "resume_id": resume_id}
+            if state is not None and state["status"] == "parsed":
+                sections = await run_in_threadpool(get_resume_sections, db, resume_id)
+
+    if sections is not None:
+        return {
+            "message": "Resume uploaded and parsed successfully.",
+            "resume_id": resume_id,
+            "status": "parsed",
+            "sections": sections,
+            "cached": cached is not None,
+        }
+
     return {
-        "message": "Resume uploaded and parsed successfully.",
+        "message": "Resume uploaded; sections are being parsed.",
         "resume_id": resume_id,
-        "sections": sections
+        "status": "pending",
+        "status_url": f"/resume/{resume_id}/status",
+        "events_url": f"/resume/{resume_id}/events",
+        "cached": False,
     }
 
 
+@router.get("/{resume_id}/status")
+async def get_resume_status(resume_id: str, db: Session = Depends(get_db)):
+    state = await parse_state(resume_id) if valid_id(resume_id) else None
+    if state is None:
+        return {"error": "Resume not found."}
+    return await run_in_threadpool(describe_parse, db, resume_id, state)
+
+
+@router.get("/{resume_id}/events")
+async def resume_events(resume_id: str, db: Session = Depends(get_db)):
+    """
+    SSE: a `status` event now, then `parsed` (with the sections) or
+    `failed` once parsing finishes.
+    """
+    state = await parse_state(resume_id) if valid_id(resume_id) else None
+
+    async def events():
+        if state is None:
+            yield format_sse("error", {"message": "Resume not found."})
+            return
+        yield format_sse("status", {"resume_id": resume_id, "status": state["status"]})
+
+        final = state
+        if state["status"] == "pending":
+            final = await wait_parsed(resume_id, UPLOAD_PARSE_WAIT_SECONDS)
+        if final is None:
+            yield format_sse("error", {"message": "Resume not found."})
+            return
+        if final["status"] == "pending":
+            yield format_sse("error", {"message": "Resume is still being parsed; check status_url later."})
+            return
+        body = await run_in_threadpool(describe_parse, db, resume_id, final)
+        yield format_sse(final["status"], body)
+
+    return StreamingResponse(
+        with_heartbeat(events(), SSE_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers=SSE_HEADERS,
+    )
+
+
 # ✅ FIXED — Delete resume endpoint
 @router.delete("/delete")
 def delete_resume(user_id: str, db: Session = Depends(get_db)):
 
-    # Delete generated resumes
-    db.query(models.GeneratedResume).filter(
+    # Delete generated resumes and their stored DOCX files
+    generated = db.query(models.GeneratedResume).filter(
         models.GeneratedResume.job_id.in_(
             db.query(models.Job.id).filter_by(user_id=user_id)
         )
-    ).delete()
+    )
+    filenames = [os.path.basename(url) for (url,) in generated.with_entities(models.GeneratedResume.file_url) if url]
+    db.query(models.GeneratedDocument).filter(
+        models.GeneratedDocument.filename.in_(filenames)
+    ).delete(synchronize_session=False)
+    generated.delete(synchronize_session=False)
 
     # Delete resume sections
     db.query(models.ResumeSections).filter(
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.llm.usage import (
+    TOKEN_BUDGET_PER_USER_DAY,
+    run_tokens,
+    usage_by_day,
+    user_tokens_today,
+)
+
+router = APIRouter(prefix="/usage", tags=["Usage"])
+
+
+def get_db():
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@router.get("/runs/{run_id}")
+def get_run_usage(run_id: str, db: Session = Depends(get_db)):
+    by_prompt = run_tokens(db, run_id)
+    return {"run_id": run_id, "total_tokens": sum(by_prompt.values()), "by_prompt": by_prompt}
+
+
+@router.get("/{user_id}")
+def get_user_usage(user_id: str, days: int = 30, db: Session = Depends(get_db)):
+    days = max(1, min(days, 365))
+    return {
+        "user_id": user_id,
+        "days": days,
+        "today_tokens": user_tokens_today(db, user_id),
+        "daily_budget": TOKEN_BUDGET_PER_USER_DAY or None,
+        "usage": usage_by_day(db, user_id, days),
+    }
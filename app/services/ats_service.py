@@ -0,0 +1,61 @@
+import logging
+import os
+
+from app.services.llm_ats import ats_score, aats_score
+from app.services.local_ats import local_ats_score
+
+log = logging.getLogger("optimizer")
+
+# -------------------------------------------------------
+# ATS SCORING MODES
+# -------------------------------------------------------
+#   llm       → gpt-4.1-mini only (original behaviour)
+#   local     → deterministic in-process scorer only
+#   prescreen → local first; only ask the LLM when the local score is
+#               close enough to the threshold for the decision to matter
+
+ATS_MODES = ("llm", "local", "prescreen")
+ATS_MODE = os.getenv("ATS_MODE", "llm")
+
+# How far below the threshold the local score must be for prescreen to
+# skip the LLM and send the resume straight to IMPROVE.
+PRESCREEN_MARGIN = int(os.getenv("ATS_PRESCREEN_MARGIN", "15"))
+
+
+def resolve_mode(mode: str = None) -> str:
+    mode = mode or ATS_MODE
+    if mode not in ATS_MODES:
+        raise ValueError(f"Unknown ATS mode '{mode}'. Use one of: {', '.join(ATS_MODES)}")
+    return mode
+
+
+def prescreen_decisive(local_result: dict, threshold: int) -> bool:
+    return local_result["score"] <= threshold - PRESCREEN_MARGIN
+
+
+def score_resume(sections: dict, jd: str, threshold: int, mode: str = None) -> dict:
+    mode = resolve_mode(mode)
+
+    if mode == "llm":
+        return ats_score(sections, jd)
+
+    local = local_ats_score(sections, jd)
+    if mode == "local" or prescreen_decisive(local, threshold):
+        return local
+
+    return ats_score(sections, jd)
+
+
+async def ascore_resume(sections: dict, jd: str, threshold: int, mode: str = None) -> dict:
+    mode = resolve_mode(mode)
+
+    if mode == "llm":
+        return await aats_score(sections, jd)
+
+    local = local_ats_score(sections, jd)
+    if mode == "local" or prescreen_decisive(local, threshold):
+        if mode == "prescreen":
+            log.info("ATS prescreen: local score %s is decisive, skipping LLM", local["score"])
+        return local
+
+    return await aats_score(sections, jd)
@@ -0,0 +1,58 @@
+import logging
+import os
+import re
+
+from app.db import models
+from app.db.database import SessionLocal
+
+log = logging.getLogger("document_store")
+
+# -------------------------------------------------------
+# GENERATED DOCX STORE
+# -------------------------------------------------------
+# GENERATE writes the DOCX to the local generated/ directory, which only
+# the process that rendered it can see. Background jobs render on the
+# worker tier, so every document is also stored in the DB and the API
+# serves /generated/<file> from disk when it has the file, else from here.
+
+GENERATED_DIR = "generated"
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+# Names GENERATE produces; anything else is never looked up
+FILENAME = re.compile(r"final_resume_[0-9a-f-]{36}\.docx")
+
+
+def valid_filename(filename: str) -> bool:
+    return bool(FILENAME.fullmatch(filename))
+
+
+def local_path(filename: str) -> str:
+    return os.path.join(GENERATED_DIR, filename)
+
+
+def save_document(filename: str):
+    """
+    Copy a rendered DOCX from generated/ into the DB. Own session, like
+    persist_run_result: GENERATE runs outside any request.
+    """
+    with open(local_path(filename), "rb") as f:
+        content = f.read()
+    db = SessionLocal()
+    try:
+        db.merge(models.GeneratedDocument(filename=filename, content=content))
+        db.commit()
+    finally:
+        db.close()
+    log.info("Stored %s (%d bytes)", filename, len(content))
+
+
+def load_document(filename: str):
+    """
+    The DOCX bytes, or None if no process has stored that file.
+    """
+    db = SessionLocal()
+    try:
+        document = db.get(models.GeneratedDocument, filename)
+        return document.content if document else None
+    finally:
+        db.close()
@@ -5,6 +5,8 @@ from docx.oxml import OxmlElement
 from docx.oxml.ns import qn
 import re
 
+from app.utils.metrics import timed
+
 
 # -------------------------------------------------------
 # UTILITY: ADD HYPERLINK
@@ -273,6 +275,7 @@ def add_skills(doc, skills_dict):
 # MAIN GENERATOR
 # -------------------------------------------------------
 
+@timed("generate_final_docx")
 def generate_final_docx(sections, user_info, output_path):
     doc = new_document()
 
@@ -291,4 +294,51 @@ def generate_final_docx(sections, user_info, output_path):
     add_skills(doc, sections["skills"])
 
     doc.save(output_path)
-    return output_path
\ No newline at end of file
+    return output_path
+
+
+# -------------------------------------------------------
+# TWO-STEP GENERATION
+# -------------------------------------------------------
+# Header and education never change during an optimization, so they can be
+# rendered while the LLM is still working; only the tailored sections are
+# left for the end.
+
+@timed("render_static_parts")
+def render_static_parts(user_info, education_list):
+    doc = new_document()
+
+    add_resume_header(doc, user_info)
+
+    add_section_header(doc, "EDUCATION")
+    add_education(doc, education_list)
+
+    return doc
+
+
+@timed("complete_docx")
+def complete_docx(doc, sections, output_path):
+    """
+    Fill a render_static_parts() document with the tailored sections and
+    save it; the result matches generate_final_docx().
+    """
+    body = doc.element.body
+    education_header = next(p for p in doc.paragraphs if p.text == "EDUCATION")._p
+
+    # New paragraphs land just before the trailing sectPr
+    start = len(body) - 1
+
+    add_section_header(doc, "SUMMARY")
+    add_summary(doc, sections["summary"])
+
+    add_section_header(doc, "EXPERIENCE")
+    add_experience(doc, sections["experience"])
+
+    for element in list(body)[start:len(body) - 1]:
+        education_header.addprevious(element)
+
+    add_section_header(doc, "SKILLS")
+    add_skills(doc, sections["skills"])
+
+    doc.save(output_path)
+    return output_path
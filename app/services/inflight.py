@@ -0,0 +1,361 @@
+import asyncio
+import contextlib
+import hashlib
+import json
+import logging
+import os
+import re
+import socket
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy.exc import IntegrityError
+
+from app.db.database import SessionLocal
+from app.db import models
+
+log = logging.getLogger("optimizer")
+
+# -------------------------------------------------------
+# SINGLE-FLIGHT OPTIMIZATIONS
+# -------------------------------------------------------
+# Identical optimize requests (same user, resume and JD) share one graph
+# run. Within a worker, later callers attach to the running task and see
+# its events; across workers, an `inflight_optimizations` row names the
+# owner and followers poll it for the result.
+
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "1") == "1"
+HEARTBEAT_SECONDS = float(os.getenv("COALESCE_HEARTBEAT_SECONDS", "10"))
+STALE_SECONDS = float(os.getenv("COALESCE_STALE_SECONDS", "60"))
+POLL_SECONDS = float(os.getenv("COALESCE_POLL_SECONDS", "1"))
+# Finished results stay joinable briefly to absorb client retries
+RESULT_TTL_SECONDS = float(os.getenv("COALESCE_RESULT_TTL_SECONDS", "30"))
+# How often claim() also deletes rows nobody can join any more
+PRUNE_INTERVAL_SECONDS = float(os.getenv("COALESCE_PRUNE_INTERVAL_SECONDS", "60"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_END = object()
+
+registry = {}
+_last_prune = 0.0
+
+
+def coalesce_key(user_id: str, resume_id: str, job_description: str, **options) -> str:
+    jd = re.sub(r"\s+", " ", job_description).strip()
+    payload = {
+        "user": user_id,
+        "resume": resume_id,
+        "jd": hashlib.sha256(jd.encode("utf-8")).hexdigest(),
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# -------------------------------------------------------
+# IN-PROCESS RUN
+# -------------------------------------------------------
+
+class InflightRun:
+    def __init__(self, key: str):
+        self.key = key
+        self.history = []
+        self.queues = set()
+        self.future = asyncio.get_running_loop().create_future()
+        self.attached_count = 0
+        self.task = None
+
+    def publish(self, event: dict):
+        self.history.append(event)
+        for queue in self.queues:
+            queue.put_nowait(event)
+
+    def finish(self, result=None, error: BaseException = None):
+        if self.future.done():
+            return
+        if isinstance(error, asyncio.CancelledError):
+            self.future.cancel()
+        elif error is not None:
+            self.future.set_exception(error)
+            # Mark retrieved so an unobserved failure is not logged twice
+            self.future.exception()
+        else:
+            self.future.set_result(result)
+        for queue in self.queues:
+            queue.put_nowait(_END)
+
+    async def wait(self):
+        return await asyncio.shield(self.future)
+
+    async def events(self):
+        """
+        Replays everything published so far, then follows live events
+        until the run finishes.
+        """
+        queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        if self.future.done():
+            queue.put_nowait(_END)
+        self.queues.add(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is _END:
+                    return
+                yield event
+        finally:
+            self.queues.discard(queue)
+
+    @contextlib.asynccontextmanager
+    async def attached(self):
+        """
+        Keeps the run alive while at least one caller is interested;
+        the last caller to leave an unfinished run cancels it.
+        """
+        self.attached_count += 1
+        try:
+            yield self
+        finally:
+            self.attached_count -= 1
+            if self.attached_count == 0 and not self.future.done() and self.task:
+                self.task.cancel()
+
+
+# -------------------------------------------------------
+# CROSS-WORKER CLAIMS
+# -------------------------------------------------------
+
+def prune_inflight():
+    """
+    Delete claims past their use: results older than RESULT_TTL_SECONDS
+    and running rows whose owner stopped heartbeating (a follower would
+    take those over anyway).
+    """
+    now = datetime.utcnow()
+    db = SessionLocal()
+    try:
+        table = models.InflightOptimization
+        db.query(table).filter(
+            ((table.status != "running") & (table.finished_at < now - timedelta(seconds=RESULT_TTL_SECONDS)))
+            | ((table.status == "running") & (table.heartbeat_at < now - timedelta(seconds=STALE_SECONDS)))
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def claim(key: str):
+    """
+    Returns ("leader", None), ("follower", None) or ("done", result).
+    """
+    global _last_prune
+    if time.monotonic() - _last_prune > PRUNE_INTERVAL_SECONDS:
+        _last_prune = time.monotonic()
+        try:
+            prune_inflight()
+        except Exception as e:
+            log.warning("Pruning inflight_optimizations failed: %s", e)
+
+    db = SessionLocal()
+    try:
+        now = datetime.utcnow()
+        row = db.get(models.InflightOptimization, key, with_for_update=True)
+
+        if row is None:
+            db.add(models.InflightOptimization(
+                key=key, owner=WORKER_ID, status="running", started_at=now, heartbeat_at=now,
+            ))
+            try:
+                db.commit()
+                return "leader", None
+            except IntegrityError:
+                # Another worker inserted first
+                db.rollback()
+                row = db.get(models.InflightOptimization, key, with_for_update=True)
+
+        if row.status == "running" and row.heartbeat_at > now - timedelta(seconds=STALE_SECONDS):
+            db.commit()
+            return "follower", None
+
+        if row.status == "done" and row.finished_at and row.finished_at > now - timedelta(seconds=RESULT_TTL_SECONDS):
+            db.commit()
+            return "done", row.result
+
+        # Missing, stale, failed or expired: take it over
+        row.owner = WORKER_ID
+        row.status = "running"
+        row.result = None
+        row.error = None
+        row.started_at = now
+        row.heartbeat_at = now
+        row.finished_at = None
+        db.commit()
+        return "leader", None
+    finally:
+        db.close()
+
+
+def heartbeat(key: str):
+    db = SessionLocal()
+    try:
+        db.query(models.InflightOptimization).filter_by(key=key, owner=WORKER_ID).update(
+            {"heartbeat_at": datetime.utcnow()}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+
+def release(key: str, result: dict = None, error: str = None):
+    db = SessionLocal()
+    try:
+        db.query(models.InflightOptimization).filter_by(key=key, owner=WORKER_ID).update({
+            "status": "failed" if error else "done",
+            "result": result,
+            "error": error,
+            "finished_at": datetime.utcnow(),
+        })
+        db.commit()
+    finally:
+        db.close()
+
+
+def abandon(key: str):
+    """
+    Drop our claim so a waiting worker takes over instead of failing.
+    """
+    db = SessionLocal()
+    try:
+        db.query(models.InflightOptimization).filter_by(key=key, owner=WORKER_ID).delete()
+        db.commit()
+    finally:
+        db.close()
+
+
+def poll(key: str):
+    db = SessionLocal()
+    try:
+        row = db.get(models.InflightOptimization, key)
+        if row is None:
+            return None
+        return {
+            "status": row.status,
+            "result": row.result,
+            "error": row.error,
+            "stale": row.heartbeat_at < datetime.utcnow() - timedelta(seconds=STALE_SECONDS),
+        }
+    finally:
+        db.close()
+
+
+# -------------------------------------------------------
+# DRIVER
+# -------------------------------------------------------
+
+async def lead(run: InflightRun, runner, state):
+    async def keep_alive():
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            with contextlib.suppress(Exception):
+                await asyncio.to_thread(heartbeat, run.key)
+
+    pinger = asyncio.create_task(keep_alive())
+    try:
+        result = jsonable_encoder(await runner(state, run.publish))
+    except asyncio.CancelledError:
+        with contextlib.suppress(Exception):
+            await asyncio.to_thread(abandon, run.key)
+        raise
+    except Exception as e:
+        with contextlib.suppress(Exception):
+            await asyncio.to_thread(release, run.key, None, str(e) or type(e).__name__)
+        raise
+    finally:
+        pinger.cancel()
+
+    with contextlib.suppress(Exception):
+        await asyncio.to_thread(release, run.key, result)
+    return result
+
+
+async def follow(run: InflightRun, runner, state):
+    run.publish({"event": "coalesced", "mode": "remote"})
+    while True:
+        await asyncio.sleep(POLL_SECONDS)
+        row = await asyncio.to_thread(poll, run.key)
+
+        if row is None or row["stale"]:
+            # Owner vanished; try to become the leader ourselves
+            role, result = await asyncio.to_thread(claim, run.key)
+            if role == "leader":
+                return await lead(run, runner, state)
+            if role == "done":
+                return result
+            continue
+
+        if row["status"] == "done":
+            return row["result"]
+        if row["status"] == "failed":
+            raise RuntimeError(row["error"] or "Coalesced optimization failed")
+
+
+async def drive(run: InflightRun, runner, state):
+    try:
+        try:
+            role, result = await asyncio.to_thread(claim, run.key)
+        except Exception as e:
+            # DB unavailable: coalesce within this worker only
+            log.warning("Single-flight claim failed, running locally: %s", e)
+            role, result = "local", None
+
+        if role == "done":
+            run.publish({"event": "coalesced", "mode": "recent"})
+        elif role == "follower":
+            result = await follow(run, runner, state)
+        elif role == "leader":
+            result = await lead(run, runner, state)
+        else:
+            result = jsonable_encoder(await runner(state, run.publish))
+
+        run.finish(result=result)
+    except BaseException as e:
+        run.finish(error=e)
+        if isinstance(e, asyncio.CancelledError):
+            raise
+    finally:
+        if registry.get(run.key) is run:
+            del registry[run.key]
+
+
+def join_or_start(key: str, state, runner):
+    """
+    Attach to the identical in-flight run if there is one, otherwise start
+    it. `runner(state, publish)` must return the final state dict.
+    Returns (run, joined).
+    """
+    if not COALESCE_ENABLED:
+        run = InflightRun(key)
+        run.task = asyncio.create_task(run_local(run, runner, state))
+        return run, False
+
+    run = registry.get(key)
+    if run is not None:
+        log.info("Coalescing optimization %s onto in-flight run", key[:12])
+        return run, True
+
+    run = InflightRun(key)
+    registry[key] = run
+    run.task = asyncio.create_task(drive(run, runner, state))
+    return run, False
+
+
+async def run_local(run: InflightRun, runner, state):
+    try:
+        run.finish(result=jsonable_encoder(await runner(state, run.publish)))
+    except BaseException as e:
+        run.finish(error=e)
+        if isinstance(e, asyncio.CancelledError):
+            raise
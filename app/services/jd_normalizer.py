@@ -0,0 +1,204 @@
+import hashlib
+import re
+
+from app.services.local_ats import extract_keywords, surface_form, terms, tokenize
+
+# -------------------------------------------------------
+# JOB DESCRIPTION NORMALIZER
+# -------------------------------------------------------
+# Job descriptions scraped by the extension carry a lot of text no prompt
+# needs: company blurbs, benefits, EEO statements, "Apply now" buttons.
+# normalize_jd() strips that once per posting and pulls out the
+# requirement bullets and keywords; the result is stored on `jobs` under
+# the posting's content hash (see job_service.save_job) and every prompt
+# gets the cleaned text.
+
+# Bump when the rules below change so stored results are recomputed
+NORMALIZER_VERSION = 2
+
+# Cleaning more than this share away means the rules misread the posting
+MIN_KEPT_FRACTION = 0.2
+MAX_KEYWORDS = 25
+
+BULLET_RE = re.compile(r"^\s*(?:[-*•·▪●◦‣–]|\d{1,2}[.)])\s+")
+MARKDOWN_HEADING_RE = re.compile(r"^\s*#{1,6}\s+")
+
+# Sections that describe the employer rather than the job. Phrases that
+# also start job headings ("Who We Are Looking For", "Our Team Uses")
+# only count as the whole heading.
+BOILERPLATE_HEADING = re.compile(
+    r"\b(about (us|the company|our company)|benefits|perks|what we offer|compensation|salary"
+    r"|pay (range|transparency)|equal (employment )?opportunity|eeo|how to apply|application process"
+    r"|life at)\b"
+    r"|^(who we are|our (mission|values|story|culture|team)|we offer|diversity( (&|and) inclusion)?"
+    r"|inclusion|accommodations?|privacy)$"
+    r"|^why (join|work)",
+    re.IGNORECASE,
+)
+
+REQUIREMENT_HEADING = re.compile(
+    r"\b(requirements|qualifications|must[- ]haves?|what you (bring|need|have)|you have"
+    r"|skills|experience|who you are|tech(nology)? stack|looking for|what we('re| are) looking for)\b",
+    re.IGNORECASE,
+)
+
+# A dropped section is put back when this share of its bullets mention
+# the keywords of the job's own sections; the headings misread it
+RESTORE_KEYWORD_FRACTION = 0.5
+JOB_SECTIONS = ("responsibilities", "requirements", "nice_to_have")
+# Bullets that state a requirement whatever the section is called
+REQUIREMENT_LINE = re.compile(
+    r"\b\d+\+? years|experience (with|in)|proficien|knowledge of|familiar(ity)? with|degree in"
+    r"|hands-on|strong .{0,40}skills",
+    re.IGNORECASE,
+)
+NICE_TO_HAVE_HEADING = re.compile(r"\b(nice[- ]to[- ]haves?|preferred|bonus|pluses?)\b", re.IGNORECASE)
+RESPONSIBILITY_HEADING = re.compile(
+    r"\b(responsibilities|what you('ll| will) do|the role|your role|about the (role|job|position)"
+    r"|day[- ]to[- ]day|duties|you will)\b",
+    re.IGNORECASE,
+)
+
+# Lines dropped wherever they appear
+NOISE_LINE = re.compile(
+    r"equal opportunity employer|without regard to|reasonable accommodation|e-verify"
+    r"|background check|protected veteran|sexual orientation|gender identity|national origin"
+    r"|privacy (policy|notice)|cookies?\b|^apply( now)?$|^save( job)?$|^share$|report this job"
+    r"|^show (more|less)$|^posted \d+|\b\d+ applicants\b|^easy apply$|^see who",
+    re.IGNORECASE,
+)
+
+
+def content_hash(jd_text: str) -> str:
+    """
+    Key for a posting: whitespace and case differences do not matter.
+    """
+    normalized = re.sub(r"\s+", " ", jd_text).strip().lower()
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def is_heading(line: str) -> bool:
+    if MARKDOWN_HEADING_RE.match(line):
+        return True
+    text = line.strip()
+    if not text or len(text) > 60 or BULLET_RE.match(line):
+        return False
+    if text.endswith(":"):
+        return True
+    # "Benefits", "WHAT YOU'LL DO", "About Us", "What you'll do"
+    if text.endswith((".", ",", ";")) or len(text.split()) > 6:
+        return False
+    if text.isupper() or text.istitle():
+        return True
+    # Sentence-case lines only count when they read like a known heading;
+    # employer-section words are common in ordinary short lines
+    kind = heading_kind(text)
+    return kind != "other" and (kind != "boilerplate" or len(text.split()) <= 3)
+
+
+def heading_kind(line: str) -> str:
+    text = MARKDOWN_HEADING_RE.sub("", line).strip().rstrip(":")
+    if NICE_TO_HAVE_HEADING.search(text):
+        return "nice_to_have"
+    if RESPONSIBILITY_HEADING.search(text):
+        return "responsibilities"
+    if REQUIREMENT_HEADING.search(text):
+        return "requirements"
+    if BOILERPLATE_HEADING.search(text):
+        return "boilerplate"
+    return "other"
+
+
+def split_sections(jd_text: str) -> list:
+    """
+    [(kind, heading line or None, [body lines])] in document order, with
+    whitespace collapsed and line-level noise removed.
+    """
+    sections = [("other", None, [])]
+    for raw in jd_text.splitlines():
+        line = re.sub(r"[ \t\u00a0]+", " ", raw).strip()
+        if not line:
+            continue
+        if is_heading(line):
+            sections.append((heading_kind(line), MARKDOWN_HEADING_RE.sub("", line), []))
+        elif not NOISE_LINE.search(line):
+            sections[-1][2].append(line)
+    return sections
+
+
+def mentions_keywords(lines: list, keywords: set) -> bool:
+    # Only bullets: employer blurbs are prose and name the company
+    items = [line for line in lines if BULLET_RE.match(line)]
+    if not items:
+        return False
+    hits = sum(
+        bool(keywords & set(terms(tokenize(line)))) or bool(REQUIREMENT_LINE.search(line))
+        for line in items
+    )
+    return hits >= len(items) * RESTORE_KEYWORD_FRACTION
+
+
+def clean_lines(jd_text: str):
+    """
+    Returns (kept lines, {section kind: [bullet text]}).
+    """
+    sections = split_sections(jd_text)
+
+    # Employer sections go, unless they read like the job after all
+    job_text = "\n".join(line for kind, _, lines in sections if kind in JOB_SECTIONS for line in lines)
+    keywords = set(extract_keywords(job_text, limit=MAX_KEYWORDS))
+
+    kept = []
+    seen = set()
+    bullets = {kind: [] for kind in JOB_SECTIONS}
+
+    for kind, heading, lines in sections:
+        if kind == "boilerplate":
+            if not mentions_keywords(lines, keywords):
+                continue
+            kind = "requirements"
+        if heading is not None:
+            kept.append(heading)
+
+        for line in lines:
+            # Scraped pages often repeat blocks (mobile + desktop markup)
+            key = line.lower()
+            if key in seen:
+                continue
+            seen.add(key)
+
+            kept.append(line)
+            if kind in bullets and BULLET_RE.match(line):
+                bullets[kind].append(BULLET_RE.sub("", line))
+
+    return kept, bullets
+
+
+def normalize_jd(jd_text: str) -> dict:
+    """
+    {"text": cleaned JD for prompts, "requirements": {...}, "keywords": [...],
+    "raw_chars": int, "chars": int, "version": int}
+    """
+    kept, bullets = clean_lines(jd_text)
+    text = "\n".join(kept)
+
+    raw_chars = len(jd_text.strip())
+    if raw_chars and len(text) < raw_chars * MIN_KEPT_FRACTION:
+        # Probably a posting whose headings fooled the section rules;
+        # keep everything except the line-level noise
+        text = "\n".join(
+            line.strip() for line in jd_text.splitlines()
+            if line.strip() and not NOISE_LINE.search(line)
+        )
+
+    body = "\n".join(line for line in text.splitlines() if not is_heading(line))
+    keywords = [surface_form(term, body) for term in extract_keywords(body, limit=MAX_KEYWORDS)]
+
+    return {
+        "text": text,
+        "requirements": bullets,
+        "keywords": keywords,
+        "raw_chars": raw_chars,
+        "chars": len(text),
+        "version": NORMALIZER_VERSION,
+    }
@@ -0,0 +1,163 @@
+import logging
+import os
+from datetime import datetime, timedelta
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import func
+
+from app.db.database import SessionLocal
+from app.db import models
+
+log = logging.getLogger("job_queue")
+
+# -------------------------------------------------------
+# OPTIMIZATION QUEUE
+# -------------------------------------------------------
+# Postgres is the broker: the API inserts `optimization_jobs` rows and
+# app.worker processes claim them with SELECT ... FOR UPDATE SKIP LOCKED,
+# so any number of workers can pull from the table without blocking on
+# each other and no extra service is needed.
+
+QUEUE_STALE_SECONDS = float(os.getenv("QUEUE_STALE_SECONDS", "120"))
+QUEUE_MAX_ATTEMPTS = int(os.getenv("QUEUE_MAX_ATTEMPTS", "3"))
+
+
+def enqueue_optimization(db, state) -> str:
+    job = models.OptimizationJob(
+        user_id=state.user_id,
+        status="queued",
+        state=jsonable_encoder(state),
+    )
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+def get_optimization_job(db, job_id: str):
+    return db.get(models.OptimizationJob, job_id)
+
+
+def queue_position(db, job) -> int:
+    """
+    Jobs queued ahead of this one (0 = next to be picked up).
+    """
+    return (
+        db.query(func.count(models.OptimizationJob.id))
+        .filter(models.OptimizationJob.status == "queued")
+        .filter(models.OptimizationJob.created_at < job.created_at)
+        .scalar()
+    )
+
+
+def queue_stats(db) -> dict:
+    counts = dict(
+        db.query(models.OptimizationJob.status, func.count(models.OptimizationJob.id))
+        .filter(models.OptimizationJob.status.in_(("queued", "running")))
+        .group_by(models.OptimizationJob.status)
+        .all()
+    )
+    oldest = (
+        db.query(func.min(models.OptimizationJob.created_at))
+        .filter(models.OptimizationJob.status == "queued")
+        .scalar()
+    )
+    return {
+        "queued": counts.get("queued", 0),
+        "running": counts.get("running", 0),
+        "oldest_queued_seconds": (datetime.utcnow() - oldest).total_seconds() if oldest else 0.0,
+    }
+
+
+# -------------------------------------------------------
+# WORKER SIDE
+# -------------------------------------------------------
+
+def claim_next(worker_id: str):
+    """
+    Atomically take the oldest queued job. Returns (job_id, state) or None.
+    """
+    db = SessionLocal()
+    try:
+        job = (
+            db.query(models.OptimizationJob)
+            .filter(models.OptimizationJob.status == "queued")
+            .order_by(models.OptimizationJob.created_at)
+            .with_for_update(skip_locked=True)
+            .first()
+        )
+        if job is None:
+            db.commit()
+            return None
+
+        now = datetime.utcnow()
+        job.status = "running"
+        job.worker = worker_id
+        job.attempts = (job.attempts or 0) + 1
+        job.started_at = now
+        job.heartbeat_at = now
+        db.commit()
+        return job.id, job.state
+    finally:
+        db.close()
+
+
+def _update_owned(job_id: str, worker_id: str, **values):
+    db = SessionLocal()
+    try:
+        db.query(models.OptimizationJob).filter_by(id=job_id, worker=worker_id, status="running").update(values)
+        db.commit()
+    finally:
+        db.close()
+
+
+def heartbeat_job(job_id: str, worker_id: str):
+    _update_owned(job_id, worker_id, heartbeat_at=datetime.utcnow())
+
+
+def complete_job(job_id: str, worker_id: str, final_state: dict):
+    _update_owned(
+        job_id, worker_id,
+        status="done", result=jsonable_encoder(final_state), finished_at=datetime.utcnow(),
+    )
+
+
+def fail_job(job_id: str, worker_id: str, error: str):
+    _update_owned(job_id, worker_id, status="failed", error=error, finished_at=datetime.utcnow())
+
+
+def requeue_job(job_id: str, worker_id: str):
+    """
+    Hand a job back (worker shutting down); the next attempt resumes from
+    the graph checkpoint.
+    """
+    _update_owned(job_id, worker_id, status="queued", worker=None)
+
+
+def requeue_stale():
+    """
+    Jobs whose worker stopped heartbeating go back to the queue, or fail
+    once they have used up QUEUE_MAX_ATTEMPTS.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=QUEUE_STALE_SECONDS)
+    db = SessionLocal()
+    try:
+        stale = (
+            db.query(models.OptimizationJob)
+            .filter(models.OptimizationJob.status == "running")
+            .filter(models.OptimizationJob.heartbeat_at < cutoff)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for job in stale:
+            if (job.attempts or 0) >= QUEUE_MAX_ATTEMPTS:
+                job.status = "failed"
+                job.error = f"Worker lost {job.attempts} times"
+                job.finished_at = datetime.utcnow()
+            else:
+                log.warning("Requeueing job %s abandoned by %s", job.id, job.worker)
+                job.status = "queued"
+                job.worker = None
+        db.commit()
+        return len(stale)
+    finally:
+        db.close()
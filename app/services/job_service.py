@@ -1,15 +1,112 @@
 from sqlalchemy.orm import Session
 from app.db import models
+from app.db.database import SessionLocal
+from app.llm.usage import link_generated_resume
+from app.services.jd_normalizer import NORMALIZER_VERSION, content_hash, normalize_jd
+
+
+# -------------------------------------------------------
+# JOB DESCRIPTIONS
+# -------------------------------------------------------
+# A posting is cleaned once (app/services/jd_normalizer.py) and stored on
+# its `jobs` row with its content hash. The same user sending the same
+# posting again reuses that row; another user's copy reuses the cleaning.
+
+def find_normalized(db: Session, jd_hash: str):
+    job = (
+        db.query(models.Job)
+        .filter(models.Job.content_hash == jd_hash, models.Job.normalized.isnot(None))
+        .order_by(models.Job.created_at.desc())
+        .first()
+    )
+    if job is None or job.normalized.get("version") != NORMALIZER_VERSION:
+        return None
+    return job.normalized
+
+
+def ingest_job(db: Session, user_id: str, jd_text: str):
+    """
+    Returns the Job row for this user + posting, creating it (without
+    committing) when needed.
+    """
+    jd_hash = content_hash(jd_text)
+    existing = (
+        db.query(models.Job)
+        .filter_by(user_id=user_id, content_hash=jd_hash)
+        .order_by(models.Job.created_at.desc())
+        .first()
+    )
+    if existing is not None and (existing.normalized or {}).get("version") == NORMALIZER_VERSION:
+        return existing
+
+    normalized = find_normalized(db, jd_hash) or normalize_jd(jd_text)
+    if existing is not None:
+        existing.normalized = normalized
+        return existing
 
-def save_job(db: Session, user_id: str, jd_text: str):
     job = models.Job(
         user_id=user_id,
-        jd_text=jd_text
+        jd_text=jd_text,
+        content_hash=jd_hash,
+        normalized=normalized,
     )
     db.add(job)
+    return job
+
+
+def save_job(db: Session, user_id: str, jd_text: str):
+    """
+    Returns (job id, normalized JD dict); the dict's "text" is what the
+    prompts get.
+    """
+    job = ingest_job(db, user_id, jd_text)
+    db.commit()
+    return job.id, job.normalized
+
+
+def save_jobs(db: Session, user_id: str, jd_texts: list):
+    # The same posting twice in one batch shares its (still pending) row
+    by_hash = {}
+    jobs = []
+    for jd_text in jd_texts:
+        jd_hash = content_hash(jd_text)
+        if jd_hash not in by_hash:
+            by_hash[jd_hash] = ingest_job(db, user_id, jd_text)
+        jobs.append(by_hash[jd_hash])
     db.commit()
-    db.refresh(job)
-    return job.id
+    return [(job.id, job.normalized) for job in jobs]
+
+
+def save_generated_resume(db: Session, job_id: str, final_state: dict, file_url: str):
+    generated = models.GeneratedResume(
+        job_id=job_id,
+        resume_sections_json=final_state["resume_sections"],
+        ats_score=final_state["ats_score"],
+        analysis_json=final_state["analysis"],
+        iteration_count=final_state["iteration_count"],
+        file_url=file_url,
+    )
+    db.add(generated)
+    db.commit()
+    db.refresh(generated)
+    return generated.id
+
+
+def persist_run_result(job_id: str, final_state: dict) -> str:
+    """
+    Store a finished optimization under its posting and attach the run's
+    LLM usage to it. Own session: runs finish concurrently and outlive
+    the request that started them.
+    """
+    db = SessionLocal()
+    try:
+        file_url = f"/generated/{final_state['final_docx_path']}"
+        generated_id = save_generated_resume(db, job_id, final_state, file_url)
+        if final_state.get("usage_run_id"):
+            link_generated_resume(db, final_state["usage_run_id"], generated_id)
+        return generated_id
+    finally:
+        db.close()
 
 
 def get_user_resume_sections(db: Session, user_id: str):
@@ -1,9 +1,11 @@
 import json
-import re
-import os
-from openai import OpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app.llm.client import chat, achat
+from app.llm.cache import llm_cached
+from app.llm.repair import avalidate, validate
+from app.llm.schemas import ATSResult
+
+ATS_MODEL = "gpt-4.1-mini"
 
 ATS_PROMPT = """
 You are an ATS scoring engine.
@@ -24,69 +26,33 @@ The output MUST follow this format exactly:
 }
 """
 
-def clean_invalid_quotes(text: str) -> str:
-    """
-    Fix unescaped quotes inside JSON string values.
-    Converts:   "text with "BigQuery" inside"
-    Into:       "text with \"BigQuery\" inside"
-    """
-
-    # Regex: find strings, then escape internal quotes
-    def fix_string(match):
-        s = match.group(0)
-        # skip the first " and last "
-        inner = s[1:-1]
-        inner = inner.replace('\\"', '"')  # normalize
-        inner = inner.replace('"', '\\"')  # escape
-        return f"\"{inner}\""
-
-    return re.sub(r'"([^"\\]|\\.)*"', fix_string, text)
-
-
-def safe_json_loads(text: str):
-    """
-    Attempts to safely parse LLM output by cleaning:
-    - JS-style comments
-    - invalid quotes
-    - trailing commas
-    - extraneous text
-    """
-
-    # Remove comments
-    text = re.sub(r"//.*", "", text)
+def build_ats_messages(sections, jd):
+    return [
+        {"role": "system", "content": ATS_PROMPT},
+        {"role": "user", "content": f"Resume Sections: {json.dumps(sections)}"},
+        {"role": "user", "content": f"Job Description: {jd}"}
+    ]
 
-    # Remove trailing commas
-    text = re.sub(r",(\s*[}\]])", r"\1", text)
 
-    # Escape invalid quotes inside strings
-    text = clean_invalid_quotes(text)
-
-    text = text.strip()
-
-    try:
-        return json.loads(text)
-    except:
-        # try extracting only the JSON part
-        match = re.search(r"{.*}", text, re.DOTALL)
-        if match:
-            cleaned = match.group(0)
-            try:
-                return json.loads(cleaned)
-            except:
-                pass
+@llm_cached("ats", ATS_MODEL, ATS_PROMPT)
+def ats_score(sections, jd):
+    resp = chat(
+        "ATS",
+        ATS_MODEL,
+        messages=build_ats_messages(sections, jd)
+    )
 
-    raise ValueError(f"Could not parse LLM JSON output:\n{text}")
+    raw_output = resp.choices[0].message.content
+    return validate("ATS", ATSResult, raw_output, {"shared": f"Job Description: {jd}"})
 
 
-def ats_score(sections, jd):
-    resp = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=[
-            {"role": "system", "content": ATS_PROMPT},
-            {"role": "user", "content": f"Resume Sections: {json.dumps(sections)}"},
-            {"role": "user", "content": f"Job Description: {jd}"}
-        ]
+@llm_cached("ats", ATS_MODEL, ATS_PROMPT)
+async def aats_score(sections, jd):
+    resp = await achat(
+        "ATS",
+        ATS_MODEL,
+        messages=build_ats_messages(sections, jd)
     )
 
     raw_output = resp.choices[0].message.content
-    return safe_json_loads(raw_output)
\ No newline at end of file
+    return await avalidate("ATS", ATSResult, raw_output, {"shared": f"Job Description: {jd}"})
@@ -1,10 +1,22 @@
-from openai import OpenAI
+import logging
 import os
-import json
+import re
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from app.llm.client import chat, achat
+from app.llm.cache import llm_cached
+from app.llm.repair import avalidate, validate
+from app.llm.schemas import RewrittenResume, partial_rewrite
+from app.services.llm_optimizer import rewrite_context
+from app.services.local_ats import is_content, tokenize
 
-IMPROVE_PROMPT = """
+log = logging.getLogger("llm_improver")
+
+IMPROVE_MODEL = "gpt-4.1"
+
+# Regenerate only the sections the ATS analysis points at
+IMPROVE_PARTIAL = os.getenv("IMPROVE_PARTIAL", "1") == "1"
+
+IMPROVE_RULES = """
 You are a resume refinement expert with strict ATS optimization AND strict historical accuracy.
 
 ==============================
@@ -77,7 +89,9 @@ SKILLS RULES
 - Keys = category names
 - Values = lists of strings.
 - Include missing_keywords if they are skills/tools.
+"""
 
+IMPROVE_PROMPT = IMPROVE_RULES + """
 ==============================
 OUTPUT FORMAT
 ==============================
@@ -91,38 +105,51 @@ Format:
 }
 """
 
-def safe_json_parse(text: str):
-    try:
-        return json.loads(text)
-    except:
-        pass
-
-    if "```" in text:
-        cleaned = text.replace("```json", "").replace("```", "").strip()
-        try:
-            return json.loads(cleaned)
-        except:
-            pass
-
-    cleaned = text.replace("\n", " ").replace("\t", " ")
-    try:
-        return json.loads(cleaned)
-    except:
-        raise ValueError(f"LLM returned invalid JSON:\n{text}")
-
-def ensure_skills_dict(skills):
-    if isinstance(skills, dict):
-        return skills
-    if isinstance(skills, list):
-        return {"General Skills": skills}
-    return {"General Skills": ["Problem Solving", "Communication"]}
-
-def enforce_bullet_rules(experience):
-    required = [7, 6, 4]
+IMPROVE_PARTIAL_PROMPT = IMPROVE_RULES + """
+==============================
+PARTIAL REWRITE
+==============================
+You receive ONLY the sections that need work; everything else in the
+resume is already final. Each experience entry carries its "position"
+(1 = most recent); apply the bullet count for that position.
+
+Work the missing_keywords into the sections you receive where they are
+truthful. Keywords that do not fit any of them can be left out.
+
+==============================
+OUTPUT FORMAT
+==============================
+Return ONLY valid JSON. NO text outside the JSON.
+Return ONLY the keys present under "Sections To Rewrite", with experience
+entries in the order given:
+
+{
+  "summary": "",
+  "experience": [{"position": 1, "bullets": [...]}],
+  "skills": {}
+}
+"""
+
+BULLET_COUNTS = [7, 6, 4]
+
+# Shared content words a JD sentence needs with a job to tie a keyword to it
+MIN_JOB_OVERLAP = 2
+# Keywords at most this many words long are treated as skills / tools
+SKILL_KEYWORD_WORDS = 3
+
+SECTION_MENTIONS = {
+    "summary": re.compile(r"\b(summary|profile|objective|headline)\b", re.IGNORECASE),
+    "skills": re.compile(r"\bskills?\b|\btools?\b|\btechnolog", re.IGNORECASE),
+    "experience": re.compile(r"\b(experience|bullets?|achievements?|accomplishments?|impact|metrics?)\b", re.IGNORECASE),
+}
+
+
+def enforce_bullet_rules(experience, positions=None):
     for i, job in enumerate(experience):
-        if i >= len(required):
-            break
-        need = required[i]
+        position = positions[i] if positions is not None else i
+        if position >= len(BULLET_COUNTS):
+            continue
+        need = BULLET_COUNTS[position]
         bullets = job.get("bullets", [])
         if len(bullets) < need:
             bullets += ["• Additional impact bullet needed"] * (need - len(bullets))
@@ -136,28 +163,280 @@ def enforce_summary_length(summary):
         return summary
     return summary[:797] + "..."
 
-def improve_resume(sections, analysis, jd, experience_locks):
-    resp = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": IMPROVE_PROMPT},
-            {
-                "role": "user",
-                "content": f"""
+# ---------------------------------------------------
+# TARGETED REWRITES
+# ---------------------------------------------------
+# Most ATS analyses implicate one or two sections: a few missing tools
+# belong in skills, a weak area names one job. Regenerating only those
+# sections cuts output tokens (and so latency) roughly in proportion.
+
+def content_tokens(text: str) -> set:
+    return {t for t in tokenize(text) if is_content(t)}
+
+
+def jd_context(keyword: str, jd: str) -> set:
+    """
+    Content words of the JD sentences that mention `keyword`.
+    """
+    sentences = [s for s in re.split(r"(?<=[.!?;\n])\s*", jd) if keyword.lower() in s.lower()]
+    return content_tokens(" ".join(sentences)) - content_tokens(keyword)
+
+
+def job_tokens(job: dict) -> set:
+    bullets = job.get("bullets") or job.get("responsibilities") or []
+    return content_tokens(" ".join([job.get("title", "")] + list(bullets)))
+
+
+def keyword_job(keyword: str, jd: str, jobs: list):
+    """
+    Index of the job whose bullets share the most context with the JD
+    sentences asking for `keyword`, or None if none is related.
+    """
+    context = jd_context(keyword, jd)
+    best, best_overlap = None, MIN_JOB_OVERLAP - 1
+    for i, tokens in enumerate(jobs):
+        overlap = len(context & tokens)
+        if overlap > best_overlap:
+            best, best_overlap = i, overlap
+    return best
+
+
+def improve_targets(sections: dict, analysis: dict, jd: str) -> dict:
+    """
+    Sections an ATS analysis implicates:
+    {"summary": bool, "skills": bool, "experience": [job indices]}.
+    """
+    experience = sections.get("experience") or []
+    jobs = [job_tokens(job) for job in experience]
+    analysis = analysis if isinstance(analysis, dict) else {}
+    missing = [str(k) for k in analysis.get("missing_keywords") or []]
+    notes = " ".join(str(analysis.get(k) or "") for k in ("weak_areas", "recommendations"))
+
+    summary = bool(SECTION_MENTIONS["summary"].search(notes))
+    skills = bool(SECTION_MENTIONS["skills"].search(notes))
+    named = {
+        i for i, job in enumerate(experience)
+        if any(job.get(k) and job[k].lower() in notes.lower() for k in ("company", "title"))
+    }
+
+    placed = set()
+    for keyword in missing:
+        if len(keyword.split()) <= SKILL_KEYWORD_WORDS:
+            skills = True
+        i = keyword_job(keyword, jd, jobs)
+        if i is not None:
+            placed.add(i)
+        elif len(keyword.split()) > SKILL_KEYWORD_WORDS:
+            # A phrase with no related job reads best in the summary
+            summary = True
+
+    indices = named | placed
+    if not indices and SECTION_MENTIONS["experience"].search(notes):
+        indices = set(range(len(experience)))
+
+    if not (summary or skills or indices):
+        # Nothing specific to go on: rewrite everything as before
+        return {"summary": True, "skills": True, "experience": list(range(len(experience)))}
+    return {"summary": summary, "skills": skills, "experience": sorted(indices)}
+
+
+def is_full_rewrite(targets: dict, sections: dict) -> bool:
+    return (
+        targets["summary"]
+        and targets["skills"]
+        and len(targets["experience"]) == len(sections.get("experience") or [])
+    )
+
+
+def target_fields(targets: dict) -> tuple:
+    return tuple(name for name in ("summary", "experience", "skills") if targets[name])
+
+
+def requested_jobs(sections: dict, targets: dict) -> list:
+    experience = sections.get("experience") or []
+    return [{"position": i + 1, **experience[i]} for i in targets["experience"]]
+
+
+def build_partial_messages(sections, analysis, jd, experience_locks, targets):
+    requested = {}
+    if targets["summary"]:
+        requested["summary"] = sections.get("summary", "")
+    if targets["experience"]:
+        requested["experience"] = requested_jobs(sections, targets)
+    if targets["skills"]:
+        requested["skills"] = sections.get("skills", {})
+
+    return [
+        {"role": "system", "content": IMPROVE_PARTIAL_PROMPT},
+        {
+            "role": "user",
+            "content": f"""
+Sections To Rewrite: {requested}
+ATS Analysis: {analysis}
+Job Description: {jd}
+Protected Experience Info: {experience_locks}
+"""
+        }
+    ]
+
+
+def partial_context(sections, jd, experience_locks, targets) -> dict:
+    # Repairs index "experience" like the request did, not like the resume
+    return {**rewrite_context(sections, jd, experience_locks), "experience": requested_jobs(sections, targets)}
+
+
+def returned_position(job):
+    try:
+        return int(job.get("position"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def align_jobs(targets: dict):
+    """
+    A `prepare` hook for validate(): lines the returned experience entries
+    up with the requested ones by their "position", so a reordered or
+    short response cannot put bullets on the wrong job. Requested jobs
+    that did not come back are left as None for repair to regenerate.
+    """
+    wanted = [i + 1 for i in targets["experience"]]
+
+    def prepare(data: dict) -> dict:
+        returned = data.get("experience")
+        if not isinstance(returned, list):
+            return data
+        placed, unnumbered = {}, []
+        for job in returned:
+            position = returned_position(job)
+            if position is None:
+                unnumbered.append(job)
+            elif position in wanted and position not in placed:
+                placed[position] = job
+        # Entries without a position fill the gaps in request order
+        for position in wanted:
+            if position not in placed and unnumbered:
+                placed[position] = unnumbered.pop(0)
+        missing = [p for p in wanted if p not in placed]
+        if missing:
+            log.warning("Partial IMPROVE response lacks jobs at positions %s", missing)
+        return {**data, "experience": [placed.get(p) for p in wanted]}
+
+    return prepare
+
+
+def merge_partial(sections: dict, targets: dict, rewritten: dict) -> dict:
+    """
+    Full {"summary", "experience", "skills"} with the rewritten sections
+    swapped in. Only bullets change in a rewritten job. The rewritten
+    jobs are in target order (see align_jobs).
+    """
+    experience = [dict(job) for job in sections.get("experience") or []]
+    new_jobs = enforce_bullet_rules(rewritten.get("experience", []), targets["experience"])
+    for i, job in zip(targets["experience"], new_jobs):
+        experience[i]["bullets"] = job["bullets"]
+
+    return {
+        "summary": enforce_summary_length(rewritten["summary"]) if targets["summary"] else sections.get("summary", ""),
+        "experience": experience,
+        "skills": rewritten["skills"] if targets["skills"] else sections.get("skills", {}),
+        "targets": target_fields(targets),
+    }
+
+
+def plan_improve(sections, analysis, jd):
+    """
+    Returns the targets for a partial rewrite, or None for a full one.
+    """
+    if not IMPROVE_PARTIAL:
+        return None
+    targets = improve_targets(sections, analysis, jd)
+    if is_full_rewrite(targets, sections):
+        return None
+    log.info("Partial IMPROVE: %s (jobs %s)", ", ".join(target_fields(targets)), targets["experience"])
+    return targets
+
+
+def build_improve_messages(sections, analysis, jd, experience_locks):
+    return [
+        {"role": "system", "content": IMPROVE_PROMPT},
+        {
+            "role": "user",
+            "content": f"""
 Resume Sections: {sections}
 ATS Analysis: {analysis}
 Job Description: {jd}
 Protected Experience Info: {experience_locks}
 """
-            }
-        ]
+        }
+    ]
+
+def postprocess_improved(parsed):
+    # Shape is guaranteed by RewrittenResume; these are content rules
+    parsed["experience"] = enforce_bullet_rules(parsed["experience"])
+    parsed["summary"] = enforce_summary_length(parsed["summary"])
+
+    return parsed
+
+@llm_cached("improve", IMPROVE_MODEL, IMPROVE_PROMPT + IMPROVE_PARTIAL_PROMPT)
+def improve_resume(sections, analysis, jd, experience_locks):
+    targets = plan_improve(sections, analysis, jd)
+    if targets is not None:
+        resp = chat(
+            "IMPROVE",
+            IMPROVE_MODEL,
+            messages=build_partial_messages(sections, analysis, jd, experience_locks, targets)
+        )
+        rewritten = validate(
+            "IMPROVE",
+            partial_rewrite(target_fields(targets)),
+            resp.choices[0].message.content,
+            partial_context(sections, jd, experience_locks, targets),
+            prepare=align_jobs(targets),
+        )
+        return merge_partial(sections, targets, rewritten)
+
+    resp = chat(
+        "IMPROVE",
+        IMPROVE_MODEL,
+        messages=build_improve_messages(sections, analysis, jd, experience_locks)
     )
 
-    raw_output = resp.choices[0].message.content
-    parsed = safe_json_parse(raw_output)
+    parsed = validate(
+        "IMPROVE",
+        RewrittenResume,
+        resp.choices[0].message.content,
+        rewrite_context(sections, jd, experience_locks)
+    )
+    return postprocess_improved(parsed)
+
+@llm_cached("improve", IMPROVE_MODEL, IMPROVE_PROMPT + IMPROVE_PARTIAL_PROMPT)
+async def aimprove_resume(sections, analysis, jd, experience_locks):
+    targets = plan_improve(sections, analysis, jd)
+    if targets is not None:
+        resp = await achat(
+            "IMPROVE",
+            IMPROVE_MODEL,
+            messages=build_partial_messages(sections, analysis, jd, experience_locks, targets)
+        )
+        rewritten = await avalidate(
+            "IMPROVE",
+            partial_rewrite(target_fields(targets)),
+            resp.choices[0].message.content,
+            partial_context(sections, jd, experience_locks, targets),
+            prepare=align_jobs(targets),
+        )
+        return merge_partial(sections, targets, rewritten)
 
-    parsed["skills"] = ensure_skills_dict(parsed.get("skills"))
-    parsed["experience"] = enforce_bullet_rules(parsed.get("experience", []))
-    parsed["summary"] = enforce_summary_length(parsed.get("summary", ""))
+    resp = await achat(
+        "IMPROVE",
+        IMPROVE_MODEL,
+        messages=build_improve_messages(sections, analysis, jd, experience_locks)
+    )
 
-    return parsed
\ No newline at end of file
+    parsed = await avalidate(
+        "IMPROVE",
+        RewrittenResume,
+        resp.choices[0].message.content,
+        rewrite_context(sections, jd, experience_locks)
+    )
+    return postprocess_improved(parsed)
@@ -1,7 +1,21 @@
-from openai import OpenAI
+import logging
 import os
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from pydantic import ValidationError
+
+from app.llm.client import chat, achat, achat_stream
+from app.llm.cache import llm_cached
+from app.llm.json_stream import JSONStreamParser, parse_json
+from app.llm.repair import avalidate, validate
+from app.llm.schemas import RewrittenResume
+
+log = logging.getLogger("optimizer")
+
+TAILOR_MODEL = "gpt-4.1"
+
+# Best-of-N tailoring ("candidates" mode)
+TAILOR_CANDIDATES = int(os.getenv("TAILOR_CANDIDATES", "3"))
+CANDIDATE_TEMPERATURE = float(os.getenv("TAILOR_CANDIDATE_TEMPERATURE", "0.9"))
 
 TAILOR_PROMPT = """
 You are a resume tailoring expert with strict historical accuracy.
@@ -97,20 +111,140 @@ RULES:
 - Absolutely no text outside the JSON object.
 """
 
-def tailor_resume(original_sections, job_description, experience_locks):
-    response = client.chat.completions.create(
-        model="gpt-4.1",
-        messages=[
-            {"role": "system", "content": TAILOR_PROMPT},
-            {
-                "role": "user",
-                "content": f"""
+def build_tailor_messages(original_sections, job_description, experience_locks):
+    return [
+        {"role": "system", "content": TAILOR_PROMPT},
+        {
+            "role": "user",
+            "content": f"""
 Original Sections: {original_sections}
 Job Description: {job_description}
 Protected Experience Info (DO NOT CHANGE): {experience_locks}
 """
-            }
-        ]
+        }
+    ]
+
+
+def rewrite_context(sections, job_description, experience_locks) -> dict:
+    """
+    What a repair call needs to redo one section of a TAILOR / IMPROVE
+    response (see app/llm/repair.py).
+    """
+    return {
+        "shared": f"Job Description: {job_description}\nProtected Experience Info (DO NOT CHANGE): {experience_locks}",
+        "summary": sections.get("summary"),
+        "experience": sections.get("experience"),
+        "skills": sections.get("skills"),
+    }
+
+
+@llm_cached("tailor", TAILOR_MODEL, TAILOR_PROMPT)
+def tailor_resume(original_sections, job_description, experience_locks):
+    response = chat(
+        "TAILOR",
+        TAILOR_MODEL,
+        messages=build_tailor_messages(original_sections, job_description, experience_locks)
+    )
+
+    return validate(
+        "TAILOR",
+        RewrittenResume,
+        response.choices[0].message.content,
+        rewrite_context(original_sections, job_description, experience_locks)
+    )
+
+
+@llm_cached("tailor", TAILOR_MODEL, TAILOR_PROMPT, ignore=("on_token", "on_field"))
+async def atailor_resume(original_sections, job_description, experience_locks, on_token=None, on_field=None):
+    """
+    Async tailoring. With `on_token` / `on_field` the completion is streamed
+    (see astream_json): summary text as it arrives, sections as they close.
+    """
+    messages = build_tailor_messages(original_sections, job_description, experience_locks)
+
+    if on_token is None and on_field is None:
+        response = await achat(
+            "TAILOR",
+            TAILOR_MODEL,
+            messages=messages
+        )
+        text = response.choices[0].message.content
+    else:
+        text = await astream_json("TAILOR", TAILOR_MODEL, messages, on_token=on_token, on_field=on_field)
+
+    return await avalidate(
+        "TAILOR",
+        RewrittenResume,
+        text,
+        rewrite_context(original_sections, job_description, experience_locks)
+    )
+
+
+# n and temperature are arguments, so they are part of the cache key
+@llm_cached("tailor_candidates", TAILOR_MODEL, TAILOR_PROMPT)
+async def atailor_candidates(original_sections, job_description, experience_locks,
+                             n=TAILOR_CANDIDATES, temperature=CANDIDATE_TEMPERATURE):
+    """
+    `n` tailored variants from a single completion with n > 1: the prompt
+    is sent (and billed) once and the variants come back together.
+    Invalid variants are dropped rather than repaired; the others suffice.
+    """
+    response = await achat(
+        "TAILOR",
+        TAILOR_MODEL,
+        messages=build_tailor_messages(original_sections, job_description, experience_locks),
+        n=n,
+        temperature=temperature,
     )
 
-    return eval(response.choices[0].message.content)
\ No newline at end of file
+    candidates = []
+    for choice in response.choices:
+        try:
+            parsed = parse_json(choice.message.content)
+            candidates.append(RewrittenResume.model_validate(parsed).model_dump())
+        except (ValueError, ValidationError) as e:
+            log.warning("Dropping tailoring candidate %s: %s", choice.index, e)
+
+    if not candidates:
+        raise ValueError("No parseable tailoring candidate")
+    return candidates
+
+
+# -------------------------------------------------------
+# STREAMING HELPERS
+# -------------------------------------------------------
+
+SUMMARY_PATH = ("summary",)
+
+
+async def astream_json(label, model, messages, on_token=None, on_field=None, **kwargs):
+    """
+    Stream a JSON completion through the incremental parser and return the
+    full text (callers validate it). `on_token` receives the decoded
+    "summary" text as it arrives; `on_field(path, value)` gets each
+    top-level field and each experience entry / skills category as soon as
+    it is complete.
+    """
+    parser = JSONStreamParser(watch=(SUMMARY_PATH,))
+    parts = []
+    async for chunk in achat_stream(label, model, messages=messages, **kwargs):
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content or ""
+        parts.append(delta)
+        if parser is None:
+            continue
+        try:
+            fields = parser.feed(delta)
+        except ValueError:
+            # Malformed output: stop reporting progress, validation repairs it
+            parser = None
+            continue
+        if on_token:
+            text = parser.take_text(SUMMARY_PATH)
+            if text:
+                on_token(text)
+        if on_field:
+            for path, value in fields:
+                on_field(path, value)
+    return "".join(parts)
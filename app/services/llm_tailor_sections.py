@@ -0,0 +1,177 @@
+import asyncio
+import json
+
+from app.llm.client import achat
+from app.llm.cache import llm_cached
+from app.llm.repair import avalidate
+from app.llm.schemas import BulletsOutput, SkillsOutput, SummaryOutput
+from app.services.llm_optimizer import TAILOR_MODEL, astream_json
+
+# -------------------------------------------------------
+# PARALLEL (PER-SECTION) TAILORING
+# -------------------------------------------------------
+# Splits the single TAILOR call into one call for the summary, one per
+# experience entry and one for skills, run concurrently. Wall time is the
+# slowest section rather than the whole resume's output tokens, and the
+# merged result has the same {"summary", "experience", "skills"} shape.
+
+BULLET_TARGETS = [7, 6, 4]
+
+TIME_PERIOD_RULES = """
+==============================
+TIME-PERIOD ACCURACY (CRITICAL)
+==============================
+1. Read the time period from the "dates" field.
+2. Only mention technologies, tools, frameworks, platforms, cloud services,
+   AI models and libraries that realistically existed AND were publicly
+   available during that time range.
+3. Forbidden examples:
+   - No "GPT-4" before 2023
+   - No "GPT-3" before 2020
+   - No "Azure OpenAI" before 2021
+   - No "Vertex AI" before 2021
+   - No "LangChain" before 2023
+   - No "Bedrock" before 2023
+   - No "Transformers library" before 2018
+   - No "Serverless Lambda" before 2015
+4. If the job description demands a tool that did not exist yet, DO NOT add
+   it; use a historically realistic equivalent instead.
+5. Everything must stay truthful and plausible.
+"""
+
+TAILOR_SUMMARY_PROMPT = """
+You are a resume tailoring expert. Rewrite ONLY the professional summary so it
+targets the job description.
+
+RULES:
+- Strictly less than 800 characters.
+- Truthful to the candidate's experience and skills provided as context.
+- One paragraph.
+
+Return ONLY valid JSON: {"summary": "<string>"}
+"""
+
+TAILOR_EXPERIENCE_PROMPT = """
+You are a resume tailoring expert with strict historical accuracy. Rewrite the
+bullet points of ONE experience entry so they target the job description.
+
+RULES:
+- Rewrite bullets ONLY. Title, company, location and dates are fixed.
+- Return EXACTLY the requested number of bullets.
+- No leading bullet characters.
+""" + TIME_PERIOD_RULES + """
+Return ONLY valid JSON: {"bullets": ["string", ...]}
+"""
+
+TAILOR_SKILLS_PROMPT = """
+You are a resume tailoring expert. Rewrite the SKILLS section to match the job
+description.
+
+RULES:
+- Only include skills the candidate plausibly has given their experience.
+- Keys = category names, values = lists of strings.
+
+Return ONLY valid JSON:
+{"skills": {"Technical Skills": [...], "AI/ML Skills": [...], "Tools": [...]}}
+"""
+
+
+def target_bullets(index: int, job: dict) -> int:
+    if index < len(BULLET_TARGETS):
+        return BULLET_TARGETS[index]
+    return max(1, len(job.get("bullets") or job.get("responsibilities") or []))
+
+
+def role_outline(experience: list) -> list:
+    return [
+        {"title": j.get("title", ""), "company": j.get("company", ""), "dates": j.get("dates", "")}
+        for j in experience
+    ]
+
+
+def json_messages(system_prompt: str, content: str) -> list:
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": content},
+    ]
+
+
+# -------------------------------------------------------
+# SECTION CALLS
+# -------------------------------------------------------
+
+@llm_cached("tailor_summary", TAILOR_MODEL, TAILOR_SUMMARY_PROMPT, ignore=("on_token",))
+async def atailor_summary(summary, experience, skills, job_description, on_token=None):
+    messages = json_messages(TAILOR_SUMMARY_PROMPT, f"""
+Original Summary: {json.dumps(summary)}
+Roles: {json.dumps(role_outline(experience))}
+Skills: {json.dumps(skills)}
+Job Description: {job_description}
+""")
+
+    if on_token is None:
+        resp = await achat("TAILOR", TAILOR_MODEL, messages=messages, response_format={"type": "json_object"})
+        text = resp.choices[0].message.content
+    else:
+        text = await astream_json("TAILOR", TAILOR_MODEL, messages, on_token=on_token, response_format={"type": "json_object"})
+    parsed = await avalidate("TAILOR", SummaryOutput, text, {"shared": f"Job Description: {job_description}", "summary": summary})
+    return parsed["summary"]
+
+
+@llm_cached("tailor_experience", TAILOR_MODEL, TAILOR_EXPERIENCE_PROMPT)
+async def atailor_experience(job, bullet_count, job_description):
+    messages = json_messages(TAILOR_EXPERIENCE_PROMPT, f"""
+Experience Entry: {json.dumps(job)}
+Bullet Count: {bullet_count}
+Job Description: {job_description}
+""")
+    resp = await achat("TAILOR", TAILOR_MODEL, messages=messages, response_format={"type": "json_object"})
+    parsed = await avalidate(
+        "TAILOR",
+        BulletsOutput,
+        resp.choices[0].message.content,
+        {"shared": f"Job Description: {job_description}\nBullet Count: {bullet_count}", "bullets": job.get("bullets") or job.get("responsibilities")}
+    )
+    return parsed["bullets"]
+
+
+@llm_cached("tailor_skills", TAILOR_MODEL, TAILOR_SKILLS_PROMPT)
+async def atailor_skills(skills, experience, job_description):
+    messages = json_messages(TAILOR_SKILLS_PROMPT, f"""
+Original Skills: {json.dumps(skills)}
+Roles: {json.dumps(role_outline(experience))}
+Job Description: {job_description}
+""")
+    resp = await achat("TAILOR", TAILOR_MODEL, messages=messages, response_format={"type": "json_object"})
+    parsed = await avalidate("TAILOR", SkillsOutput, resp.choices[0].message.content, {"shared": f"Job Description: {job_description}", "skills": skills})
+    return parsed["skills"]
+
+
+# -------------------------------------------------------
+# FAN-OUT / MERGE
+# -------------------------------------------------------
+
+async def atailor_resume_parallel(original_sections, job_description, experience_locks, on_token=None):
+    """
+    Drop-in replacement for atailor_resume. Protected experience fields are
+    copied from the original entries rather than trusted to the model.
+    """
+    experience = original_sections.get("experience") or []
+
+    summary, skills, *bullet_lists = await asyncio.gather(
+        atailor_summary(original_sections.get("summary", ""), experience, original_sections.get("skills"), job_description, on_token=on_token),
+        atailor_skills(original_sections.get("skills"), experience, job_description),
+        *(atailor_experience(job, target_bullets(i, job), job_description) for i, job in enumerate(experience)),
+    )
+
+    tailored_experience = []
+    for i, (job, bullets) in enumerate(zip(experience, bullet_lists)):
+        tailored_experience.append({
+            "company": job.get("company", ""),
+            "title": job.get("title", ""),
+            "location": job.get("location", ""),
+            "dates": job.get("dates", ""),
+            "bullets": bullets[:target_bullets(i, job)],
+        })
+
+    return {"summary": summary, "experience": tailored_experience, "skills": skills}
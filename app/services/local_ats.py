@@ -0,0 +1,242 @@
+import math
+import re
+from collections import Counter
+
+# -------------------------------------------------------
+# LOCAL ATS SCORER
+# -------------------------------------------------------
+# Deterministic, in-process stand-in for the gpt-4.1-mini ATS call.
+# Keywords and bigram phrases are pulled from the JD into a sparse
+# weighted vector (sublinear TF), then matched against each resume
+# section with BM25-style term saturation and per-section weights.
+# Returns the same {"score", "analysis"} shape as llm_ats.ats_score.
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+
+STOPWORDS = set("""
+a about above across after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each either etc every few for from
+further had has have having he her here hers herself him himself his how i if in into is it its itself
+just least less like may me might more most must my myself no nor not now of off on once only or other
+our ours ourselves out over own per same shall she should so some such than that the their theirs them
+themselves then there these they this those through to too under until up upon us very via was we were
+what when where whether which while who whom why will with within without would yet you your yours
+yourself yourselves
+ability able across candidate candidates company environment experience experienced including ideal
+job knowledge looking plus preferred position professional related required requirements responsibilities
+responsible role skills strong team teams understanding using work working world year years new best
+highly excellent good great demonstrated proven solid familiarity familiar similar well etc e.g i.e
+benefits offer offers salary compensation bonus equity insurance dental vision pto 401k employer employment
+equal opportunity race religion gender disability veteran status applicants apply join mission culture
+""".split())
+
+SECTION_WEIGHTS = {
+    "skills": 1.0,
+    "experience": 0.9,
+    "summary": 0.7,
+    "education": 0.5,
+}
+
+# BM25 parameters
+K1 = 1.2
+B = 0.5
+
+MAX_KEYWORDS = 40
+MAX_MISSING = 15
+BIGRAM_BOOST = 1.5
+MENTION_CREDIT = 0.6
+
+# Maps raw coverage (0-1) onto the 0-100 band the LLM scorer tends to use,
+# so ATS_THRESHOLD means roughly the same thing in both modes.
+CALIBRATION_EXPONENT = 0.6
+
+
+def stem(token: str) -> str:
+    """
+    Very light suffix stripping, applied identically to JD and resume so
+    "deployed"/"deploys"/"deploying" all meet at "deploy".
+    """
+    if not token.isalpha():
+        return token
+    if len(token) > 4 and token.endswith("ies"):
+        token = token[:-3] + "y"
+    elif len(token) > 4 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        token = token[:-1]
+    if len(token) > 5 and token.endswith("ing"):
+        token = token[:-3]
+    elif len(token) > 4 and token.endswith("ed"):
+        token = token[:-2]
+    if len(token) > 4 and token.endswith("e"):
+        token = token[:-1]
+    return token
+
+
+STOP_STEMS = STOPWORDS | {stem(w) for w in STOPWORDS}
+
+
+def tokenize(text: str) -> list:
+    return [stem(t) for t in TOKEN_RE.findall(text.lower())]
+
+
+def is_content(token: str) -> bool:
+    return (
+        token not in STOP_STEMS
+        and len(token) > 1
+        and any(ch.isalpha() for ch in token)
+    )
+
+
+def terms(tokens: list) -> Counter:
+    """
+    Sparse term vector of content unigrams and adjacent content bigrams.
+    """
+    counts = Counter()
+    prev = None
+    for tok in tokens:
+        if not is_content(tok):
+            prev = None
+            continue
+        counts[tok] += 1
+        if prev:
+            counts[f"{prev} {tok}"] += 1
+        prev = tok
+    return counts
+
+
+def extract_keywords(jd: str, limit: int = MAX_KEYWORDS) -> dict:
+    """
+    Returns {term: weight} for the most salient JD terms.
+    """
+    counts = terms(tokenize(jd))
+    weights = {}
+    for term, tf in counts.items():
+        is_bigram = " " in term
+        # A bigram seen once is usually noise, not a phrase
+        if is_bigram and tf < 2:
+            continue
+        weight = 1.0 + math.log(tf)
+        if is_bigram:
+            weight *= BIGRAM_BOOST
+        weights[term] = weight
+
+    top = sorted(weights.items(), key=lambda kv: (-kv[1], kv[0]))[:limit]
+    return dict(top)
+
+
+def section_texts(sections: dict) -> dict:
+    experience = []
+    for job in sections.get("experience") or []:
+        experience.append(job.get("title", ""))
+        experience.extend(job.get("bullets") or job.get("responsibilities") or [])
+
+    skills = sections.get("skills") or {}
+    if isinstance(skills, dict):
+        skills_text = " . ".join(
+            f"{category} . " + " . ".join(values or []) for category, values in skills.items()
+        )
+    else:
+        skills_text = " . ".join(skills)
+
+    education = " . ".join(
+        f"{e.get('degree', '')} {e.get('institution', '')}" for e in sections.get("education") or []
+    )
+
+    return {
+        "summary": sections.get("summary") or "",
+        "experience": " . ".join(experience),
+        "skills": skills_text,
+        "education": education,
+    }
+
+
+def bm25_saturation(tf: int, length: int, avg_length: float) -> float:
+    """
+    BM25 term-frequency component scaled to 0-1.
+    """
+    if tf == 0:
+        return 0.0
+    norm = K1 * (1 - B + B * length / max(avg_length, 1.0))
+    return tf * (K1 + 1) / (tf + norm) / (K1 + 1)
+
+
+def keyword_coverage(keywords: dict, sections: dict) -> tuple:
+    """
+    Returns ({term: coverage 0-1}, {section: coverage 0-1}).
+    """
+    vectors = {}
+    lengths = {}
+    for name, text in section_texts(sections).items():
+        tokens = tokenize(text)
+        vectors[name] = terms(tokens)
+        lengths[name] = len(tokens)
+
+    avg_length = sum(lengths.values()) / max(len(lengths), 1)
+    total_weight = sum(keywords.values()) or 1.0
+
+    per_term = {}
+    per_section = {name: 0.0 for name in vectors}
+    for term, weight in keywords.items():
+        best = 0.0
+        for name, vector in vectors.items():
+            sat = bm25_saturation(vector[term], lengths[name], avg_length)
+            per_section[name] += weight * sat / total_weight
+            best = max(best, SECTION_WEIGHTS.get(name, 0.5) * sat)
+        # Any mention earns most of the credit; repeats and stronger
+        # sections top it up
+        per_term[term] = min(1.0, MENTION_CREDIT + best) if best else 0.0
+
+    return per_term, per_section
+
+
+def surface_form(term: str, jd: str) -> str:
+    """
+    Recover how the JD actually spelled a (possibly stemmed) term.
+    """
+    pattern = r"\b" + r"\W+".join(re.escape(part) for part in term.split()) + r"\w*"
+    match = re.search(pattern, jd, re.IGNORECASE)
+    return match.group(0) if match else term
+
+
+def local_ats_score(sections: dict, jd: str) -> dict:
+    keywords = extract_keywords(jd)
+    if not keywords:
+        return {
+            "score": 0,
+            "analysis": {
+                "missing_keywords": [],
+                "weak_areas": "Job description has no scorable keywords.",
+                "recommendations": "",
+                "scorer": "local",
+            },
+        }
+
+    per_term, per_section = keyword_coverage(keywords, sections)
+
+    total_weight = sum(keywords.values())
+    coverage = sum(keywords[t] * c for t, c in per_term.items()) / total_weight
+    score = round(100 * coverage ** CALIBRATION_EXPONENT)
+
+    missing = []
+    for term, _ in sorted(keywords.items(), key=lambda kv: (-kv[1], kv[0])):
+        form = surface_form(term, jd)
+        if per_term[term] < 0.5 and form.lower() not in (m.lower() for m in missing):
+            missing.append(form)
+    missing = missing[:MAX_MISSING]
+
+    weakest = sorted(
+        (name for name in ("summary", "experience", "skills")),
+        key=lambda name: per_section[name],
+    )[:2]
+
+    return {
+        "score": max(0, min(100, score)),
+        "analysis": {
+            "missing_keywords": missing,
+            "weak_areas": f"Lowest keyword coverage in: {', '.join(weakest)}.",
+            "recommendations": (
+                "Work the missing keywords into the skills list and the most relevant "
+                "experience bullets where they are truthful."
+            ) if missing else "Keyword coverage is complete.",
+            "scorer": "local",
+        },
+    }
@@ -0,0 +1,441 @@
+import re
+
+# -------------------------------------------------------
+# LOCAL RESUME SECTION PARSER
+# -------------------------------------------------------
+# Deterministic, in-process stand-in for the gpt-4.1-mini EXTRACT call.
+# Most resumes use standard headings, regular date ranges and bullet
+# markers; segmenting on those gives the same schema as EXTRACT_PROMPT in
+# milliseconds. Every section gets a confidence (0-1) so the caller can
+# send only the sections this parser could not read to the LLM
+# (see app/llm/extract_sections.py).
+
+SECTION_HEADINGS = {
+    "summary": (
+        "summary", "professional summary", "career summary", "executive summary", "profile",
+        "professional profile", "about me", "about", "objective", "career objective", "overview",
+    ),
+    "experience": (
+        "experience", "work experience", "professional experience", "relevant experience",
+        "employment", "employment history", "work history", "career history", "professional background",
+    ),
+    "education": (
+        "education", "academic background", "academics", "education and training", "qualifications",
+    ),
+    "skills": (
+        "skills", "technical skills", "core skills", "key skills", "core competencies", "competencies",
+        "technologies", "tools", "tech stack", "skills and tools", "skills & tools", "technical proficiencies",
+    ),
+    "certifications": ("certifications", "certificates", "licenses", "licenses and certifications"),
+    # Recognised so their content does not leak into the sections above
+    "other": (
+        "projects", "personal projects", "selected projects", "publications", "awards", "honors",
+        "volunteer", "volunteering", "volunteer experience", "interests", "hobbies", "languages",
+        "references", "activities", "leadership", "achievements",
+    ),
+}
+HEADING_LOOKUP = {name: section for section, names in SECTION_HEADINGS.items() for name in names}
+
+BULLET_RE = re.compile(r"^\s*(?:[-*•·▪●◦‣–➢➤►✓]|\d{1,2}[.)])\s*")
+
+MONTH = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+YEAR = r"(?:19|20)\d{2}"
+DATE = rf"(?:{MONTH}\s*,?\s*{YEAR}|\d{{1,2}}/{YEAR}|{YEAR})"
+DATE_RANGE_RE = re.compile(
+    rf"\b{DATE}\s*(?:-|–|—|to|until)\s*(?:{DATE}|present|current|now|today)\b",
+    re.IGNORECASE,
+)
+SINGLE_DATE_RE = re.compile(rf"\b{DATE}\b", re.IGNORECASE)
+
+TITLE_WORDS = re.compile(
+    r"\b(engineer|developer|programmer|manager|scientist|analyst|intern|lead|director|consultant|designer"
+    r"|architect|specialist|associate|administrator|officer|researcher|assistant|coordinator|head|vp"
+    r"|president|founder|co-founder|executive|technician|teacher|instructor|professor|fellow|owner"
+    r"|representative|strategist|accountant|editor|writer|advisor|supervisor|principal|staff|sre|devops)\b",
+    re.IGNORECASE,
+)
+LOCATION_WORDS = re.compile(r"^(remote|hybrid|on-?site|onsite)\b", re.IGNORECASE)
+STATE_RE = re.compile(r"^[A-Z]{2}$")
+COUNTRIES = {
+    "usa", "us", "united states", "india", "canada", "uk", "united kingdom", "germany", "france",
+    "australia", "singapore", "netherlands", "ireland", "spain", "italy", "japan", "china", "brazil",
+    "mexico", "israel", "uae", "switzerland", "sweden", "poland",
+}
+# Separators between header fields; commas are handled separately
+FIELD_SPLIT_RE = re.compile(r"\s*(?:\||•|·|—|–|\t| {3,}| - | @ | at )\s*")
+
+DEGREE_RE = re.compile(
+    r"\b(bachelor'?s?|master'?s?|masters|b\.?\s?s\.?c?|m\.?\s?s\.?c?|b\.?\s?a\.?|m\.?\s?b\.?\s?a\.?|b\.?\s?e\.?"
+    r"|m\.?\s?e\.?|b\.?\s?tech|m\.?\s?tech|ph\.?\s?d\.?|doctorate|associate'?s?|diploma|certificate|mba|msc|bsc)\b",
+    re.IGNORECASE,
+)
+INSTITUTION_RE = re.compile(r"\b(university|college|institute|school|academy|polytechnic|iit|mit)\b", re.IGNORECASE)
+
+SKILL_CATEGORIES = ("certifications", "programming", "ml_ai", "libraries_frameworks", "devops", "other")
+CATEGORY_LABELS = (
+    ("certifications", re.compile(r"cert|licen", re.IGNORECASE)),
+    ("ml_ai", re.compile(r"\b(ml|ai|machine learning|deep learning|data science|nlp|llm|genai|artificial)", re.IGNORECASE)),
+    ("libraries_frameworks", re.compile(r"librar|framework|packages", re.IGNORECASE)),
+    ("programming", re.compile(r"language|programming|coding", re.IGNORECASE)),
+    ("devops", re.compile(r"devops|cloud|infra|platform|tools|mlops|deploy|ci/cd|database", re.IGNORECASE)),
+)
+KNOWN_SKILLS = {
+    "programming": {
+        "python", "java", "javascript", "typescript", "c", "c++", "c#", "go", "golang", "rust", "sql", "r",
+        "scala", "kotlin", "swift", "ruby", "php", "bash", "shell", "matlab", "html", "css", "perl", "julia",
+    },
+    "ml_ai": {
+        "machine learning", "deep learning", "nlp", "natural language processing", "computer vision", "llm",
+        "llms", "generative ai", "genai", "reinforcement learning", "rag", "mlops", "statistics",
+        "data science", "neural networks", "prompt engineering", "recommendation systems",
+    },
+    "libraries_frameworks": {
+        "tensorflow", "pytorch", "scikit-learn", "sklearn", "pandas", "numpy", "keras", "react", "angular",
+        "vue", "django", "flask", "fastapi", "spring", "node.js", "nodejs", "langchain", "langgraph",
+        "hugging face", "huggingface", "transformers", "xgboost", "lightgbm", "opencv", "spacy", "matplotlib",
+        "spark", "pyspark", "express", ".net", "next.js",
+    },
+    "devops": {
+        "docker", "kubernetes", "k8s", "aws", "azure", "gcp", "google cloud", "terraform", "jenkins", "git",
+        "github", "gitlab", "ci/cd", "linux", "ansible", "github actions", "airflow", "kafka", "postgresql",
+        "postgres", "mysql", "mongodb", "redis", "snowflake", "databricks", "helm", "prometheus", "grafana",
+    },
+}
+
+SKILL_SPLIT_RE = re.compile(r"\s*(?:,|;|\||•|·|\s/\s)\s*")
+
+SUMMARY_MIN_CHARS = 80
+# Unheaded text before the first heading longer than this is a summary
+UNHEADED_SUMMARY_CHARS = 100
+
+
+# ---------------- segmentation ----------------
+
+def heading_section(line: str):
+    text = BULLET_RE.sub("", line).strip().rstrip(":").strip()
+    if not text or len(text) > 40:
+        return None
+    key = re.sub(r"\s+", " ", text.lower())
+    return HEADING_LOOKUP.get(key)
+
+
+def segment(raw_text: str) -> dict:
+    """
+    {section: [lines]} plus "_preamble" for lines before the first heading.
+    A section name that appears twice has its lines concatenated.
+    """
+    sections = {"_preamble": []}
+    current = "_preamble"
+    for raw in raw_text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        section = heading_section(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+            continue
+        sections[current].append(line)
+    return sections
+
+
+def is_bullet(line: str) -> bool:
+    return bool(BULLET_RE.match(line)) and not DATE_RANGE_RE.match(BULLET_RE.sub("", line))
+
+
+def strip_bullet(line: str) -> str:
+    return BULLET_RE.sub("", line).strip()
+
+
+# ---------------- summary ----------------
+
+def parse_summary(lines: list) -> str:
+    return " ".join(strip_bullet(line) for line in lines).strip()
+
+
+def preamble_summary(lines: list) -> str:
+    """
+    A profile paragraph under the contact block, when there is no heading.
+    """
+    prose = [line for line in lines if len(line) > 60 and not re.search(r"@|https?://|linkedin|\+?\d[\d ()-]{7,}", line)]
+    text = " ".join(prose)
+    return text if len(text) >= UNHEADED_SUMMARY_CHARS else ""
+
+
+# ---------------- experience ----------------
+
+def split_fields(text: str) -> list:
+    """
+    Header text → field candidates, keeping "City, ST" together.
+    """
+    fields = []
+    for part in FIELD_SPLIT_RE.split(text):
+        pieces = [p.strip() for p in part.split(",") if p.strip()]
+        merged = []
+        for piece in pieces:
+            if merged and (STATE_RE.match(piece) or piece.lower() in COUNTRIES):
+                merged[-1] = f"{merged[-1]}, {piece}"
+            else:
+                merged.append(piece)
+        fields.extend(merged)
+    return [f for f in fields if f]
+
+
+def is_location(field: str) -> bool:
+    if LOCATION_WORDS.match(field) or field.lower() in COUNTRIES:
+        return True
+    parts = [p.strip() for p in field.split(",")]
+    return len(parts) == 2 and (STATE_RE.match(parts[1]) or parts[1].lower() in COUNTRIES)
+
+
+def parse_job_header(lines: list):
+    """
+    Returns (job dict, number of fields that competed for the company).
+    """
+    text = " | ".join(lines)
+    match = DATE_RANGE_RE.search(text)
+    dates = match.group(0) if match else ""
+    if match:
+        text = text[:match.start()] + " | " + text[match.end():]
+
+    job = {"title": "", "company": "", "location": "", "dates": dates, "responsibilities": []}
+    unknown = []
+    for field in split_fields(text):
+        field = field.strip(" |()")
+        if not field:
+            continue
+        if not job["location"] and is_location(field):
+            job["location"] = field
+        elif not job["title"] and TITLE_WORDS.search(field):
+            job["title"] = field
+        else:
+            unknown.append(field)
+
+    # Without a recognisable title, "Title, Company" is the common order
+    if not job["title"] and unknown:
+        job["title"] = unknown.pop(0)
+    candidates = len(unknown)
+    if unknown:
+        job["company"] = unknown.pop(0)
+    return job, candidates
+
+
+# Header lines are short; longer unbulleted lines are prose
+MAX_HEADER_CHARS = 100
+
+
+def header_ahead(lines: list, start: int) -> bool:
+    """
+    Whether the short, non-bullet lines from `start` up to the next bullet
+    carry a date range, i.e. start a new job rather than continue the last.
+    """
+    for line in lines[start:start + 3]:
+        if is_bullet(line) or len(line) > MAX_HEADER_CHARS:
+            return False
+        if DATE_RANGE_RE.search(line):
+            return True
+    return False
+
+
+def parse_experience(lines: list):
+    """
+    Returns (jobs, [company candidates per job]).
+    """
+    jobs = []
+    candidates = []
+    header = []
+
+    def flush():
+        job, count = parse_job_header(header)
+        jobs.append(job)
+        candidates.append(count)
+        header.clear()
+
+    for i, line in enumerate(lines):
+        if is_bullet(line):
+            if header or not jobs:
+                flush()
+            jobs[-1]["responsibilities"].append(strip_bullet(line))
+            continue
+
+        if header:
+            dated = DATE_RANGE_RE.search(" ".join(header))
+            if dated and (DATE_RANGE_RE.search(line) or header_ahead(lines, i)):
+                # Two dated headers in a row: the first job has no bullets
+                flush()
+                header.append(line)
+            elif dated and len(line) > MAX_HEADER_CHARS:
+                # Unbulleted resume: prose right under the header
+                flush()
+                jobs[-1]["responsibilities"].append(line)
+            else:
+                header.append(line)
+        elif not jobs:
+            header.append(line)
+        elif jobs[-1]["responsibilities"] and line[:1].islower():
+            # Wrapped bullet, even right above the next job's header
+            jobs[-1]["responsibilities"][-1] += " " + line
+        elif header_ahead(lines, i):
+            header.append(line)
+        else:
+            jobs[-1]["responsibilities"].append(line)
+
+    if header:
+        flush()
+    return jobs, candidates
+
+
+# Penalty when the header had several unplaced fields and the company was
+# a guess among them
+AMBIGUOUS_HEADER_PENALTY = 0.3
+
+
+def job_confidence(job: dict, candidates: int = 1) -> float:
+    score = 0.0
+    score += 0.4 if job["dates"] else 0.0
+    score += 0.15 if job["title"] and TITLE_WORDS.search(job["title"]) else 0.05 if job["title"] else 0.0
+    score += 0.15 if job["company"] else 0.0
+    score += 0.3 if job["responsibilities"] else 0.0
+    if candidates > 1:
+        score -= AMBIGUOUS_HEADER_PENALTY
+    return max(score, 0.0)
+
+
+# ---------------- education ----------------
+
+def parse_education(lines: list) -> list:
+    entries = []
+    entry = None
+
+    def new_entry():
+        entries.append({"degree": "", "institution": "", "location": "", "dates": ""})
+        return entries[-1]
+
+    for line in lines:
+        text = strip_bullet(line)
+        match = DATE_RANGE_RE.search(text) or SINGLE_DATE_RE.search(text)
+        dates = match.group(0) if match else ""
+        if match:
+            text = (text[:match.start()] + " | " + text[match.end():]).strip(" |")
+
+        for field in split_fields(text):
+            field = field.strip(" |()")
+            if not field:
+                continue
+            if is_location(field):
+                key = "location"
+            elif INSTITUTION_RE.search(field):
+                key = "institution"
+            elif DEGREE_RE.search(field):
+                key = "degree"
+            else:
+                # GPA, honours, coursework
+                continue
+            if entry is None or entry[key]:
+                entry = new_entry()
+            entry[key] = field
+
+        if dates:
+            if entry is None or entry["dates"]:
+                entry = new_entry()
+            entry["dates"] = dates
+    return entries
+
+
+# ---------------- skills ----------------
+
+def label_category(label: str):
+    for category, pattern in CATEGORY_LABELS:
+        if pattern.search(label):
+            return category
+    return None
+
+
+def item_category(item: str) -> str:
+    key = item.lower()
+    for category, known in KNOWN_SKILLS.items():
+        if key in known:
+            return category
+    return "other"
+
+
+def parse_skills(lines: list, certification_lines: list) -> dict:
+    skills = {category: [] for category in SKILL_CATEGORIES}
+
+    def add(category, item):
+        item = item.strip(" .")
+        if item and item not in skills[category]:
+            skills[category].append(item)
+
+    for line in lines:
+        text = strip_bullet(line)
+        label, sep, rest = text.partition(":")
+        category = label_category(label) if sep and len(label) <= 40 else None
+        items = SKILL_SPLIT_RE.split(rest if sep and len(label) <= 40 else text)
+        for item in items:
+            # A known skill goes to its own bucket even under a broad label
+            known = item_category(item)
+            add(known if known != "other" or category is None else category, item)
+
+    for line in certification_lines:
+        add("certifications", strip_bullet(line))
+    return skills
+
+
+# ---------------- entry point ----------------
+
+def section_confidence(name: str, value, present: bool, raw_text: str, candidates: list = None) -> float:
+    if name == "summary":
+        if not present:
+            # Either a profile paragraph under the contact block, or
+            # genuinely no summary ("" is what EXTRACT returns then)
+            return 0.8 if value else 1.0
+        return 1.0 if len(value) >= SUMMARY_MIN_CHARS else 0.5 if value else 0.0
+    if name == "experience":
+        if not value:
+            return 0.0
+        candidates = candidates or [1] * len(value)
+        return sum(job_confidence(job, count) for job, count in zip(value, candidates)) / len(value)
+    if name == "education":
+        if not present:
+            # Nothing to parse unless the text clearly mentions a degree
+            return 0.0 if DEGREE_RE.search(raw_text) and INSTITUTION_RE.search(raw_text) else 1.0
+        if not value:
+            return 0.0
+        complete = sum(bool(e["degree"] or e["institution"]) and bool(e["dates"] or e["institution"]) for e in value)
+        return complete / len(value)
+    if name == "skills":
+        count = sum(len(v) for v in value.values())
+        return 1.0 if count >= 3 else 0.6 if count else 0.0
+    return 0.0
+
+
+def local_extract_sections(raw_text: str) -> dict:
+    """
+    Returns {"sections": <EXTRACT schema>, "confidence": {section: 0-1},
+    "lines": {section: [raw lines]}} — the lines let a fallback re-read
+    just one section.
+    """
+    segments = segment(raw_text)
+
+    summary = parse_summary(segments.get("summary", [])) or preamble_summary(segments["_preamble"])
+    experience, candidates = parse_experience(segments.get("experience", []))
+    sections = {
+        "summary": summary,
+        "experience": experience,
+        "education": parse_education(segments.get("education", [])),
+        "skills": parse_skills(segments.get("skills", []), segments.get("certifications", [])),
+    }
+    confidence = {
+        name: round(section_confidence(
+            name, value, name in segments, raw_text, candidates if name == "experience" else None
+        ), 2)
+        for name, value in sections.items()
+    }
+    lines = {name: segments[name] for name in sections if segments.get(name)}
+    if segments.get("certifications"):
+        lines["skills"] = lines.get("skills", []) + segments["certifications"]
+    return {"sections": sections, "confidence": confidence, "lines": lines}
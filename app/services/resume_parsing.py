@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+import logging
+import os
+from datetime import datetime, timedelta
+
+from app.db.database import SessionLocal
+from app.llm.extract_sections import aextract_resume_sections
+from app.llm.usage import usage_scope
+from app.services.resume_service import (
+    claim_stale_parse,
+    get_parse_state,
+    get_raw_text,
+    mark_parse_failed,
+    save_parsed_sections,
+    touch_parse,
+)
+
+log = logging.getLogger("resume_parsing")
+
+# -------------------------------------------------------
+# BACKGROUND SECTION PARSING (phase 2 of /resume/upload)
+# -------------------------------------------------------
+# The upload request stores the raw text and returns; sections are parsed
+# in a task on the same event loop. Waiters in this process get an event;
+# other processes poll the resumes row. The parsing process bumps
+# parse_heartbeat_at; a pending resume whose heartbeat is older than
+# PARSE_STALE_SECONDS (its process died) is claimed by exactly one other.
+
+PARSE_POLL_SECONDS = float(os.getenv("PARSE_POLL_SECONDS", "0.5"))
+PARSE_HEARTBEAT_SECONDS = float(os.getenv("PARSE_HEARTBEAT_SECONDS", "15"))
+PARSE_STALE_SECONDS = float(os.getenv("PARSE_STALE_SECONDS", "60"))
+
+_tasks = {}    # resume_id -> asyncio.Task
+_done = {}     # resume_id -> asyncio.Event
+
+
+def with_session(fn, *args):
+    # Own session: the request that started the parse has returned
+    db = SessionLocal()
+    try:
+        return fn(db, *args)
+    finally:
+        db.close()
+
+
+async def parse_resume(resume_id: str, user_id: str, raw_text: str):
+    async def keep_alive():
+        while True:
+            await asyncio.sleep(PARSE_HEARTBEAT_SECONDS)
+            with contextlib.suppress(Exception):
+                await asyncio.to_thread(with_session, touch_parse, resume_id)
+
+    pinger = asyncio.create_task(keep_alive())
+    try:
+        with usage_scope(user_id=user_id):
+            sections = await aextract_resume_sections(raw_text)
+        await asyncio.to_thread(with_session, save_parsed_sections, resume_id, sections)
+        log.info("Resume %s parsed", resume_id)
+    except asyncio.CancelledError:
+        # Shutdown: left pending, taken over later
+        raise
+    except Exception as e:
+        log.exception("Parsing resume %s failed", resume_id)
+        with contextlib.suppress(Exception):
+            await asyncio.to_thread(with_session, mark_parse_failed, resume_id, str(e) or type(e).__name__)
+    finally:
+        pinger.cancel()
+        _tasks.pop(resume_id, None)
+        event = _done.pop(resume_id, None)
+        if event is not None:
+            event.set()
+
+
+def start_parse(resume_id: str, user_id: str, raw_text: str):
+    if resume_id in _tasks:
+        return
+    _done[resume_id] = asyncio.Event()
+    _tasks[resume_id] = asyncio.create_task(parse_resume(resume_id, user_id, raw_text))
+
+
+async def parse_state(resume_id: str):
+    """
+    Current {"status", "error", ...} of a resume (None if unknown),
+    restarting the parse of a stale pending upload.
+    """
+    state = await asyncio.to_thread(with_session, get_parse_state, resume_id)
+    if state is None or state["status"] != "pending" or resume_id in _tasks:
+        return state
+
+    beat = state["heartbeat_at"]
+    if beat is not None and datetime.utcnow() - beat < timedelta(seconds=PARSE_STALE_SECONDS):
+        return state
+    # Looks abandoned; the claim decides which caller restarts it
+    if await asyncio.to_thread(with_session, claim_stale_parse, resume_id, PARSE_STALE_SECONDS):
+        raw_text = await asyncio.to_thread(with_session, get_raw_text, resume_id)
+        log.warning("Resume %s stuck pending; parsing it here", resume_id)
+        start_parse(resume_id, state["user_id"], raw_text or "")
+    return state
+
+
+async def wait_parsed(resume_id: str, timeout: float):
+    """
+    Wait up to `timeout` seconds for parsing to finish; returns the final
+    (or still pending) state.
+    """
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        event = _done.get(resume_id)
+        if event is not None:
+            # Parsing in this process: no need to poll
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(event.wait(), max(0.0, deadline - asyncio.get_running_loop().time()))
+
+        state = await parse_state(resume_id)
+        left = deadline - asyncio.get_running_loop().time()
+        if state is None or state["status"] != "pending" or left <= 0:
+            return state
+        if resume_id not in _done:
+            await asyncio.sleep(min(PARSE_POLL_SECONDS, left))
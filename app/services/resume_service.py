@@ -1,23 +1,56 @@
+from datetime import datetime, timedelta
+
 from sqlalchemy.orm import Session
 from app.db import models
 
+
+def find_parsed_upload(db: Session, content_hash: str):
+    """
+    (raw_text, sections) from an earlier upload of the same bytes, or None.
+    """
+    row = (
+        db.query(models.Resume, models.ResumeSections)
+        .join(models.ResumeSections, models.ResumeSections.resume_id == models.Resume.id)
+        .filter(models.Resume.content_hash == content_hash)
+        .order_by(models.Resume.created_at.desc())
+        .first()
+    )
+    if row is None:
+        return None
+    resume, sections = row
+    return resume.raw_text, {
+        "summary": sections.summary,
+        "experience": sections.experience,
+        "education": sections.education,
+        "skills": sections.skills,
+    }
+
+
 def save_resume(
     db: Session,
     user_id: str,
     filename: str,
     raw_text: str,
-    sections: dict,
     phone: str,
     full_name: str,
     email: str,
     linkedin: str,
     github: str,
+    content_hash: str = None,
+    sections: dict = None,
 ):
+    """
+    Save an upload. Without `sections` the resume is stored as pending and
+    save_parsed_sections() completes it once parsing finishes.
+    """
     # 1. Save Resume
     resume = models.Resume(
         user_id=user_id,
         filename=filename,
         raw_text=raw_text,
+        content_hash=content_hash,
+        parse_status="parsed" if sections is not None else "pending",
+        parse_heartbeat_at=None if sections is not None else datetime.utcnow(),
         phone = phone,
         full_name=full_name,
         email=email,
@@ -29,14 +62,99 @@ def save_resume(
     db.refresh(resume)
 
     # 2. Save Sections
-    resume_sections = models.ResumeSections(
-        resume_id=resume.id,
+    if sections is not None:
+        add_sections(db, resume.id, sections)
+        db.commit()
+
+    return resume.id
+
+
+def add_sections(db: Session, resume_id: str, sections: dict):
+    db.add(models.ResumeSections(
+        resume_id=resume_id,
         summary=sections.get("summary"),
         experience=sections.get("experience"),
         education=sections.get("education"),
         skills=sections.get("skills")
+    ))
+
+
+def locked_resume(db: Session, resume_id: str):
+    # Row lock: two parses of one upload must not both add sections
+    return db.query(models.Resume).filter_by(id=resume_id).with_for_update().first()
+
+
+def save_parsed_sections(db: Session, resume_id: str, sections: dict):
+    resume = locked_resume(db, resume_id)
+    if resume is None or resume.parse_status == "parsed":
+        # Deleted meanwhile, or a second parse of a stale upload lost the race
+        return
+    add_sections(db, resume_id, sections)
+    resume.parse_status = "parsed"
+    resume.parse_error = None
+    db.commit()
+
+
+def mark_parse_failed(db: Session, resume_id: str, error: str):
+    resume = locked_resume(db, resume_id)
+    if resume is None or resume.parse_status == "parsed":
+        return
+    resume.parse_status = "failed"
+    resume.parse_error = error
+    db.commit()
+
+
+def get_parse_state(db: Session, resume_id: str):
+    """
+    {"status", "error", "user_id", "heartbeat_at"} or None.
+    """
+    resume = db.get(models.Resume, resume_id)
+    if resume is None:
+        return None
+    return {
+        "status": resume.parse_status or "parsed",
+        "error": resume.parse_error,
+        "user_id": resume.user_id,
+        "heartbeat_at": resume.parse_heartbeat_at,
+    }
+
+
+def touch_parse(db: Session, resume_id: str):
+    db.query(models.Resume).filter_by(id=resume_id, parse_status="pending").update(
+        {"parse_heartbeat_at": datetime.utcnow()}, synchronize_session=False
     )
-    db.add(resume_sections)
     db.commit()
 
-    return resume.id
\ No newline at end of file
+
+def claim_stale_parse(db: Session, resume_id: str, stale_seconds: float) -> bool:
+    """
+    Atomically take over a pending parse whose heartbeat stopped. Only one
+    caller gets True.
+    """
+    now = datetime.utcnow()
+    Resume = models.Resume
+    claimed = (
+        db.query(Resume)
+        .filter(Resume.id == resume_id, Resume.parse_status == "pending")
+        .filter((Resume.parse_heartbeat_at.is_(None)) | (Resume.parse_heartbeat_at < now - timedelta(seconds=stale_seconds)))
+        .update({"parse_heartbeat_at": now}, synchronize_session=False)
+    )
+    db.commit()
+    return claimed == 1
+
+
+def get_raw_text(db: Session, resume_id: str):
+    resume = db.get(models.Resume, resume_id)
+    return resume.raw_text if resume is not None else None
+
+
+def get_resume_sections(db: Session, resume_id: str):
+    sections = db.query(models.ResumeSections).filter_by(resume_id=resume_id).first()
+    if sections is None:
+        return None
+    return {
+        "summary": sections.summary,
+        "experience": sections.experience,
+        "education": sections.education,
+        "skills": sections.skills,
+    }
\ No newline at end of file
@@ -1,24 +1,32 @@
-import pdfplumber
+import io
+
 import docx
 
-def extract_text_from_pdf(file_path: str) -> str:
-    text = ""
-    with pdfplumber.open(file_path) as pdf:
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-    return text
+from app.utils.metrics import timed
+from app.utils.pdf_extract import extract_pdf_text
+
+
+def extract_text_from_pdf(source) -> str:
+    # Process pool, text-layer fast path, pdfplumber for poor pages
+    return extract_pdf_text(source)
 
 
-def extract_text_from_docx(file_path: str) -> str:
-    doc = docx.Document(file_path)
+def extract_text_from_docx(source) -> str:
+    doc = docx.Document(io.BytesIO(source) if isinstance(source, bytes) else source)
     text = "\n".join([para.text for para in doc.paragraphs])
     return text
 
 
-def extract_text(file_path: str, filename: str) -> str:
-    if filename.endswith(".pdf"):
-        return extract_text_from_pdf(file_path)
-    elif filename.endswith(".docx"):
-        return extract_text_from_docx(file_path)
+@timed("extract_text")
+def extract_text(source, kind: str) -> str:
+    """
+    `source` is what app.utils.upload.extraction_source returns: the
+    file's bytes for PDF, the open binary file object for DOCX (a path or
+    bytes work for either). `kind` comes from app.utils.upload.sniff_kind.
+    """
+    if kind == "pdf":
+        return extract_text_from_pdf(source)
+    elif kind == "docx":
+        return extract_text_from_docx(source)
     else:
         raise ValueError("Unsupported file format. Upload PDF or DOCX only.")
\ No newline at end of file
@@ -0,0 +1,201 @@
+import contextlib
+import functools
+import inspect
+import math
+import threading
+import time
+
+# -------------------------------------------------------
+# IN-PROCESS METRICS (Prometheus text format)
+# -------------------------------------------------------
+# A small registry of counters, gauges and histograms rendered at
+# GET /metrics. Values are per process; with several uvicorn workers,
+# scrape each one (or aggregate with `sum by`).
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+_registry = []
+_collectors = []
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        with _lock:
+            _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self):
+        for key, value in list(self.values.items()):
+            yield self.name, key, (), value
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for name, key, extra, value in self.samples():
+            lines.append(f"{name}{_format_labels(self.labelnames, key, extra)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with _lock:
+            self.values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with _lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["buckets"][i] += 1
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def samples(self):
+        for key, entry in list(self.values.items()):
+            for bound, count in zip(self.buckets, entry["buckets"]):
+                yield f"{self.name}_bucket", key, (f'le="{_format_value(bound)}"',), count
+            yield f"{self.name}_sum", key, (), entry["sum"]
+            yield f"{self.name}_count", key, (), entry["count"]
+
+
+def collector(fn):
+    """
+    Register `fn() -> [(name, kind, documentation, labels, value), ...]`,
+    called at scrape time for state that already lives elsewhere
+    (cache stats, limiter snapshots, queue depth).
+    """
+    with _lock:
+        _collectors.append(fn)
+    return fn
+
+
+def _render_collected(rows) -> list:
+    blocks = {}
+    for name, kind, documentation, labels, value in rows:
+        block = blocks.setdefault(name, [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"])
+        block.append(f"{name}{_format_labels(labels.keys(), labels.values())} {_format_value(value)}")
+    return ["\n".join(block) for block in blocks.values()]
+
+
+def render_metrics() -> str:
+    with _lock:
+        metrics = list(_registry)
+        collectors = list(_collectors)
+
+    parts = [m.render() for m in metrics]
+    for fn in collectors:
+        try:
+            parts.extend(_render_collected(fn()))
+        except Exception as e:
+            parts.append(f"# collector {fn.__name__} failed: {type(e).__name__}")
+    return "\n".join(parts) + "\n"
+
+
+# -------------------------------------------------------
+# SHARED METRICS
+# -------------------------------------------------------
+
+node_duration = Histogram("optimizer_node_duration_seconds", "Optimizer graph node latency", ["node"])
+node_in_flight = Gauge("optimizer_node_in_flight", "Optimizer graph nodes currently running", ["node"])
+node_errors = Counter("optimizer_node_errors_total", "Optimizer graph node failures", ["node", "error"])
+
+llm_duration = Histogram("llm_request_duration_seconds", "OpenAI chat completion latency incl. retries", ["model", "prompt"])
+llm_in_flight = Gauge("llm_requests_in_flight", "OpenAI chat completions in flight", ["model", "prompt"])
+llm_errors = Counter("llm_request_errors_total", "OpenAI chat completions that failed after retries", ["model", "prompt", "error"])
+llm_tokens = Counter("llm_tokens_total", "Tokens reported by OpenAI usage", ["model", "prompt", "kind"])
+
+function_duration = Histogram("function_duration_seconds", "Latency of instrumented blocking functions", ["function"])
+function_in_flight = Gauge("function_in_flight", "Instrumented blocking functions currently running", ["function"])
+function_errors = Counter("function_errors_total", "Instrumented blocking function failures", ["function", "error"])
+
+
+@contextlib.contextmanager
+def track(duration: Histogram, in_flight: Gauge, errors: Counter, **labels):
+    """
+    Time a block, count it as in flight while it runs, and count failures
+    by exception type. Cancellation is not an error.
+    """
+    in_flight.inc(**labels)
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        errors.inc(error=type(e).__name__, **labels)
+        raise
+    finally:
+        in_flight.dec(**labels)
+        duration.observe(time.perf_counter() - started, **labels)
+
+
+def timed(name: str):
+    """
+    Decorator recording function_duration_seconds{function=name}.
+    """
+    def decorator(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with track(function_duration, function_in_flight, function_errors, function=name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with track(function_duration, function_in_flight, function_errors, function=name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
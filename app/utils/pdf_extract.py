@@ -0,0 +1,210 @@
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pdfplumber
+import pypdfium2 as pdfium
+
+log = logging.getLogger("pdf_extract")
+
+# -------------------------------------------------------
+# PDF TEXT EXTRACTION ENGINE
+# -------------------------------------------------------
+# Text comes from the PDF's text layer via pdfium (C, milliseconds per
+# page). Only pages where that text looks wrong (empty, mostly symbols,
+# unmapped glyphs) are redone with pdfplumber's layout analysis, which is
+# pure Python and can take seconds on graphics-heavy pages.
+#
+# All of it runs in a few worker processes, so a heavy PDF neither holds
+# the GIL nor blocks the API's threads, and a runaway page can be killed.
+
+PDF_PROCESSES = int(os.getenv("PDF_PROCESSES", str(min(4, os.cpu_count() or 1))))  # 0 = in-process
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "10"))
+PDF_TIMEOUT_SECONDS = float(os.getenv("PDF_TIMEOUT_SECONDS", "20"))
+
+# Fast-path text below these marks sends the page to pdfplumber
+MIN_PAGE_CHARS = int(os.getenv("PDF_MIN_PAGE_CHARS", "80"))
+MIN_LETTER_FRACTION = 0.5
+MAX_BAD_GLYPH_FRACTION = 0.02
+
+# Recycle worker processes now and then; pdfminer caches grow
+TASKS_PER_PROCESS = 200
+
+
+class PDFExtractionError(ValueError):
+    pass
+
+
+# ---------------- per-page work (runs in worker processes) ----------------
+
+def fast_pages(source, max_pages: int):
+    """
+    (page count, [text of each page up to max_pages]) from the text layer.
+    `source` is a path or the file's bytes.
+    """
+    pdf = pdfium.PdfDocument(source)
+    try:
+        count = len(pdf)
+        texts = []
+        for index in range(min(count, max_pages)):
+            page = pdf[index]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_range())
+            textpage.close()
+            page.close()
+        return count, texts
+    finally:
+        pdf.close()
+
+
+def layout_page(source, index: int) -> str:
+    with pdfplumber.open(io.BytesIO(source) if isinstance(source, bytes) else source, pages=[index + 1]) as pdf:
+        return pdf.pages[0].extract_text() or ""
+
+
+def page_quality_ok(text: str) -> bool:
+    stripped = text.strip()
+    if len(stripped) < MIN_PAGE_CHARS:
+        return False
+    visible = [c for c in stripped if not c.isspace()]
+    letters = sum(c.isalpha() for c in visible)
+    bad = stripped.count("�") + stripped.count("(cid:")
+    return letters / len(visible) >= MIN_LETTER_FRACTION and bad / len(visible) <= MAX_BAD_GLYPH_FRACTION
+
+
+def better(fast: str, layout: str) -> str:
+    # A short page can be short for real; keep whichever read is better
+    if page_quality_ok(layout) or len(layout.strip()) > len(fast.strip()):
+        return layout
+    return fast
+
+
+# ---------------- worker processes ----------------
+# Each worker is its own process with a pipe, checked out by one task at a
+# time. A task past its deadline gets its worker killed and replaced,
+# without touching the extractions other requests have in flight.
+
+_slots = threading.BoundedSemaphore(max(PDF_PROCESSES, 1))
+_idle = []
+_idle_lock = threading.Lock()
+
+
+def worker_loop(conn):
+    while True:
+        try:
+            fn, args = conn.recv()
+        except (EOFError, OSError):
+            return
+        try:
+            conn.send((True, fn(*args)))
+        except Exception as e:
+            # pdfminer/pdfium errors do not all pickle; send the message
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+
+def start_worker() -> dict:
+    # spawn: forking a process that runs threads and an event loop is not safe
+    ctx = multiprocessing.get_context("spawn")
+    parent, child = ctx.Pipe()
+    process = ctx.Process(target=worker_loop, args=(child,), daemon=True)
+    process.start()
+    child.close()
+    return {"process": process, "conn": parent, "tasks": 0}
+
+
+def stop_worker(worker: dict):
+    worker["conn"].close()
+    worker["process"].kill()
+    worker["process"].join()
+
+
+def call_in_worker(fn, args, deadline: float):
+    """
+    fn(*args) in a worker process, failing once `deadline`
+    (time.monotonic) passes.
+    """
+    if not _slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+        raise PDFExtractionError("PDF extraction is busy; try again shortly.")
+    worker = None
+    try:
+        with _idle_lock:
+            worker = _idle.pop() if _idle else None
+        if worker is None or not worker["process"].is_alive():
+            worker = start_worker()
+
+        try:
+            worker["conn"].send((fn, args))
+            if not worker["conn"].poll(max(0.0, deadline - time.monotonic())):
+                raise PDFExtractionError(f"PDF text extraction took longer than {PDF_TIMEOUT_SECONDS:g}s.")
+            ok, value = worker["conn"].recv()
+        except BaseException as e:
+            # Timed out, crashed or interrupted mid-task: only this worker goes
+            stop_worker(worker)
+            worker = None
+            if isinstance(e, (EOFError, OSError)):
+                raise PDFExtractionError("PDF text extraction crashed.")
+            raise
+
+        worker["tasks"] += 1
+        if not ok:
+            raise PDFExtractionError(f"Could not read PDF: {value}")
+        return value
+    finally:
+        if worker is not None:
+            if worker["tasks"] >= TASKS_PER_PROCESS or not worker["process"].is_alive():
+                stop_worker(worker)
+            else:
+                with _idle_lock:
+                    _idle.append(worker)
+        _slots.release()
+
+
+def call_inline(fn, args):
+    try:
+        return fn(*args)
+    except Exception as e:
+        raise PDFExtractionError(f"Could not read PDF: {type(e).__name__}: {e}")
+
+
+def run_tasks(calls: list, deadline: float) -> list:
+    """
+    Run [(fn, args), ...] concurrently and return their results, in
+    worker processes when PDF_PROCESSES > 0.
+    """
+    if PDF_PROCESSES <= 0:
+        return [call_inline(fn, args) for fn, args in calls]
+    if len(calls) == 1:
+        fn, args = calls[0]
+        return [call_in_worker(fn, args, deadline)]
+    with ThreadPoolExecutor(len(calls)) as threads:
+        futures = [threads.submit(call_in_worker, fn, args, deadline) for fn, args in calls]
+        return [future.result() for future in futures]
+
+
+# ---------------- entry point ----------------
+
+def extract_pdf_text(source) -> str:
+    """
+    Text of a PDF given as a path or as bytes (small uploads never hit
+    the disk; the bytes are pickled to the workers).
+    """
+    deadline = time.monotonic() + PDF_TIMEOUT_SECONDS
+
+    [(count, texts)] = run_tasks([(fast_pages, (source, PDF_MAX_PAGES))], deadline)
+
+    if count > PDF_MAX_PAGES:
+        raise PDFExtractionError(f"PDF has {count} pages; at most {PDF_MAX_PAGES} are supported.")
+
+    poor = [i for i, text in enumerate(texts) if not page_quality_ok(text)]
+    if poor:
+        log.info("PDF fast path: %d/%d page(s) need layout extraction", len(poor), len(texts))
+        redone = run_tasks([(layout_page, (source, i)) for i in poor], deadline)
+        for i, text in zip(poor, redone):
+            texts[i] = better(texts[i], text)
+
+    # pdfium ends lines with \r\n
+    return "\n".join(text.replace("\r\n", "\n") for text in texts)
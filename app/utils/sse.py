@@ -0,0 +1,57 @@
+import asyncio
+import contextlib
+import json
+
+# -------------------------------------------------------
+# SERVER-SENT EVENTS HELPERS
+# -------------------------------------------------------
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",  # stop proxies from buffering the stream
+}
+
+_DONE = object()
+
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def with_heartbeat(events, interval: float = 15.0):
+    """
+    Re-yield SSE frames from `events`, inserting a comment frame whenever
+    nothing has been sent for `interval` seconds so proxies keep the
+    connection open. Cancelling the consumer cancels the producer.
+    """
+    queue = asyncio.Queue()
+
+    async def pump():
+        try:
+            async for frame in events:
+                await queue.put(frame)
+        except Exception as e:
+            await queue.put(e)
+        finally:
+            await queue.put(_DONE)
+
+    task = asyncio.create_task(pump())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=interval)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                yield format_sse("error", {"message": str(item)})
+                break
+            yield item
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
@@ -0,0 +1,156 @@
+import hashlib
+import io
+import logging
+import os
+import zipfile
+
+from starlette.exceptions import HTTPException
+from starlette.responses import JSONResponse
+
+log = logging.getLogger("upload")
+
+# -------------------------------------------------------
+# UPLOAD INTAKE
+# -------------------------------------------------------
+# UploadSizeLimit rejects request bodies over the cap before the multipart
+# parser has read them. The file that does arrive is hashed in chunks and
+# its type comes from its leading bytes, not its name.
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(10 * 1024 * 1024)))
+UPLOAD_CHUNK_BYTES = 64 * 1024
+
+# Room for the form's text fields and multipart framing
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+OLE_MAGIC = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"  # legacy .doc
+# The PDF header may follow some junk within the first KiB
+SNIFF_BYTES = 1024
+
+
+class UploadTooLarge(ValueError):
+    pass
+
+
+class RequestTooLarge(HTTPException):
+    """
+    Raised from inside multipart parsing (FastAPI lets HTTPException
+    through); too_large_handler renders it like every other upload error.
+    """
+
+    def __init__(self):
+        super().__init__(status_code=413, detail=too_large_message())
+
+
+def too_large_message() -> str:
+    if UPLOAD_MAX_BYTES >= 1024 * 1024:
+        limit = f"{UPLOAD_MAX_BYTES // (1024 * 1024)} MB"
+    else:
+        limit = f"{UPLOAD_MAX_BYTES // 1024} KB"
+    return f"File is too large; the limit is {limit}."
+
+
+# ---------------- type sniffing ----------------
+
+def sniff_kind(head: bytes, source) -> str:
+    """
+    "pdf" or "docx" from the file's content (`head` = its first bytes,
+    `source` = bytes or a seekable file, for looking inside zips).
+    """
+    if PDF_MAGIC in head[:SNIFF_BYTES]:
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        try:
+            with zipfile.ZipFile(io.BytesIO(source) if isinstance(source, bytes) else source) as archive:
+                if "word/document.xml" in archive.namelist():
+                    return "docx"
+        except zipfile.BadZipFile:
+            pass
+    if head.startswith(OLE_MAGIC):
+        raise ValueError("Legacy .doc files are not supported. Save it as DOCX or PDF.")
+    raise ValueError("Unsupported file format. Upload PDF or DOCX only.")
+
+
+# ---------------- reading ----------------
+# Starlette has already spooled the file part (memory up to 1 MB, then an
+# anonymous temp file) and deletes it after the request. It is hashed and
+# sniffed where it is instead of being copied again.
+
+def inspect_upload(fileobj) -> dict:
+    """
+    {"sha256": hex digest, "size": bytes, "kind": "pdf"|"docx"} of an
+    uploaded file object, read in chunks; leaves it rewound. Blocking:
+    call via run_in_threadpool. Raises UploadTooLarge or ValueError.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    head = fileobj.read(SNIFF_BYTES)
+    chunk = head
+    while chunk:
+        size += len(chunk)
+        if size > UPLOAD_MAX_BYTES:
+            raise UploadTooLarge(too_large_message())
+        digest.update(chunk)
+        chunk = fileobj.read(UPLOAD_CHUNK_BYTES)
+
+    fileobj.seek(0)
+    kind = sniff_kind(head, fileobj)
+    fileobj.seek(0)
+    return {"sha256": digest.hexdigest(), "size": size, "kind": kind}
+
+
+def extraction_source(fileobj, kind: str):
+    """
+    What app.utils.file_utils.extract_text reads: the file object itself
+    for DOCX (parsed in-process), its bytes for PDF (the extraction
+    workers are separate processes and receive the data anyway).
+    """
+    fileobj.seek(0)
+    return fileobj.read() if kind == "pdf" else fileobj
+
+
+# ---------------- request body cap ----------------
+
+def too_large_response() -> JSONResponse:
+    return JSONResponse({"error": too_large_message()}, status_code=413)
+
+
+async def too_large_handler(request, exc):
+    return too_large_response()
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware: answers 413 for bodies over the upload limit on
+    `paths`, by Content-Length up front or by counting a chunked body.
+    """
+
+    def __init__(self, app, paths=("/resume/upload",)):
+        self.app = app
+        self.paths = set(paths)
+        self.limit = UPLOAD_MAX_BYTES + FORM_OVERHEAD_BYTES
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        length = headers.get(b"content-length")
+        if length is not None and length.isdigit() and int(length) > self.limit:
+            log.info("Rejected %s byte upload", length.decode())
+            return await too_large_response()(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.limit:
+                    raise RequestTooLarge()
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -0,0 +1,167 @@
+"""
+Optimization worker pool: executes jobs queued by POST /optimize/ with
+{"background": true}.
+
+    python -m app.worker --processes 2 --concurrency 8
+
+Each process runs an event loop with `concurrency` slots pulling from the
+`optimization_jobs` table. Scale this tier independently of the API.
+"""
+import argparse
+import asyncio
+import contextlib
+import logging
+import multiprocessing
+import os
+import signal
+import socket
+import time
+import uuid
+
+from app.db.database import Base, engine
+from app.db.migrations import run_migrations
+from app.llm.usage import usage_scope
+from app.services import job_queue
+from app.services.inflight import join_or_start
+from app.workflows.resume_optimizer_graph import run_optimizer, ResumeOptimizerState
+
+log = logging.getLogger("worker")
+
+POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "15"))
+REAP_SECONDS = float(os.getenv("WORKER_REAP_SECONDS", "30"))
+
+
+# -------------------------------------------------------
+# ONE JOB
+# -------------------------------------------------------
+
+async def execute(job_id: str, state_data: dict, worker_id: str):
+    state = ResumeOptimizerState(**state_data)
+
+    async def keep_alive():
+        while True:
+            await asyncio.sleep(HEARTBEAT_SECONDS)
+            with contextlib.suppress(Exception):
+                await asyncio.to_thread(job_queue.heartbeat_job, job_id, worker_id)
+
+    pinger = asyncio.create_task(keep_alive())
+    try:
+        # Same single-flight + checkpoint key as the synchronous endpoints
+        with usage_scope(optimization_job_id=job_id):
+            run, _ = join_or_start(state.run_id, state, run_optimizer)
+        async with run.attached():
+            final_state = await run.wait()
+    except asyncio.CancelledError:
+        with contextlib.suppress(Exception):
+            await asyncio.to_thread(job_queue.requeue_job, job_id, worker_id)
+        raise
+    except Exception as e:
+        log.exception("Job %s failed", job_id)
+        await asyncio.to_thread(job_queue.fail_job, job_id, worker_id, str(e) or type(e).__name__)
+        return
+    finally:
+        pinger.cancel()
+
+    await asyncio.to_thread(job_queue.complete_job, job_id, worker_id, final_state)
+    log.info("Job %s done (score %s)", job_id, final_state.get("ats_score"))
+
+
+# -------------------------------------------------------
+# PROCESS LOOP
+# -------------------------------------------------------
+
+async def slot(worker_id: str, stopping: asyncio.Event):
+    while not stopping.is_set():
+        try:
+            claimed = await asyncio.to_thread(job_queue.claim_next, worker_id)
+        except Exception as e:
+            log.warning("Claim failed: %s", e)
+            claimed = None
+
+        if claimed is None:
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(stopping.wait(), POLL_SECONDS)
+            continue
+
+        await execute(*claimed, worker_id)
+
+
+async def reaper(stopping: asyncio.Event):
+    while not stopping.is_set():
+        with contextlib.suppress(Exception):
+            await asyncio.to_thread(job_queue.requeue_stale)
+        with contextlib.suppress(asyncio.TimeoutError):
+            await asyncio.wait_for(stopping.wait(), REAP_SECONDS)
+
+
+async def serve(concurrency: int):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    stopping = asyncio.Event()
+
+    loop = asyncio.get_running_loop()
+    tasks = [asyncio.create_task(slot(worker_id, stopping)) for _ in range(concurrency)]
+    tasks.append(asyncio.create_task(reaper(stopping)))
+
+    def shutdown():
+        # Stop claiming and hand running jobs back; they resume elsewhere
+        stopping.set()
+        for task in tasks:
+            task.cancel()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, shutdown)
+
+    log.info("Worker %s started with %d slots", worker_id, concurrency)
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def process_main(concurrency: int):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(concurrency))
+
+
+# -------------------------------------------------------
+# SUPERVISOR
+# -------------------------------------------------------
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume optimization worker pool")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "2")))
+    parser.add_argument("--concurrency", type=int, default=int(os.getenv("WORKER_CONCURRENCY", "8")),
+                        help="Jobs in flight per process")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    Base.metadata.create_all(bind=engine)
+    run_migrations()
+
+    ctx = multiprocessing.get_context("spawn")
+    procs = {}
+    running = True
+
+    def stop(signum, frame):
+        nonlocal running
+        running = False
+        for proc in procs.values():
+            proc.terminate()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while running:
+        for i in range(args.processes):
+            proc = procs.get(i)
+            if proc is None or not proc.is_alive():
+                if proc is not None:
+                    log.warning("Worker process %d exited (%s); restarting", i, proc.exitcode)
+                procs[i] = ctx.Process(target=process_main, args=(args.concurrency,), daemon=False)
+                procs[i].start()
+        time.sleep(1)
+
+    for proc in procs.values():
+        proc.join()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import asyncio
+import os
+import random
+from datetime import datetime, timedelta
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+from app.db.database import SessionLocal
+from app.db import models
+
+# -------------------------------------------------------
+# POSTGRES CHECKPOINTER
+# -------------------------------------------------------
+# Persists optimizer graph state after every super-step through the
+# existing SQLAlchemy engine, so a run that dies (worker restart, a failed
+# LLM call) resumes from its last completed node instead of starting over.
+# Each checkpoint row holds the full state; runs are short, so there is no
+# need for per-channel blobs.
+
+CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "1") == "1"
+# Unfinished runs older than this are dropped instead of resumed
+CHECKPOINT_TTL_SECONDS = int(os.getenv("CHECKPOINT_TTL_SECONDS", str(24 * 3600)))
+
+
+class SQLAlchemyCheckpointSaver(BaseCheckpointSaver[str]):
+
+    # ---------------- reads ----------------
+
+    def get_tuple(self, config):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+
+        db = SessionLocal()
+        try:
+            query = db.query(models.GraphCheckpoint).filter_by(thread_id=thread_id, checkpoint_ns=checkpoint_ns)
+            if checkpoint_id:
+                query = query.filter_by(checkpoint_id=checkpoint_id)
+            row = query.order_by(models.GraphCheckpoint.checkpoint_id.desc()).first()
+            if row is None:
+                return None
+            return self._to_tuple(db, row)
+        finally:
+            db.close()
+
+    def list(self, config, *, filter=None, before=None, limit=None):
+        db = SessionLocal()
+        try:
+            query = db.query(models.GraphCheckpoint)
+            if config:
+                query = query.filter_by(thread_id=config["configurable"]["thread_id"])
+                if "checkpoint_ns" in config["configurable"]:
+                    query = query.filter_by(checkpoint_ns=config["configurable"]["checkpoint_ns"])
+                if checkpoint_id := get_checkpoint_id(config):
+                    query = query.filter_by(checkpoint_id=checkpoint_id)
+            if before and (before_id := get_checkpoint_id(before)):
+                query = query.filter(models.GraphCheckpoint.checkpoint_id < before_id)
+
+            rows = query.order_by(models.GraphCheckpoint.checkpoint_id.desc()).all()
+            tuples = []
+            for row in rows:
+                item = self._to_tuple(db, row)
+                if filter and not all(item.metadata.get(k) == v for k, v in filter.items()):
+                    continue
+                tuples.append(item)
+                if limit is not None and len(tuples) >= limit:
+                    break
+        finally:
+            db.close()
+        yield from tuples
+
+    def _to_tuple(self, db, row):
+        writes = (
+            db.query(models.GraphCheckpointWrite)
+            .filter_by(thread_id=row.thread_id, checkpoint_ns=row.checkpoint_ns, checkpoint_id=row.checkpoint_id)
+            .order_by(
+                models.GraphCheckpointWrite.task_path,
+                models.GraphCheckpointWrite.task_id,
+                models.GraphCheckpointWrite.idx,
+            )
+            .all()
+        )
+
+        def config_for(checkpoint_id):
+            return {
+                "configurable": {
+                    "thread_id": row.thread_id,
+                    "checkpoint_ns": row.checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            }
+
+        return CheckpointTuple(
+            config=config_for(row.checkpoint_id),
+            checkpoint=self.serde.loads_typed((row.type, row.checkpoint)),
+            metadata=self.serde.loads_typed((row.metadata_type, row.metadata_blob)),
+            parent_config=config_for(row.parent_checkpoint_id) if row.parent_checkpoint_id else None,
+            pending_writes=[(w.task_id, w.channel, self.serde.loads_typed((w.type, w.value))) for w in writes],
+        )
+
+    # ---------------- writes ----------------
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        type_, blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        db = SessionLocal()
+        try:
+            db.merge(models.GraphCheckpoint(
+                thread_id=thread_id,
+                checkpoint_ns=checkpoint_ns,
+                checkpoint_id=checkpoint["id"],
+                parent_checkpoint_id=config["configurable"].get("checkpoint_id"),
+                type=type_,
+                checkpoint=blob,
+                metadata_type=metadata_type,
+                metadata_blob=metadata_blob,
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(self, config, writes, task_id, task_path=""):
+        keys = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": config["configurable"]["checkpoint_id"],
+            "task_id": task_id,
+        }
+
+        db = SessionLocal()
+        try:
+            for i, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, i)
+                # Regular writes are idempotent; special ones (errors, ...) overwrite
+                if idx >= 0 and db.get(models.GraphCheckpointWrite, {**keys, "idx": idx}):
+                    continue
+                type_, blob = self.serde.dumps_typed(value)
+                db.merge(models.GraphCheckpointWrite(
+                    **keys, idx=idx, channel=channel, task_path=task_path, type=type_, value=blob,
+                ))
+            db.commit()
+        finally:
+            db.close()
+
+    def delete_thread(self, thread_id):
+        db = SessionLocal()
+        try:
+            db.query(models.GraphCheckpointWrite).filter_by(thread_id=thread_id).delete()
+            db.query(models.GraphCheckpoint).filter_by(thread_id=thread_id).delete()
+            db.commit()
+        finally:
+            db.close()
+
+    def get_next_version(self, current, channel):
+        # Same zero-padded string versions as the in-memory saver
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ---------------- async (DB work off the event loop) ----------------
+
+    async def aget_tuple(self, config):
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(self, config, *, filter=None, before=None, limit=None):
+        items = await asyncio.to_thread(lambda: [*self.list(config, filter=filter, before=before, limit=limit)])
+        for item in items:
+            yield item
+
+    async def aput(self, config, checkpoint, metadata, new_versions):
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config, writes, task_id, task_path=""):
+        return await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id):
+        return await asyncio.to_thread(self.delete_thread, thread_id)
+
+
+def prune_checkpoints():
+    """
+    Drop threads whose latest checkpoint is older than CHECKPOINT_TTL_SECONDS.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=CHECKPOINT_TTL_SECONDS)
+    db = SessionLocal()
+    try:
+        fresh = (
+            db.query(models.GraphCheckpoint.thread_id)
+            .filter(models.GraphCheckpoint.created_at >= cutoff)
+        )
+        expired = (
+            db.query(models.GraphCheckpoint.thread_id)
+            .filter(models.GraphCheckpoint.created_at < cutoff)
+            .filter(~models.GraphCheckpoint.thread_id.in_(fresh.scalar_subquery()))
+            .distinct()
+        )
+        thread_ids = [t for (t,) in expired]
+        if thread_ids:
+            db.query(models.GraphCheckpointWrite).filter(
+                models.GraphCheckpointWrite.thread_id.in_(thread_ids)
+            ).delete(synchronize_session=False)
+            db.query(models.GraphCheckpoint).filter(
+                models.GraphCheckpoint.thread_id.in_(thread_ids)
+            ).delete(synchronize_session=False)
+        db.commit()
+        return len(thread_ids)
+    finally:
+        db.close()
+
+
+checkpointer = SQLAlchemyCheckpointSaver() if CHECKPOINTS_ENABLED else None
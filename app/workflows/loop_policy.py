@@ -0,0 +1,146 @@
+import os
+import threading
+import time
+
+# ---------------------------------------------------
+# LOOP MODES
+# ---------------------------------------------------
+# Decides after every ATS score whether another IMPROVE round is worth it.
+#   deadline   seconds from the start of the run to the response
+#   max_loops  IMPROVE rounds allowed at most
+#   min_gain   skip IMPROVE when it is predicted to add fewer ATS points
+#
+# "fast" rarely leaves time for IMPROVE and so has predictable latency,
+# "best" keeps improving while rounds still pay off.
+
+LOOP_MODES = {
+    "fast": {"deadline": 35.0, "max_loops": 1, "min_gain": 4.0},
+    "balanced": {"deadline": 90.0, "max_loops": 1, "min_gain": 1.0},
+    "best": {"deadline": 180.0, "max_loops": 3, "min_gain": 1.0},
+}
+LOOP_MODE = os.getenv("LOOP_MODE", "balanced")
+
+# Priors used until this process has timed / scored real rounds
+PRIOR_GAIN_FRACTION = float(os.getenv("LOOP_PRIOR_GAIN_FRACTION", "0.5"))
+PRIOR_IMPROVE_SECONDS = float(os.getenv("LOOP_PRIOR_IMPROVE_SECONDS", "20"))
+PRIOR_ATS_SECONDS = float(os.getenv("LOOP_PRIOR_ATS_SECONDS", "5"))
+
+# Time kept back for GENERATE and the response
+GENERATE_RESERVE_SECONDS = float(os.getenv("LOOP_GENERATE_RESERVE_SECONDS", "2"))
+
+# A run's next round is expected to gain at most this share of its last one
+GAIN_DECAY = 0.6
+EWMA_ALPHA = 0.2
+
+
+def resolve_policy(loop_mode: str = None, deadline_seconds: float = None) -> dict:
+    policy = dict(LOOP_MODES.get(loop_mode or LOOP_MODE, LOOP_MODES["balanced"]))
+    if deadline_seconds:
+        policy["deadline"] = float(deadline_seconds)
+    return policy
+
+
+def deadline_for(policy: dict) -> float:
+    """
+    Absolute deadline (time.monotonic) for a run starting now.
+    """
+    return time.monotonic() + policy["deadline"]
+
+
+# ---------------------------------------------------
+# SCORE-DELTA / LATENCY MODEL
+# ---------------------------------------------------
+# Per process moving averages: how much of the gap to the threshold one
+# IMPROVE round closes, and how long IMPROVE and ATS take.
+
+_lock = threading.Lock()
+_model = {
+    "gain_fraction": PRIOR_GAIN_FRACTION,
+    "improve_seconds": PRIOR_IMPROVE_SECONDS,
+    "ats_seconds": PRIOR_ATS_SECONDS,
+    "rounds_observed": 0,
+}
+
+
+def _observe(key: str, value: float):
+    with _lock:
+        _model[key] += EWMA_ALPHA * (value - _model[key])
+
+
+def observe_improve(seconds: float):
+    _observe("improve_seconds", seconds)
+
+
+def observe_ats(seconds: float):
+    _observe("ats_seconds", seconds)
+
+
+def observe_gain(before: int, after: int, threshold: int):
+    gap = threshold - before
+    if gap <= 0:
+        return
+    _observe("gain_fraction", min(1.0, max(0.0, (after - before) / gap)))
+    with _lock:
+        _model["rounds_observed"] += 1
+
+
+def model_snapshot() -> dict:
+    with _lock:
+        return dict(_model)
+
+
+def predicted_gain(score: int, threshold: int, history: list) -> float:
+    gain = (threshold - score) * _model["gain_fraction"]
+    if len(history) >= 2:
+        # This run's own last round says more than the process average
+        gain = min(gain, max(0, history[-1] - history[-2]) * GAIN_DECAY)
+    return gain
+
+
+def round_trip_seconds(improve_ready: bool = False) -> float:
+    """
+    Predicted time for IMPROVE -> ATS -> GENERATE from here. IMPROVE is
+    free when a speculative result is already waiting.
+    """
+    improve = 0.0 if improve_ready else _model["improve_seconds"]
+    return improve + _model["ats_seconds"] + GENERATE_RESERVE_SECONDS
+
+
+# ---------------------------------------------------
+# DECISIONS
+# ---------------------------------------------------
+
+def loop_possible(iteration_count: int, policy: dict, deadline_at: float = None) -> bool:
+    """
+    Before scoring: could another round still happen? Gates speculation
+    and budget checks. Assumes IMPROVE overlaps the pending ATS call.
+    """
+    if iteration_count >= policy["max_loops"]:
+        return False
+    if deadline_at is None:
+        return True
+    return deadline_at - time.monotonic() >= _model["ats_seconds"] + round_trip_seconds(improve_ready=True)
+
+
+def decide(score: int, threshold: int, iteration_count: int, history: list,
+           policy: dict, deadline_at: float = None, improve_ready: bool = False):
+    """
+    Returns (decision, reason) with decision PASS, STOP or IMPROVE.
+    """
+    if score >= threshold:
+        return "PASS", "threshold met"
+
+    if iteration_count >= policy["max_loops"]:
+        return "STOP", "max loops reached"
+
+    gain = predicted_gain(score, threshold, history)
+    if gain < policy["min_gain"]:
+        return "STOP", f"predicted gain {gain:.1f} < {policy['min_gain']:g}"
+
+    if deadline_at is not None:
+        left = deadline_at - time.monotonic()
+        needed = round_trip_seconds(improve_ready)
+        if needed > left:
+            return "STOP", f"{left:.1f}s left, another round needs ~{needed:.1f}s"
+
+    return "IMPROVE", f"predicted gain {gain:.1f}"
@@ -1,10 +1,24 @@
+import asyncio
+import functools
 import logging
-from langgraph.graph import StateGraph
+import time
+from collections import OrderedDict
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+from langgraph.graph import START, StateGraph
 from .state import ResumeOptimizerState
-from app.services.llm_optimizer import tailor_resume
-from app.services.llm_ats import ats_score
-from app.services.llm_improver import improve_resume
-from app.services.docx_generator import generate_final_docx
+from .checkpointer import checkpointer
+from . import loop_policy
+from app.services.llm_optimizer import atailor_candidates, atailor_resume
+from app.services.llm_tailor_sections import atailor_resume_parallel
+from app.services.ats_service import ascore_resume, resolve_mode
+from app.services.local_ats import local_ats_score
+from app.services.llm_improver import aimprove_resume
+from app.services.docx_generator import complete_docx, generate_final_docx, render_static_parts
+from app.llm.usage import improve_budget_check, usage_scope
+from app.services.job_service import persist_run_result
+from app.services.document_store import save_document
+from app.utils.metrics import node_duration, node_errors, node_in_flight, track
 import os
 import uuid
 
@@ -16,99 +30,346 @@ log = logging.getLogger("optimizer")
 
 
 ATS_THRESHOLD = 94
-MAX_LOOPS = 1
+# "single": one TAILOR call; "parallel": summary, each role and skills concurrently;
+# "candidates": best of TAILOR_CANDIDATES variants, no IMPROVE loop
+TAILOR_MODE = os.getenv("TAILOR_MODE", "single")
+# Start IMPROVE alongside ATS when the prescore says it will likely be needed
+SPECULATIVE_IMPROVE = os.getenv("SPECULATIVE_IMPROVE", "1") == "1"
+PRERENDER_MAX_DOCS = int(os.getenv("PRERENDER_MAX_DOCS", "256"))
 
 
 # ---------------------------------------------------
-# NODES
+# PROGRESS EVENTS
 # ---------------------------------------------------
+# Emitted on the "custom" stream; a no-op when the graph runs via ainvoke.
 
-def node_tailor(state: ResumeOptimizerState):
-    log.info("=== NODE: TAILOR ===")
-    log.info("Original sections:\n%s", state.resume_sections)
+def emit(event: str, **data):
+    get_stream_writer()({"event": event, **data})
 
-    tailored = tailor_resume(
-        state.resume_sections,
-        state.job_description,
-        state.original_experience_positions
-    )
 
-    state.resume_sections["summary"] = tailored["summary"]
-    state.resume_sections["experience"] = tailored["experience"]
-    state.resume_sections["skills"] = tailored["skills"]
+def node_started(node: str) -> float:
+    emit("node_start", node=node)
+    return time.perf_counter()
 
-    state.resume_sections["education"] = state.original_education
 
-    log.info("Tailored summary:\n%s", state.resume_sections["summary"])
-    log.info("Tailored skills:\n%s", state.resume_sections["skills"])
+def node_finished(node: str, started: float, **data):
+    elapsed_ms = round((time.perf_counter() - started) * 1000)
+    emit("node_end", node=node, elapsed_ms=elapsed_ms, **data)
 
-    return state
+
+def instrumented(node: str, fn):
+    """
+    Wrap a node with the optimizer_node_* metrics. functools.wraps keeps
+    the signature visible, so LangGraph still passes `config` where asked.
+    """
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        with track(node_duration, node_in_flight, node_errors, node=node):
+            return await fn(*args, **kwargs)
+    return wrapper
 
 
-def node_ats(state: ResumeOptimizerState):
+# ---------------------------------------------------
+# NODES
+# ---------------------------------------------------
+# Nodes are async so the compiled graph is driven with `ainvoke` and a
+# single worker can hold many optimizations in flight at once. They return
+# only the keys they change, since parallel branches write the same state.
+
+async def node_tailor(state: ResumeOptimizerState, config: RunnableConfig):
+    log.info("=== NODE: TAILOR ===")
+    log.info("Original sections:\n%s", state.resume_sections)
+    started = node_started("TAILOR")
+
+    on_token = on_field = None
+    if config.get("configurable", {}).get("stream_tokens"):
+        on_token = lambda text: emit("summary_token", text=text)
+        # Each experience entry / skills category as soon as it is complete
+        on_field = lambda path, value: emit("section_ready", node="TAILOR", path=list(path), value=value)
+
+    update = {}
+    mode = state.tailor_mode or TAILOR_MODE
+    if mode == "candidates":
+        sections, update["candidate_ats"] = await best_candidate(state)
+    elif mode == "parallel":
+        tailored = await atailor_resume_parallel(
+            state.resume_sections,
+            state.job_description,
+            state.original_experience_positions,
+            on_token=on_token
+        )
+        sections = tailored_sections(state, tailored)
+    else:
+        tailored = await atailor_resume(
+            state.resume_sections,
+            state.job_description,
+            state.original_experience_positions,
+            on_token=on_token,
+            on_field=on_field
+        )
+        sections = tailored_sections(state, tailored)
+
+    log.info("Tailored summary:\n%s", sections["summary"])
+    log.info("Tailored skills:\n%s", sections["skills"])
+    node_finished("TAILOR", started, summary=sections["summary"])
+
+    return {**update, "resume_sections": sections}
+
+
+async def node_prescore(state: ResumeOptimizerState):
+    """
+    Local score of the untailored resume, run alongside TAILOR. A resume
+    that starts far from the JD almost always needs IMPROVE, so this is
+    what decides whether ATS speculates on it.
+    """
+    started = node_started("PRESCORE")
+    result = await asyncio.to_thread(local_ats_score, state.resume_sections, state.job_description)
+
+    speculate = SPECULATIVE_IMPROVE and result["score"] < ATS_THRESHOLD
+    log.info("Prescore: %s (speculative improve: %s)", result["score"], speculate)
+    node_finished("PRESCORE", started, score=result["score"], speculate=speculate)
+
+    return {"prescore": result["score"], "speculate": speculate}
+
+
+async def node_prerender(state: ResumeOptimizerState):
+    """
+    Render the header and education, which never change, while the LLM
+    branches run. The document stays in this process; GENERATE falls back
+    to a full render if it cannot find it.
+    """
+    started = node_started("PRERENDER")
+    doc = await asyncio.to_thread(render_static_parts, user_info(state), state.original_education)
+
+    key = uuid.uuid4().hex
+    prerendered[key] = doc
+    while len(prerendered) > PRERENDER_MAX_DOCS:
+        prerendered.popitem(last=False)
+
+    node_finished("PRERENDER", started)
+    return {"prerender_key": key}
+
+
+async def node_ats(state: ResumeOptimizerState, config: RunnableConfig):
     log.info("=== NODE: ATS SCORE ===")
-    result = ats_score(state.resume_sections, state.job_description)
+    started = node_started("ATS")
+
+    policy = loop_policy.resolve_policy(state.loop_mode, state.deadline_seconds)
+    candidates = (state.tailor_mode or TAILOR_MODE) == "candidates"
+    if candidates:
+        # Best-of-N already spent the extra tokens up front
+        policy["max_loops"] = 0
+    deadline_at = config.get("configurable", {}).get("deadline_at")
+    loop_possible = loop_policy.loop_possible(state.iteration_count, policy, deadline_at)
+
+    # Token budgets are checked before any IMPROVE work, speculative or not
+    budget_stop = state.budget_stop
+    if budget_stop is None and loop_possible:
+        attempt_id = config.get("configurable", {}).get("attempt_id")
+        budget_stop = await asyncio.to_thread(improve_budget_check, state.user_id, attempt_id)
+        if budget_stop:
+            log.info("IMPROVE disabled by %s", budget_stop)
+            emit("budget", node="IMPROVE", reason=budget_stop)
+
+    # Start IMPROVE on the local analysis while the real score is pending;
+    # it is thrown away if the resume passes.
+    speculation = None
+    if budget_stop is None and loop_possible and should_speculate(state):
+        speculation = asyncio.create_task(speculative_improve(state))
+        emit("speculation", node="IMPROVE", status="started")
+
+    reused = candidates and state.candidate_ats is not None
+    try:
+        if reused:
+            # The winner was scored locally to be picked; with no loop left
+            # to steer, an LLM score would only cost a round trip
+            result = state.candidate_ats
+        else:
+            result = await ascore_resume(
+                state.resume_sections,
+                state.job_description,
+                ATS_THRESHOLD,
+                state.ats_mode
+            )
+    except BaseException:
+        if speculation:
+            speculation.cancel()
+        raise
+    scored = time.perf_counter()
+
+    score = result["score"]
+    if state.score_history:
+        loop_policy.observe_gain(state.score_history[-1], score, ATS_THRESHOLD)
+    history = state.score_history + [score]
+
+    update = {
+        "ats_score": score,
+        "analysis": result["analysis"],
+        "speculative_sections": None,
+        "budget_stop": budget_stop,
+        "score_history": history,
+    }
 
-    state.ats_score = result["score"]
-    state.analysis = result["analysis"]
+    if speculation:
+        # loop_possible already checked the loop count and the deadline
+        if score < ATS_THRESHOLD:
+            update["speculative_sections"] = await settle(speculation)
+            emit("speculation", node="IMPROVE", status="used" if update["speculative_sections"] else "failed")
+        else:
+            speculation.cancel()
+            emit("speculation", node="IMPROVE", status="cancelled")
+
+    if not reused:
+        loop_policy.observe_ats(scored - started)
+
+    next_step, reason = loop_policy.decide(
+        score,
+        ATS_THRESHOLD,
+        state.iteration_count,
+        history,
+        policy,
+        deadline_at,
+        improve_ready=update["speculative_sections"] is not None,
+    )
+    if next_step == "IMPROVE" and budget_stop:
+        next_step, reason = "STOP", budget_stop
+    update["next_step"] = next_step
+    update["loop_reason"] = reason
 
-    log.info("ATS Score: %s", state.ats_score)
-    log.info("ATS Analysis: %s", state.analysis)
+    log.info("ATS Score: %s", update["ats_score"])
+    log.info("ATS Analysis: %s", update["analysis"])
+    emit("decision", node="ATS", next=next_step, reason=reason)
+    node_finished("ATS", started, score=update["ats_score"], analysis=update["analysis"])
 
-    return state
+    return update
 
 
 def check_score(state: ResumeOptimizerState):
+    """
+    Routes on the decision ATS took with the loop policy (it has the
+    deadline and the timings; this edge only sees state).
+    """
     log.info("=== CHECK SCORE ===")
     log.info(f"Current Score = {state.ats_score}, Threshold = {ATS_THRESHOLD}, Iteration = {state.iteration_count}")
+    log.info("Decision: %s (%s)", state.next_step, state.loop_reason)
+    return state.next_step
 
-    if state.ats_score >= ATS_THRESHOLD:
-        log.info("Decision: PASS (threshold met)")
-        return "PASS"
 
-    if state.iteration_count >= MAX_LOOPS:
-        log.info("Decision: STOP (max loops reached)")
-        return "STOP"
-
-    log.info("Decision: IMPROVE (score too low, more loops allowed)")
-    return "IMPROVE"
-
-
-def node_improve(state: ResumeOptimizerState):
+async def node_improve(state: ResumeOptimizerState):
     log.info("=== NODE: IMPROVE ===")
-    log.info("Applying ATS analysis improvements...")
-
-    improved = improve_resume(
-        state.resume_sections,
-        state.analysis,
-        state.job_description,
-        state.original_experience_positions
+    started = node_started("IMPROVE")
+
+    if state.speculative_sections:
+        log.info("Using speculative improvement started during ATS")
+        improved = state.speculative_sections
+    else:
+        log.info("Applying ATS analysis improvements...")
+        improved = await aimprove_resume(
+            state.resume_sections,
+            state.analysis,
+            state.job_description,
+            state.original_experience_positions
+        )
+        loop_policy.observe_improve(time.perf_counter() - started)
+
+    sections = {
+        **state.resume_sections,
+        "summary": improved["summary"],
+        "experience": improved["experience"],
+        "skills": improved["skills"],
+        "education": state.original_education,
+    }
+    iteration_count = state.iteration_count + 1
+
+    log.info(f"New iteration count: {iteration_count}")
+    log.info("Improved summary:\n%s", sections["summary"])
+    log.info("Improved skills:\n%s", sections["skills"])
+    node_finished(
+        "IMPROVE",
+        started,
+        iteration=iteration_count,
+        speculative=bool(state.speculative_sections),
+        targets=list(improved.get("targets") or ("summary", "experience", "skills")),
     )
 
-    state.resume_sections["summary"] = improved["summary"]
-    state.resume_sections["experience"] = improved["experience"]
-    state.resume_sections["skills"] = improved["skills"]
-    state.resume_sections["education"] = state.original_education
-
-    state.iteration_count += 1
+    return {"resume_sections": sections, "iteration_count": iteration_count, "speculative_sections": None}
 
-    log.info(f"New iteration count: {state.iteration_count}")
-    log.info("Improved summary:\n%s", state.resume_sections["summary"])
-    log.info("Improved skills:\n%s", state.resume_sections["skills"])
 
-    return state
-
-
-def node_generate(state: ResumeOptimizerState):
+async def node_generate(state: ResumeOptimizerState):
     log.info("=== NODE: GENERATE DOCX ===")
     log.info("Final score = %s, Passed = %s", state.ats_score, state.passed)
+    started = node_started("GENERATE")
 
     os.makedirs("generated", exist_ok=True)
 
     unique_filename = f"final_resume_{uuid.uuid4()}.docx"
     output_path = f"generated/{unique_filename}"
 
-    user_info = {
+    # python-docx is blocking; keep it off the event loop
+    doc = prerendered.pop(state.prerender_key, None) if state.prerender_key else None
+    if doc is not None:
+        await asyncio.to_thread(complete_docx, doc, state.resume_sections, output_path)
+    else:
+        await asyncio.to_thread(
+            generate_final_docx,
+            sections=state.resume_sections,
+            user_info=user_info(state),
+            output_path=output_path,
+        )
+
+    log.info(f"Generated resume at: {output_path}")
+    # The worker tier does not share this disk with the API
+    await asyncio.to_thread(save_document, unique_filename)
+    node_finished("GENERATE", started, file_url_relative=f"/generated/{unique_filename}")
+
+    return {"final_docx_path": unique_filename, "passed": True, "prerender_key": None}
+
+
+# ---------------------------------------------------
+# TAILOR / SPECULATION / PRERENDER HELPERS
+# ---------------------------------------------------
+
+prerendered = OrderedDict()
+
+
+def tailored_sections(state: ResumeOptimizerState, tailored: dict) -> dict:
+    return {
+        **state.resume_sections,
+        "summary": tailored["summary"],
+        "experience": tailored["experience"],
+        "skills": tailored["skills"],
+        "education": state.original_education,
+    }
+
+
+def score_options(options: list, jd: str) -> list:
+    # CPU-bound; threads would only take turns on the GIL
+    return [local_ats_score(option, jd) for option in options]
+
+
+async def best_candidate(state: ResumeOptimizerState) -> tuple:
+    """
+    Best-of-N tailoring: one n>1 completion, every candidate scored with
+    the local scorer, highest score wins. Returns the winner's sections
+    and its local ATS result. Summary tokens are not streamed in this mode.
+    """
+    candidates = await atailor_candidates(
+        state.resume_sections,
+        state.job_description,
+        state.original_experience_positions
+    )
+    options = [tailored_sections(state, c) for c in candidates]
+    results = await asyncio.to_thread(score_options, options, state.job_description)
+
+    scores = [r["score"] for r in results]
+    best = max(range(len(options)), key=scores.__getitem__)
+    log.info("Candidate scores: %s (picked %s)", scores, best)
+    emit("candidates", node="TAILOR", scores=scores, picked=best)
+    return options[best], results[best]
+
+
+def user_info(state: ResumeOptimizerState) -> dict:
+    return {
         "full_name": state.full_name,
         "phone": state.phone,
         "email": state.email,
@@ -116,34 +377,61 @@ def node_generate(state: ResumeOptimizerState):
         "github": state.github,
     }
 
-    generate_final_docx(
-        sections=state.resume_sections,
-        user_info=user_info,
-        output_path=output_path,
-    )
 
-    state.final_docx_path = unique_filename
-    state.passed = True
+def should_speculate(state: ResumeOptimizerState) -> bool:
+    # Only worth it when scoring is an LLM call; the caller checks that
+    # another loop is possible at all
+    mode = resolve_mode(state.ats_mode)
+    return state.speculate and mode != "local"
 
-    log.info(f"Generated resume at: {output_path}")
 
-    return state
+async def speculative_improve(state: ResumeOptimizerState) -> dict:
+    started = time.perf_counter()
+    analysis = (await asyncio.to_thread(local_ats_score, state.resume_sections, state.job_description))["analysis"]
+    improved = await aimprove_resume(
+        state.resume_sections,
+        analysis,
+        state.job_description,
+        state.original_experience_positions
+    )
+    loop_policy.observe_improve(time.perf_counter() - started)
+    return improved
+
+
+async def settle(task: asyncio.Task):
+    """
+    Result of a speculative task, or None if it failed (IMPROVE then
+    runs normally on the real analysis).
+    """
+    try:
+        return await task
+    except Exception as e:
+        log.warning("Speculative improve failed: %s", e)
+        return None
 
 
 # ---------------------------------------------------
 # BUILD THE GRAPH
 # ---------------------------------------------------
+#   START ─┬─ TAILOR ────┐
+#          ├─ PRESCORE ──┼─ ATS ─(PASS/STOP)─ GENERATE
+#          └─ PRERENDER ─┘   └─(IMPROVE)─ IMPROVE ─ ATS
 
 builder = StateGraph(ResumeOptimizerState)
 
-builder.add_node("TAILOR", node_tailor)
-builder.add_node("ATS", node_ats)
-builder.add_node("IMPROVE", node_improve)
-builder.add_node("GENERATE", node_generate)
+builder.add_node("TAILOR", instrumented("TAILOR", node_tailor))
+builder.add_node("PRESCORE", instrumented("PRESCORE", node_prescore))
+builder.add_node("PRERENDER", instrumented("PRERENDER", node_prerender))
+builder.add_node("ATS", instrumented("ATS", node_ats))
+builder.add_node("IMPROVE", instrumented("IMPROVE", node_improve))
+builder.add_node("GENERATE", instrumented("GENERATE", node_generate))
 
-builder.set_entry_point("TAILOR")
+builder.add_edge(START, "TAILOR")
+builder.add_edge(START, "PRESCORE")
+builder.add_edge(START, "PRERENDER")
 
-builder.add_edge("TAILOR", "ATS")
+# Join: ATS waits for all three branches
+builder.add_edge(["TAILOR", "PRESCORE", "PRERENDER"], "ATS")
 
 builder.add_conditional_edges(
     "ATS",
@@ -157,4 +445,89 @@ builder.add_conditional_edges(
 
 builder.add_edge("IMPROVE", "ATS")
 
-resume_optimizer_graph = builder.compile()
\ No newline at end of file
+resume_optimizer_graph = builder.compile()
+durable_graph = builder.compile(checkpointer=checkpointer) if checkpointer else None
+
+# ---------------------------------------------------
+# RUNNER
+# ---------------------------------------------------
+
+async def resume_point(state: ResumeOptimizerState, config: dict):
+    """
+    Graph input for a checkpointed run: None to continue an unfinished
+    thread from its last completed node, otherwise the fresh state.
+    """
+    snapshot = await durable_graph.aget_state(config)
+    if snapshot.next:
+        log.info("Resuming run %s at %s", state.run_id[:12], ", ".join(snapshot.next))
+        return None
+    if snapshot.values:
+        await checkpointer.adelete_thread(state.run_id)
+    return state
+
+
+async def run_optimizer(state: ResumeOptimizerState, on_event=None) -> dict:
+    """
+    Run the graph to completion and return the final state. Progress
+    events (node_start / node_end / summary_token) go to `on_event`.
+
+    With a `run_id` the run is checkpointed after every step, and calling
+    this again for the same run_id picks up where a failed attempt stopped.
+    LLM usage is recorded under a fresh id per call (`usage_run_id` in the
+    result), so repeats of the same request do not share a token budget.
+    With a `job_id` the result is saved as that posting's GeneratedResume
+    (`generated_resume_id` in the result).
+    """
+    graph = resume_optimizer_graph
+    graph_input = state
+    # The deadline restarts with every attempt, including resumed ones
+    policy = loop_policy.resolve_policy(state.loop_mode, state.deadline_seconds)
+    attempt_id = uuid.uuid4().hex
+    config = {
+        "configurable": {
+            "stream_tokens": on_event is not None,
+            "deadline_at": loop_policy.deadline_for(policy),
+            "attempt_id": attempt_id,
+        }
+    }
+
+    if checkpointer and state.run_id:
+        graph = durable_graph
+        config["configurable"]["thread_id"] = state.run_id
+        graph_input = await resume_point(state, config)
+
+    with usage_scope(user_id=state.user_id, run_id=attempt_id, job_id=state.job_id):
+        if on_event is None:
+            final_state = await graph.ainvoke(graph_input, config=config)
+        else:
+            final_state = None
+            async for mode, chunk in graph.astream(
+                graph_input,
+                config=config,
+                stream_mode=["custom", "values"],
+            ):
+                if mode == "values":
+                    final_state = chunk
+                else:
+                    on_event(chunk)
+
+    if graph is durable_graph:
+        # Finished runs have nothing left to resume
+        await checkpointer.adelete_thread(state.run_id)
+
+    final_state = {**final_state, "usage_run_id": attempt_id}
+    if state.job_id:
+        final_state["generated_resume_id"] = await asyncio.to_thread(persist_run_result, state.job_id, final_state)
+    return final_state
+
+
+async def get_run(run_id: str):
+    """
+    Checkpointed state of an unfinished run, or None.
+    """
+    if not checkpointer:
+        return None
+    snapshot = await durable_graph.aget_state({"configurable": {"thread_id": run_id}})
+    if not snapshot.values:
+        return None
+    return snapshot
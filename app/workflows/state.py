@@ -4,6 +4,16 @@ from typing import Dict, List, Optional, Any
 class ResumeOptimizerState(BaseModel):
     resume_sections: Dict[str, Any]  # current working resume sections
 
+    # Who / which uploaded resume this run is for
+    user_id: Optional[str] = None
+    resume_id: Optional[str] = None
+
+    # jobs.id of the posting; the result is saved as its GeneratedResume
+    job_id: Optional[str] = None
+
+    # Checkpoint thread for this run (the coalescing key); None = no checkpoints
+    run_id: Optional[str] = None
+
     # Personal info added by user
     phone: Optional[str] = None
     full_name: Optional[str] = None
@@ -19,10 +29,43 @@ class ResumeOptimizerState(BaseModel):
 
     job_description: str
 
+    # ATS scoring mode: "llm", "local" or "prescreen" (None → ATS_MODE env)
+    ats_mode: Optional[str] = None
+
+    # Tailoring mode: "single", "parallel" or "candidates" (None → TAILOR_MODE env)
+    tailor_mode: Optional[str] = None
+
+    # IMPROVE loop policy: "fast", "balanced" or "best" (None → LOOP_MODE env),
+    # and a latency deadline overriding the mode's own
+    loop_mode: Optional[str] = None
+    deadline_seconds: Optional[float] = None
+
+    # Local score of the untailored resume, and whether ATS should start
+    # IMPROVE speculatively because of it
+    prescore: Optional[int] = None
+    speculate: bool = False
+
+    # Local ATS result of the best-of-N winner, reported by ATS as is
+    candidate_ats: Optional[Dict[str, Any]] = None
+
     # ATS results
     ats_score: Optional[int] = None
     analysis: Optional[Dict[str, Any]] = None
 
+    # Score after every ATS round, and what the loop policy made of the last one
+    score_history: List[int] = []
+    next_step: Optional[str] = None
+    loop_reason: Optional[str] = None
+
+    # IMPROVE output computed during ATS, consumed by the IMPROVE node
+    speculative_sections: Optional[Dict[str, Any]] = None
+
+    # In-process handle of the prerendered header/education document
+    prerender_key: Optional[str] = None
+
+    # Why IMPROVE was skipped for budget reasons (None = within budget)
+    budget_stop: Optional[str] = None
+
     iteration_count: int = 0
     passed: bool = False
     final_docx_path: Optional[str] = None
\ No newline at end of file
@@ -171,7 +171,8 @@ optimizeBtn.addEventListener("click", async () => {
     atsValue.textContent = "";
 
     try {
-        const res = await fetch(`${API_BASE}/optimize`, {
+        // Progress arrives as Server-Sent Events; the last event is "result"
+        const res = await fetch(`${API_BASE}/optimize/stream`, {
             method: "POST",
             headers: { "Content-Type": "application/json" },
             body: JSON.stringify({
@@ -180,10 +181,29 @@ optimizeBtn.addEventListener("click", async () => {
             }),
         });
 
-        const data = await res.json();
+        if (!res.ok) {
+            optimizeStatus.textContent = "Error: Optimization failed";
+            optimizeStatus.style.color = "red";
+            return;
+        }
 
-        if (!res.ok || data.error) {
-            optimizeStatus.textContent = "Error: " + (data.error || "Optimization failed");
+        let data = null;
+        await readEventStream(res, (event, payload) => {
+            if (event === "error") {
+                data = { error: payload.message };
+            } else if (event === "node_start" && NODE_STATUS[payload.node]) {
+                // Background branches (PRESCORE, PRERENDER) keep the current status
+                optimizeStatus.textContent = NODE_STATUS[payload.node];
+            } else if (event === "node_end" && payload.node === "ATS") {
+                atsValue.textContent = `${payload.score} / 100`;
+                atsDiv.style.display = "block";
+            } else if (event === "result") {
+                data = payload;
+            }
+        });
+
+        if (!data || data.error) {
+            optimizeStatus.textContent = "Error: " + ((data && data.error) || "Optimization failed");
             optimizeStatus.style.color = "red";
             return;
         }
@@ -206,6 +226,44 @@ optimizeBtn.addEventListener("click", async () => {
 });
 
 
+// ===============================
+// SSE HELPERS
+// ===============================
+const NODE_STATUS = {
+    TAILOR: "Tailoring resume to the job...",
+    ATS: "Scoring against ATS...",
+    IMPROVE: "Improving weak areas...",
+    GENERATE: "Generating document...",
+};
+
+async function readEventStream(res, onEvent) {
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let idx;
+        while ((idx = buffer.indexOf("\n\n")) !== -1) {
+            const frame = buffer.slice(0, idx);
+            buffer = buffer.slice(idx + 2);
+
+            let event = "message";
+            let dataLine = "";
+            for (const line of frame.split("\n")) {
+                if (line.startsWith("event: ")) event = line.slice(7);
+                else if (line.startsWith("data: ")) dataLine += line.slice(6);
+            }
+            // Comment frames (": keep-alive") carry no data
+            if (dataLine) onEvent(event, JSON.parse(dataLine));
+        }
+    }
+}
+
+
 // ===============================
 // RESET BUTTON — CLEAR EVERYTHING
 // ===============================
@@ -0,0 +1,502 @@
+"""
+Offline stand-in for the OpenAI Chat Completions API.
+
+Replays recorded responses (or synthesises plausible ones from the request)
+with configurable latency distributions and error rates, so the backend
+can be load-tested without network access or token spend.
+
+    python -m loadtest.fake_openai --port 9000 --latency-scale 0.1
+
+then start the API with OPENAI_BASE_URL=http://127.0.0.1:9000/v1.
+
+Recorded responses live in --fixtures DIR as <KIND>.json files, each a
+JSON list of assistant message contents; they are replayed round-robin.
+KIND is one of TAILOR, IMPROVE, IMPROVE_PARTIAL, ATS, EXTRACT, REPAIR, OTHER.
+"""
+import argparse
+import ast
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import os
+import random
+import re
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# -------------------------------------------------------
+# CONFIG
+# -------------------------------------------------------
+
+# System-prompt markers → prompt kind
+# First match wins, so the per-section tailor prompts come before TAILOR
+PROMPT_MARKERS = {
+    "TAILOR_SUMMARY": "Rewrite ONLY the professional summary",
+    "TAILOR_EXPERIENCE": "bullet points of ONE experience entry",
+    "TAILOR_SKILLS": "Rewrite the SKILLS section",
+    "TAILOR": "resume tailoring expert",
+    "IMPROVE_PARTIAL": "PARTIAL REWRITE",
+    "IMPROVE": "resume refinement expert",
+    "ATS": "ATS scoring engine",
+    "EXTRACT": "world-class resume parser",
+    "REPAIR": "You repair ONE fragment",
+}
+
+# Median seconds and lognormal sigma per kind, roughly what production sees
+DEFAULT_LATENCY = {
+    "TAILOR": (18.0, 0.35),
+    "TAILOR_SUMMARY": (4.0, 0.35),
+    "TAILOR_EXPERIENCE": (6.0, 0.35),
+    "TAILOR_SKILLS": (3.0, 0.35),
+    "IMPROVE": (18.0, 0.35),
+    "IMPROVE_PARTIAL": (7.0, 0.35),
+    "ATS": (3.0, 0.4),
+    "EXTRACT": (5.0, 0.4),
+    "REPAIR": (1.5, 0.4),
+    "OTHER": (4.0, 0.4),
+}
+
+config = {
+    "latency": dict(DEFAULT_LATENCY),
+    "latency_scale": 1.0,
+    "error_rate": 0.0,
+    "rate_limit_rate": 0.0,
+    "truncate_rate": 0.0,
+    "fixtures": {},
+    "seed": None,
+}
+
+rng = random.Random()
+stats = {"requests": 0, "errors": 0, "rate_limited": 0, "truncated": 0}
+
+app = FastAPI(title="Fake OpenAI")
+
+
+# -------------------------------------------------------
+# REQUEST HELPERS
+# -------------------------------------------------------
+
+def prompt_kind(messages: list) -> str:
+    system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+    for kind, marker in PROMPT_MARKERS.items():
+        if marker in system:
+            return kind
+    return "OTHER"
+
+
+def user_text(messages: list) -> str:
+    return "\n".join(m.get("content", "") for m in messages if m.get("role") == "user")
+
+
+def labelled_literal(text: str, label: str, default=None):
+    """
+    Pull `Label: <python or json literal>` out of a prompt.
+    """
+    match = re.search(rf"^{re.escape(label)}[^:\n]*:\s*(.+)$", text, re.MULTILINE)
+    if not match:
+        return default
+    raw = match.group(1).strip()
+    for loader in (json.loads, ast.literal_eval):
+        try:
+            return loader(raw)
+        except Exception:
+            continue
+    return default
+
+
+def labelled_text(text: str, label: str) -> str:
+    match = re.search(rf"^{re.escape(label)}:\s*(.*)", text, re.MULTILINE | re.DOTALL)
+    return match.group(1) if match else ""
+
+
+def jd_keywords(jd: str, limit: int = 6) -> list:
+    words = re.findall(r"[A-Za-z][A-Za-z+#.]{3,}", jd)
+    seen = []
+    for w in words:
+        if w.lower() not in (s.lower() for s in seen):
+            seen.append(w)
+    return seen[:limit]
+
+
+def stable_score(text: str) -> int:
+    digest = hashlib.sha256(text.encode("utf-8")).digest()
+    return 80 + digest[0] % 18
+
+
+# -------------------------------------------------------
+# SYNTHETIC RESPONDERS
+# -------------------------------------------------------
+
+BULLET_TARGETS = [7, 6, 4]
+
+
+def tailored_sections(sections: dict, jd: str) -> dict:
+    keywords = jd_keywords(jd)
+    experience = []
+    for i, job in enumerate(sections.get("experience") or []):
+        bullets = list(job.get("bullets") or job.get("responsibilities") or [])
+        need = BULLET_TARGETS[i] if i < len(BULLET_TARGETS) else len(bullets)
+        while len(bullets) < need:
+            bullets.append(f"Delivered {keywords[len(bullets) % len(keywords)] if keywords else 'results'} improvements")
+        experience.append({
+            "company": job.get("company", ""),
+            "title": job.get("title", ""),
+            "location": job.get("location", ""),
+            "dates": job.get("dates", ""),
+            "bullets": bullets[:need],
+        })
+
+    skills = sections.get("skills") or {}
+    if not isinstance(skills, dict):
+        skills = {"Technical Skills": list(skills)}
+    skills = {k: list(v or []) for k, v in skills.items()}
+    skills.setdefault("Tools", []).extend(keywords[:3])
+
+    summary = (sections.get("summary") or "Experienced engineer.")[:500]
+    if keywords:
+        summary += " Skilled in " + ", ".join(keywords[:4]) + "."
+
+    return {"summary": summary[:790], "experience": experience, "skills": skills}
+
+
+def respond_tailor(messages: list) -> str:
+    text = user_text(messages)
+    sections = labelled_literal(text, "Original Sections", {}) or {}
+    return json.dumps(tailored_sections(sections, labelled_text(text, "Job Description")))
+
+
+def respond_tailor_summary(messages: list) -> str:
+    text = user_text(messages)
+    sections = {"summary": labelled_literal(text, "Original Summary", "") or ""}
+    return json.dumps({"summary": tailored_sections(sections, labelled_text(text, "Job Description"))["summary"]})
+
+
+def respond_tailor_experience(messages: list) -> str:
+    text = user_text(messages)
+    job = labelled_literal(text, "Experience Entry", {}) or {}
+    need = labelled_literal(text, "Bullet Count", 4)
+    keywords = jd_keywords(labelled_text(text, "Job Description"))
+    bullets = list(job.get("bullets") or job.get("responsibilities") or [])
+    while len(bullets) < need:
+        bullets.append(f"Delivered {keywords[len(bullets) % len(keywords)] if keywords else 'results'} improvements")
+    return json.dumps({"bullets": bullets[:need]})
+
+
+def respond_tailor_skills(messages: list) -> str:
+    text = user_text(messages)
+    sections = {"skills": labelled_literal(text, "Original Skills", {}) or {}}
+    return json.dumps({"skills": tailored_sections(sections, labelled_text(text, "Job Description"))["skills"]})
+
+
+def respond_improve(messages: list) -> str:
+    text = user_text(messages)
+    sections = labelled_literal(text, "Resume Sections", {}) or {}
+    return json.dumps(tailored_sections(sections, labelled_text(text, "Job Description")))
+
+
+def respond_improve_partial(messages: list) -> str:
+    text = user_text(messages)
+    requested = labelled_literal(text, "Sections To Rewrite", {}) or {}
+    jd = labelled_text(text, "Job Description")
+    result = {}
+    if "summary" in requested:
+        result["summary"] = tailored_sections({"summary": requested["summary"]}, jd)["summary"]
+    if "skills" in requested:
+        result["skills"] = tailored_sections({"skills": requested["skills"]}, jd)["skills"]
+    if "experience" in requested:
+        keywords = jd_keywords(jd)
+        result["experience"] = []
+        for job in requested["experience"]:
+            position = job.get("position", 1) - 1
+            bullets = list(job.get("bullets") or job.get("responsibilities") or [])
+            need = BULLET_TARGETS[position] if position < len(BULLET_TARGETS) else len(bullets)
+            while len(bullets) < need:
+                bullets.append(f"Delivered {keywords[len(bullets) % len(keywords)] if keywords else 'results'} improvements")
+            result["experience"].append({"position": position + 1, "bullets": bullets[:need]})
+    return json.dumps(result)
+
+
+def respond_ats(messages: list) -> str:
+    text = user_text(messages)
+    jd = labelled_text(text, "Job Description")
+    return json.dumps({
+        "score": stable_score(text),
+        "analysis": {
+            "missing_keywords": jd_keywords(jd, 3),
+            "weak_areas": "Quantified impact in recent roles",
+            "recommendations": "Add metrics and mirror the JD terminology",
+        },
+    })
+
+
+def respond_extract(messages: list) -> str:
+    lines = [l.strip(" •-*\t") for l in user_text(messages).splitlines() if l.strip()]
+    bullets = [l for l in lines if len(l) > 40][:8] or lines[:3]
+    return json.dumps({
+        "summary": lines[0] if lines else "",
+        "experience": [{
+            "title": "Software Engineer",
+            "company": "Example Corp",
+            "location": "Remote",
+            "dates": "2021 - Present",
+            "responsibilities": bullets,
+        }],
+        "education": [{
+            "degree": "B.S. Computer Science",
+            "institution": "Example University",
+            "location": "",
+            "dates": "2016 - 2020",
+        }],
+        "skills": {
+            "certifications": [],
+            "programming": ["Python"],
+            "ml_ai": [],
+            "libraries_frameworks": [],
+            "devops": ["Docker"],
+            "other": [],
+        },
+    })
+
+
+def value_for_schema(schema: dict, defs: dict):
+    if "$ref" in schema:
+        return value_for_schema(defs[schema["$ref"].split("/")[-1]], defs)
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties", {})
+        return {name: value_for_schema(properties[name], defs) for name in schema.get("required", [])}
+    if kind == "array":
+        return [value_for_schema(schema.get("items", {}), defs)]
+    if kind == "integer":
+        return 85
+    return "Repaired"
+
+
+def respond_repair(messages: list) -> str:
+    # Keep a fragment that still parses, otherwise synthesise one from the schema
+    text = user_text(messages)
+    broken = labelled_literal(text, "Broken Fragment")
+    if broken is None:
+        schema = labelled_literal(text, "Schema", {}) or {}
+        broken = value_for_schema(schema, schema.get("$defs", {}))
+    return json.dumps({"value": broken})
+
+
+def respond_other(messages: list) -> str:
+    return json.dumps({})
+
+
+RESPONDERS = {
+    "TAILOR": respond_tailor,
+    "TAILOR_SUMMARY": respond_tailor_summary,
+    "TAILOR_EXPERIENCE": respond_tailor_experience,
+    "TAILOR_SKILLS": respond_tailor_skills,
+    "IMPROVE": respond_improve,
+    "IMPROVE_PARTIAL": respond_improve_partial,
+    "ATS": respond_ats,
+    "EXTRACT": respond_extract,
+    "REPAIR": respond_repair,
+    "OTHER": respond_other,
+}
+
+
+# Kinds whose output is cut short by --truncate-rate (like a max_tokens stop)
+TRUNCATABLE = ("TAILOR", "IMPROVE", "IMPROVE_PARTIAL", "EXTRACT")
+
+
+def response_content(kind: str, messages: list) -> str:
+    replay = config["fixtures"].get(kind)
+    content = next(replay) if replay else RESPONDERS[kind](messages)
+    if kind in TRUNCATABLE and rng.random() < config["truncate_rate"]:
+        stats["truncated"] += 1
+        content = content[:int(len(content) * rng.uniform(0.6, 0.95))]
+    return content
+
+
+# -------------------------------------------------------
+# LATENCY / FAILURE INJECTION
+# -------------------------------------------------------
+
+def sample_latency(kind: str) -> float:
+    median, sigma = config["latency"].get(kind, DEFAULT_LATENCY["OTHER"])
+    return median * math.exp(sigma * rng.gauss(0, 1)) * config["latency_scale"]
+
+
+def injected_failure():
+    roll = rng.random()
+    if roll < config["rate_limit_rate"]:
+        stats["rate_limited"] += 1
+        return JSONResponse(
+            status_code=429,
+            headers={"retry-after": "1"},
+            content={"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}},
+        )
+    if roll < config["rate_limit_rate"] + config["error_rate"]:
+        stats["errors"] += 1
+        return JSONResponse(
+            status_code=500,
+            content={"error": {"message": "Injected server error (fake)", "type": "server_error", "code": None}},
+        )
+    return None
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+# -------------------------------------------------------
+# ENDPOINTS
+# -------------------------------------------------------
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+
+    failure = injected_failure()
+    if failure is not None:
+        await asyncio.sleep(sample_latency("OTHER") * 0.05)
+        return failure
+
+    messages = body.get("messages", [])
+    model = body.get("model", "gpt-4.1")
+    kind = prompt_kind(messages)
+    n = int(body.get("n") or 1)
+    contents = [response_content(kind, messages) for _ in range(n)]
+    latency = sample_latency(kind)
+
+    prompt_tokens = estimate_tokens(json.dumps(messages))
+    completion_tokens = sum(estimate_tokens(c) for c in contents)
+    completion_id = f"chatcmpl-fake-{uuid.uuid4().hex[:12]}"
+    created = int(time.time())
+
+    usage = {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "prompt_tokens_details": {"cached_tokens": 0},
+    }
+
+    if body.get("stream"):
+        include_usage = (body.get("stream_options") or {}).get("include_usage")
+        return StreamingResponse(
+            stream_chunks(completion_id, created, model, contents[0], latency, usage if include_usage else None),
+            media_type="text/event-stream",
+        )
+
+    await asyncio.sleep(latency)
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [
+            {"index": i, "message": {"role": "assistant", "content": c}, "finish_reason": "stop"}
+            for i, c in enumerate(contents)
+        ],
+        "usage": usage,
+    }
+
+
+async def stream_chunks(completion_id, created, model, content, latency, usage=None):
+    # ~10% of the latency before the first token, the rest spread evenly
+    await asyncio.sleep(latency * 0.1)
+    pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+    delay = latency * 0.9 / len(pieces)
+
+    for i, piece in enumerate(pieces):
+        delta = {"content": piece}
+        if i == 0:
+            delta["role"] = "assistant"
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+        }
+        yield f"data: {json.dumps(chunk)}\n\n"
+        await asyncio.sleep(delay)
+
+    done = {
+        "id": completion_id,
+        "object": "chat.completion.chunk",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+    }
+    yield f"data: {json.dumps(done)}\n\n"
+    if usage:
+        # stream_options.include_usage: a final chunk with no choices
+        yield f"data: {json.dumps({**done, 'choices': [], 'usage': usage})}\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/stats")
+def get_stats():
+    return stats
+
+
+# -------------------------------------------------------
+# CLI
+# -------------------------------------------------------
+
+def load_fixtures(directory: str) -> dict:
+    fixtures = {}
+    for kind in RESPONDERS:
+        path = os.path.join(directory, f"{kind}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                recorded = json.load(f)
+            if recorded:
+                fixtures[kind] = itertools.cycle(recorded)
+    return fixtures
+
+
+def parse_latency(value: str):
+    """
+    KIND=MEDIAN[:SIGMA], e.g. TAILOR=12:0.3
+    """
+    kind, _, spec = value.partition("=")
+    median, _, sigma = spec.partition(":")
+    return kind.upper(), (float(median), float(sigma or 0.35))
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Offline fake OpenAI server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", action="append", default=[], type=parse_latency,
+                        help="Override a kind's latency: KIND=MEDIAN[:SIGMA] (seconds)")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Multiply every sampled latency (0.1 = 10x faster)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 500 responses")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="Fraction of 429 responses")
+    parser.add_argument("--truncate-rate", type=float, default=0.0,
+                        help="Fraction of TAILOR/IMPROVE/EXTRACT responses cut short (exercises repair)")
+    parser.add_argument("--fixtures", help="Directory of recorded <KIND>.json responses")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config["latency"].update(dict(args.latency))
+    config["latency_scale"] = args.latency_scale
+    config["error_rate"] = args.error_rate
+    config["rate_limit_rate"] = args.rate_limit_rate
+    config["truncate_rate"] = args.truncate_rate
+    if args.fixtures:
+        config["fixtures"] = load_fixtures(args.fixtures)
+    if args.seed is not None:
+        rng.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""
+PDF text extraction benchmark: the original sequential pdfplumber loop
+against app/utils/pdf_extract.py, over a corpus of PDFs, with several
+uploads in flight at once.
+
+    python -m loadtest.pdf_bench --corpus samples/ --concurrency 8 --repeat 5
+
+Without --corpus a synthetic corpus is generated: text resumes of 1-5
+pages plus graphics-heavy variants (thousands of vector shapes per page,
+the kind of layout that makes pdfplumber slow).
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pdfplumber
+
+from app.utils import pdf_extract
+from loadtest.run import percentile
+
+WORDS = (
+    "built deployed scaled python pipelines kubernetes latency reduced revenue customers "
+    "designed migrated services analytics dashboards models training inference cost team "
+    "led mentored automated testing reliability incidents postgres kafka terraform aws"
+).split()
+
+
+# -------------------------------------------------------
+# SYNTHETIC CORPUS
+# -------------------------------------------------------
+
+def pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def page_stream(rng: random.Random, page: int, shapes: int) -> bytes:
+    ops = ["BT /F1 10 Tf 12 TL 50 760 Td"]
+    ops.append(f"({pdf_escape(f'Jane Doe - page {page + 1}')}) Tj T*")
+    for _ in range(55):
+        line = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 14)))
+        ops.append(f"({pdf_escape('- ' + line.capitalize() + '.')}) Tj T*")
+    ops.append("ET")
+    # Decorative vector art: invisible to the text layer, not to pdfplumber
+    for _ in range(shapes):
+        x, y = rng.uniform(0, 600), rng.uniform(0, 780)
+        ops.append(f"0.9 0.9 0.95 rg {x:.1f} {y:.1f} 3 3 re f")
+    return "\n".join(ops).encode("latin-1")
+
+
+def build_pdf(pages: int, shapes: int, seed: int) -> bytes:
+    """
+    A minimal valid PDF with Helvetica text pages.
+    """
+    rng = random.Random(seed)
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # page tree, filled in below
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for page in range(pages):
+        stream = page_stream(rng, page, shapes)
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content_ref = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_ref
+        )
+        kids.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), pages)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def synthetic_corpus(directory: str) -> list:
+    paths = []
+    for pages in (1, 2, 3, 5):
+        for shapes, kind in ((0, "text"), (4000, "graphics")):
+            path = os.path.join(directory, f"resume_{pages}p_{kind}.pdf")
+            with open(path, "wb") as f:
+                f.write(build_pdf(pages, shapes, seed=pages * 31 + shapes))
+            paths.append(path)
+    return paths
+
+
+# -------------------------------------------------------
+# EXTRACTORS
+# -------------------------------------------------------
+
+def baseline(path: str) -> str:
+    # The pre-engine implementation (with the None-page crash fixed)
+    text = ""
+    with pdfplumber.open(path) as pdf:
+        for page in pdf.pages:
+            text += (page.extract_text() or "") + "\n"
+    return text
+
+
+EXTRACTORS = {
+    "pdfplumber": baseline,
+    "engine": pdf_extract.extract_pdf_text,
+}
+
+
+def bench(name: str, paths: list, repeat: int, concurrency: int) -> dict:
+    fn = EXTRACTORS[name]
+    latencies = {path: [] for path in paths}
+    chars = {}
+
+    def one(path):
+        started = time.perf_counter()
+        text = fn(path)
+        latencies[path].append(time.perf_counter() - started)
+        chars[path] = len(text)
+
+    jobs = [path for _ in range(repeat) for path in paths]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(one, jobs))
+    wall = time.perf_counter() - started
+
+    everything = [s for values in latencies.values() for s in values]
+    return {
+        "files_per_second": len(jobs) / wall,
+        "p50": percentile(everything, 50),
+        "p95": percentile(everything, 95),
+        "max": max(everything),
+        "per_file_p50": {os.path.basename(p): percentile(v, 50) for p, v in latencies.items()},
+        "chars": {os.path.basename(p): c for p, c in chars.items()},
+    }
+
+
+def print_report(results: dict):
+    names = list(results)
+    print(f"\n{'extractor':<14}{'files/s':>10}{'p50':>9}{'p95':>9}{'max':>9}")
+    for name in names:
+        r = results[name]
+        print(f"{name:<14}{r['files_per_second']:>10.2f}{r['p50']:>9.3f}{r['p95']:>9.3f}{r['max']:>9.3f}")
+
+    print(f"\n{'file':<32}" + "".join(f"{n + ' p50':>18}{'chars':>8}" for n in names))
+    for file in results[names[0]]["per_file_p50"]:
+        print(f"{file:<32}" + "".join(
+            f"{results[n]['per_file_p50'][file]:>18.3f}{results[n]['chars'][file]:>8}" for n in names
+        ))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF text extraction benchmark")
+    parser.add_argument("--corpus", help="Directory of PDFs (default: generated corpus)")
+    parser.add_argument("--repeat", type=int, default=3, help="Passes over the corpus per extractor")
+    parser.add_argument("--concurrency", type=int, default=4, help="Uploads extracted at once")
+    parser.add_argument("--extractor", action="append", choices=sorted(EXTRACTORS),
+                        help="Only run these (default: all)")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(
+                os.path.join(args.corpus, name) for name in os.listdir(args.corpus) if name.lower().endswith(".pdf")
+            )
+        else:
+            paths = synthetic_corpus(tmp)
+
+        # Start the pool outside the timings
+        pdf_extract.extract_pdf_text(paths[0])
+
+        results = {
+            name: bench(name, paths, args.repeat, args.concurrency)
+            for name in (args.extractor or list(EXTRACTORS))
+        }
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
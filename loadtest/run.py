@@ -0,0 +1,251 @@
+"""
+End-to-end load driver: N concurrent users each upload a resume and run
+one optimization, then report throughput and latency percentiles per
+endpoint and per graph node.
+
+    python -m loadtest.run --base-url http://127.0.0.1:8000 --users 50
+
+Per-node timings come from the node_end events of /optimize/stream; pass
+--no-stream to exercise the plain POST /optimize/ instead.
+"""
+import argparse
+import asyncio
+import io
+import json
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+DEFAULT_JD = """Senior Machine Learning Engineer
+Build and deploy machine learning pipelines on AWS using Python, PyTorch and Docker.
+Experience with Kubernetes, MLOps, CI/CD and LLM applications is a plus.
+"""
+
+
+# -------------------------------------------------------
+# FIXTURES
+# -------------------------------------------------------
+
+def sample_resume_docx() -> bytes:
+    import docx
+
+    doc = docx.Document()
+    doc.add_paragraph("Jane Doe")
+    doc.add_paragraph("SUMMARY")
+    doc.add_paragraph("Machine learning engineer with six years building production data products in Python.")
+    doc.add_paragraph("EXPERIENCE")
+    doc.add_paragraph("ML Engineer, Example Corp, Remote, 2021 - Present")
+    for i in range(6):
+        doc.add_paragraph(f"• Built and maintained model training pipeline number {i} serving millions of predictions daily")
+    doc.add_paragraph("EDUCATION")
+    doc.add_paragraph("B.S. Computer Science, Example University, 2016 - 2020")
+    doc.add_paragraph("SKILLS")
+    doc.add_paragraph("Python, SQL, PyTorch, Docker")
+
+    buf = io.BytesIO()
+    doc.save(buf)
+    return buf.getvalue()
+
+
+# -------------------------------------------------------
+# RECORDING
+# -------------------------------------------------------
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def add(self, name: str, seconds: float):
+        self.latencies[name].append(seconds)
+
+    def fail(self, name: str):
+        self.errors[name] += 1
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lo, hi = int(rank), min(int(rank) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+# -------------------------------------------------------
+# USER SESSION
+# -------------------------------------------------------
+
+async def upload(client, rec, user_id, resume_bytes, filename):
+    files = {"file": (filename, resume_bytes)}
+    data = {
+        "user_id": user_id,
+        "full_name": "Load Test",
+        "phone": "555-0100",
+        "email": f"{user_id}@example.com",
+    }
+    started = time.perf_counter()
+    resp = await client.post("/resume/upload", data=data, files=files)
+    elapsed = time.perf_counter() - started
+    if resp.status_code != 200 or "error" in resp.json():
+        rec.fail("upload")
+        return False
+    rec.add("upload", elapsed)
+    return True
+
+
+async def optimize(client, rec, user_id, jd):
+    started = time.perf_counter()
+    resp = await client.post("/optimize/", json={"user_id": user_id, "job_description": jd})
+    elapsed = time.perf_counter() - started
+    if resp.status_code != 200 or "error" in resp.json():
+        rec.fail("optimize")
+        return False
+    rec.add("optimize", elapsed)
+    return True
+
+
+async def optimize_stream(client, rec, user_id, jd):
+    started = time.perf_counter()
+    first_byte = None
+    event = None
+    ok = False
+
+    async with client.stream("POST", "/optimize/stream", json={"user_id": user_id, "job_description": jd}) as resp:
+        if resp.status_code != 200:
+            rec.fail("optimize/stream")
+            return False
+        async for line in resp.aiter_lines():
+            if first_byte is None and line.startswith("event:"):
+                first_byte = time.perf_counter() - started
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                payload = json.loads(line[6:])
+                if event == "node_end":
+                    rec.add(f"node:{payload['node']}", payload["elapsed_ms"] / 1000)
+                elif event == "result":
+                    ok = True
+                elif event == "error":
+                    break
+
+    if not ok:
+        rec.fail("optimize/stream")
+        return False
+    rec.add("optimize/stream", time.perf_counter() - started)
+    if first_byte is not None:
+        rec.add("optimize/stream:first_event", first_byte)
+    return True
+
+
+async def user_session(client, rec, resume_bytes, filename, jd, stream):
+    user_id = f"loadtest-{uuid.uuid4()}"
+    try:
+        if not await upload(client, rec, user_id, resume_bytes, filename):
+            return False
+        if stream:
+            return await optimize_stream(client, rec, user_id, jd)
+        return await optimize(client, rec, user_id, jd)
+    except httpx.HTTPError:
+        rec.fail("transport")
+        return False
+
+
+# -------------------------------------------------------
+# REPORT
+# -------------------------------------------------------
+
+def report(rec: Recorder, wall: float, completed: int, users: int) -> dict:
+    rows = {}
+    for name, values in sorted(rec.latencies.items()):
+        rows[name] = {
+            "count": len(values),
+            "errors": rec.errors.get(name, 0),
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": max(values),
+        }
+    for name, count in rec.errors.items():
+        rows.setdefault(name, {"count": 0, "errors": count})
+
+    return {
+        "users": users,
+        "completed": completed,
+        "wall_seconds": wall,
+        "users_per_second": completed / wall if wall else 0.0,
+        "requests_per_second": sum(len(v) for k, v in rec.latencies.items() if ":" not in k) / wall if wall else 0.0,
+        "latency": rows,
+    }
+
+
+def print_report(summary: dict):
+    print(f"\nusers={summary['users']} completed={summary['completed']} "
+          f"wall={summary['wall_seconds']:.1f}s "
+          f"throughput={summary['users_per_second']:.2f} users/s "
+          f"({summary['requests_per_second']:.2f} req/s)\n")
+    print(f"{'name':<32}{'count':>7}{'errors':>8}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for name, row in summary["latency"].items():
+        if not row["count"]:
+            print(f"{name:<32}{0:>7}{row['errors']:>8}")
+            continue
+        print(f"{name:<32}{row['count']:>7}{row['errors']:>8}"
+              f"{row['p50']:>9.2f}{row['p95']:>9.2f}{row['p99']:>9.2f}{row['max']:>9.2f}")
+
+
+# -------------------------------------------------------
+# MAIN
+# -------------------------------------------------------
+
+async def run(args):
+    if args.resume:
+        with open(args.resume, "rb") as f:
+            resume_bytes = f.read()
+        filename = args.resume.rsplit("/", 1)[-1]
+    else:
+        resume_bytes = sample_resume_docx()
+        filename = "loadtest_resume.docx"
+
+    jd = DEFAULT_JD
+    if args.jd:
+        with open(args.jd) as f:
+            jd = f.read()
+
+    rec = Recorder()
+    gate = asyncio.Semaphore(args.concurrency or args.users)
+    limits = httpx.Limits(max_connections=args.users + 10)
+    timeout = httpx.Timeout(args.timeout)
+
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=timeout) as client:
+        async def one():
+            async with gate:
+                return await user_session(client, rec, resume_bytes, filename, jd, not args.no_stream)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(one() for _ in range(args.users)))
+        wall = time.perf_counter() - started
+
+    summary = report(rec, wall, sum(results), args.users)
+    print_report(summary)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resume bot end-to-end load test")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=10, help="Number of simulated users")
+    parser.add_argument("--concurrency", type=int, help="Max users in flight (default: all)")
+    parser.add_argument("--resume", help="PDF/DOCX to upload (default: generated DOCX)")
+    parser.add_argument("--jd", help="Text file with the job description")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--no-stream", action="store_true", help="Use POST /optimize/ instead of /optimize/stream")
+    parser.add_argument("--json", help="Also write the summary to this JSON file")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
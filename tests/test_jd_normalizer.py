@@ -0,0 +1,44 @@
+from app.services.jd_normalizer import content_hash, heading_kind, normalize_jd
+
+JD = """Acme Corp
+About Us
+Acme builds logistics software for thousands of retailers worldwide.
+What You'll Do
+- Design and build backend services for order routing
+- Improve reliability and observability of the platform
+{requirements_heading}
+- 5+ years of experience with Python or Go
+- Strong PostgreSQL and data modeling skills
+- Experience with Kafka and event-driven systems
+Benefits
+- Health, dental and vision insurance
+- Generous parental leave
+Acme is an equal opportunity employer.
+"""
+
+
+def test_looking_for_heading_is_requirements():
+    assert heading_kind("Who We Are Looking For") == "requirements"
+    assert heading_kind("What we're looking for:") == "requirements"
+    assert heading_kind("Who We Are") == "boilerplate"
+    assert heading_kind("Our team uses Python") == "other"
+
+
+def test_requirements_survive_and_boilerplate_goes():
+    result = normalize_jd(JD.format(requirements_heading="Who We Are Looking For"))
+    assert "Python" in result["text"]
+    assert len(result["requirements"]["requirements"]) == 3
+    assert "About Us" not in result["text"]
+    assert "parental leave" not in result["text"]
+    assert "equal opportunity" not in result["text"]
+
+
+def test_misread_section_with_job_bullets_is_kept():
+    result = normalize_jd(JD.format(requirements_heading="Our Values"))
+    assert "Kafka" in result["text"]
+    assert "Kafka" in " ".join(result["requirements"]["requirements"])
+    assert "dental" not in result["text"]
+
+
+def test_content_hash_ignores_case_and_whitespace():
+    assert content_hash("Senior  Engineer\nPython") == content_hash("senior engineer python ")
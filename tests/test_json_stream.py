@@ -0,0 +1,54 @@
+import pytest
+
+from app.llm.json_stream import JSONStreamParser, parse_json
+
+RESPONSE = """```json
+{
+  "summary": "Backend engineer",
+  "experience": [
+    {"title": "Engineer", "bullets": ["Built APIs", "Cut latency 40%"]},
+    {"title": "Analyst", "bullets": ["Built dashboards"]}
+  ],
+  "skills": {"Languages": ["Python", "Go"]}
+}
+```"""
+
+
+def test_llm_noise_is_tolerated():
+    text = '{"a": True, "b": None, // note\n "c": [1, 2,], "d": "say "hi"",}'
+    assert parse_json(text) == {"a": True, "b": None, "c": [1, 2], "d": 'say "hi"'}
+
+
+@pytest.mark.parametrize("size", [1, 7, len(RESPONSE)])
+def test_chunk_boundaries_do_not_change_the_result(size):
+    parser = JSONStreamParser(emit_depth=2)
+    events = []
+    for start in range(0, len(RESPONSE), size):
+        events += parser.feed(RESPONSE[start:start + size])
+    assert parser.close() == parse_json(RESPONSE)
+    assert [path for path, _ in events] == [
+        ("summary",),
+        ("experience", 0),
+        ("experience", 1),
+        ("experience",),
+        ("skills", "Languages"),
+        ("skills",),
+    ]
+
+
+def test_truncated_response_keeps_completed_fields():
+    cut = RESPONSE.index('{"title": "Analyst"') + 12
+    parser = JSONStreamParser(emit_depth=1)
+    events = parser.feed(RESPONSE[:cut])
+    with pytest.raises(ValueError, match="Incomplete JSON"):
+        parser.close()
+    assert [path for path, _ in events] == [("summary",)]
+
+
+def test_watched_string_text_arrives_as_it_streams():
+    parser = JSONStreamParser(watch=[("summary",)])
+    parser.feed('{"summary": "Backend eng')
+    assert parser.take_text(("summary",)) == "Backend eng"
+    parser.feed('ineer\\nwith Go", "skills": {}}')
+    assert parser.take_text(("summary",)) == "ineer\nwith Go"
+    assert parser.take_text(("summary",)) == ""
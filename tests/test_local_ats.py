@@ -0,0 +1,54 @@
+from app.services.local_ats import extract_keywords, local_ats_score, stem
+
+JD = """Senior Backend Engineer
+We are hiring a backend engineer to build Python services on Kubernetes.
+You will design Python APIs, deploy services on Kubernetes and tune PostgreSQL.
+Experience with Kafka and event-driven systems is a plus.
+"""
+
+MATCHING = {
+    "summary": "Backend engineer building Python services and APIs on Kubernetes.",
+    "experience": [
+        {"title": "Backend Engineer", "bullets": [
+            "Designed Python APIs deployed on Kubernetes",
+            "Tuned PostgreSQL queries for event-driven Kafka systems",
+        ]},
+    ],
+    "skills": {"Languages": ["Python"], "Tools": ["Kubernetes", "PostgreSQL", "Kafka"]},
+}
+
+UNRELATED = {
+    "summary": "Pastry chef with a decade of restaurant experience.",
+    "experience": [{"title": "Head Chef", "bullets": ["Ran a kitchen of twelve cooks"]}],
+    "skills": {"Cooking": ["Baking", "Plating"]},
+}
+
+
+def test_inflections_meet_at_one_stem():
+    assert stem("deployed") == stem("deploys") == stem("deploying") == stem("deploy")
+
+
+def test_repeated_terms_and_phrases_outweigh_single_mentions():
+    keywords = extract_keywords(JD)
+    assert keywords["backend engineer"] > keywords["python"] > keywords["kafka"]
+    # A bigram seen once is noise, stopwords never count
+    assert "python api" not in keywords
+    assert "we" not in keywords
+
+
+def test_matching_resume_outscores_unrelated_one():
+    matching = local_ats_score(MATCHING, JD)
+    unrelated = local_ats_score(UNRELATED, JD)
+    assert matching["score"] >= 80
+    assert unrelated["score"] < 40
+    assert matching["analysis"]["scorer"] == "local"
+
+
+def test_missing_keywords_use_the_jd_spelling():
+    missing = local_ats_score(UNRELATED, JD)["analysis"]["missing_keywords"]
+    assert "Python" in missing
+    assert "Kubernetes" in missing
+
+
+def test_empty_jd_scores_zero():
+    assert local_ats_score(MATCHING, "the and of")["score"] == 0
@@ -0,0 +1,66 @@
+from app.services.local_extract import local_extract_sections, parse_experience
+
+# Default EXTRACT_MIN_CONFIDENCE: below it a section goes to the LLM
+MIN_CONFIDENCE = 0.8
+
+RESUME = """Jane Doe
+jane@example.com | (555) 123-4567
+SUMMARY
+Backend engineer with eight years building data platforms and APIs in Python.
+Comfortable owning services from design through on-call, and mentoring junior engineers.
+EXPERIENCE
+Software Engineer, Acme Corp, New York, NY
+Jan 2021 – Present
+• Led a team of 4 engineers delivering
+recommendation features
+Data Analyst, Beta Inc, Remote
+June 2018 – Dec 2020
+• Built sales dashboards used by 200 account managers
+EDUCATION
+B.S. Computer Science, State University, 2014 - 2018
+SKILLS
+Languages: Python, SQL, Go
+Tools: Docker, Kubernetes
+"""
+
+
+def test_standard_resume_parses_with_full_confidence():
+    result = local_extract_sections(RESUME)
+    assert all(score >= MIN_CONFIDENCE for score in result["confidence"].values())
+    assert result["sections"]["summary"].startswith("Backend engineer")
+    assert [e["institution"] for e in result["sections"]["education"]] == ["State University"]
+    assert "Python" in result["sections"]["skills"]["programming"]
+
+
+def test_wrapped_bullet_before_next_header_stays_with_its_job():
+    jobs = local_extract_sections(RESUME)["sections"]["experience"]
+    assert len(jobs) == 2
+    assert jobs[0]["responsibilities"] == ["Led a team of 4 engineers delivering recommendation features"]
+    assert (jobs[1]["title"], jobs[1]["company"], jobs[1]["location"]) == ("Data Analyst", "Beta Inc", "Remote")
+    assert jobs[1]["dates"] == "June 2018 – Dec 2020"
+
+
+def test_header_with_competing_company_fields_is_not_trusted():
+    lines = [
+        "Data Analyst, Growth Analytics Team, Beta Inc, Remote",
+        "June 2018 – Dec 2020",
+        "• Built sales dashboards",
+    ]
+    jobs, candidates = parse_experience(lines)
+    assert candidates == [2]
+
+    text = RESUME.replace("Data Analyst, Beta Inc, Remote", lines[0])
+    experience_confidence = local_extract_sections(text)["confidence"]["experience"]
+    assert experience_confidence < 1.0
+
+
+def test_two_dated_headers_in_a_row():
+    jobs, _ = parse_experience([
+        "Intern, Gamma LLC, Austin, TX",
+        "May 2017 – Aug 2017",
+        "Data Analyst, Beta Inc, Remote",
+        "June 2018 – Dec 2020",
+        "• Built sales dashboards",
+    ])
+    assert [job["company"] for job in jobs] == ["Gamma LLC", "Beta Inc"]
+    assert jobs[0]["responsibilities"] == []
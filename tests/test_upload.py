@@ -0,0 +1,56 @@
+import io
+import zipfile
+
+import pytest
+
+from app.utils import upload
+
+
+def docx_bytes() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr("word/document.xml", "<w:document/>")
+    return buffer.getvalue()
+
+
+def test_pdf_is_sniffed_by_content():
+    data = b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n1 0 obj"
+    assert upload.sniff_kind(data, data) == "pdf"
+    # Header after some leading junk still counts
+    junk = b"\x00" * 100 + data
+    assert upload.sniff_kind(junk, junk) == "pdf"
+
+
+def test_docx_needs_word_document_part():
+    data = docx_bytes()
+    assert upload.sniff_kind(data[:upload.SNIFF_BYTES], data) == "docx"
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("xl/workbook.xml", "<workbook/>")
+    with pytest.raises(ValueError, match="Unsupported"):
+        upload.sniff_kind(buffer.getvalue(), buffer.getvalue())
+
+
+def test_legacy_doc_and_garbage_are_rejected():
+    with pytest.raises(ValueError, match="Legacy .doc"):
+        upload.sniff_kind(upload.OLE_MAGIC + b"\x00" * 50, b"")
+    with pytest.raises(ValueError, match="Unsupported"):
+        upload.sniff_kind(b"hello world", b"hello world")
+
+
+def test_inspect_upload_hashes_in_place_and_rewinds():
+    data = docx_bytes()
+    fileobj = io.BytesIO(data)
+    info = upload.inspect_upload(fileobj)
+    assert info["kind"] == "docx"
+    assert info["size"] == len(data)
+    assert fileobj.tell() == 0
+    assert upload.extraction_source(fileobj, "docx") is fileobj
+
+
+def test_inspect_upload_enforces_the_cap(monkeypatch):
+    monkeypatch.setattr(upload, "UPLOAD_MAX_BYTES", 2048)
+    with pytest.raises(upload.UploadTooLarge):
+        upload.inspect_upload(io.BytesIO(b"%PDF-" + b"0" * 4096))